@@ -5,11 +5,12 @@ from django.contrib.contenttypes.models import ContentType
 from django.utils.encoding import smart_str
 
 
-def _bulk_audit(objs, action, get_changes, request=None):
+def _bulk_audit(objs, action, get_changes, request=None, actor=None):
     if not objs:
         return None
 
-    actor = request.user if request else None
+    if request:
+        actor = request.user
     cid = get_cid()
 
     model = objs[0]._meta.model
@@ -34,19 +35,21 @@ def _bulk_audit(objs, action, get_changes, request=None):
     )
 
 
-def bulk_audit_create(objs, request=None):
+def bulk_audit_create(objs, request=None, actor=None):
     return _bulk_audit(
         objs,
         LogEntry.Action.CREATE,
         lambda obj: model_instance_diff(None, obj),
         request=request,
+        actor=actor,
     )
 
 
-def bulk_audit_update(objs, changes, request=None):
+def bulk_audit_update(objs, changes, request=None, actor=None):
     return _bulk_audit(
         objs,
         LogEntry.Action.UPDATE,
         lambda obj: changes,
         request=request,
+        actor=actor,
     )
@@ -1,10 +1,26 @@
+import functools
+import uuid
+from collections import defaultdict
+
 import pycountry
-from django.db.models import Q, QuerySet, TextField
-from django.db.models.functions import Cast
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+from django.db.models import (
+    BooleanField,
+    Case,
+    FloatField,
+    Func,
+    Q,
+    QuerySet,
+    Value,
+    When,
+)
+from django.db.models.functions import Greatest
 from django.utils.text import smart_split
 
 from common.parsing import remove_punctuation
-from core.models import Country, Organization
+from core.models import AltNamesText, Country, Organization
 
 # Countries whose names cannot be deduced from the official name via fuzzy search.
 COUNTRY_MAP = {
@@ -17,57 +33,130 @@ def get_names_to_search(name):
     return [name, remove_punctuation(name)]
 
 
-def search_multiple(querysets: [QuerySet], name: str, fields: [str]):
-    model = querysets[0].model
-    for queryset in querysets:
-        try:
-            return search_names(queryset, name, fields)
-        except model.DoesNotExist:
-            pass
-    raise LookupError(f"Unable to find {model.__name__} for: {name}")
+def search_pycountry(name):
+    results = pycountry.countries.search_fuzzy(name)
+    if len(results) > 1:
+        raise LookupError(f"Multiple countries found for {name}: {results}")
+    return results[0]
 
 
-def search_names(original_query: QuerySet, name: str, fields: [str]):
-    name = (name or "").strip()
-    if not name:
+@functools.cache
+def search_pycountry_cached(name):
+    try:
+        return search_pycountry(name)
+    except LookupError:
         return None
 
-    model = original_query.model
 
-    for field in fields:
-        try:
-            return original_query.annotate(
-                _search_field=Cast(field, output_field=TextField())
-            ).get(_search_field=name)
-        except (model.DoesNotExist, model.MultipleObjectsReturned):
-            continue
+def normalize_name(name):
+    return " ".join(remove_punctuation(name).lower().split())
+
+
+class CountryIndex:
+    """
+    In-memory index of all countries, built with a single query, used to resolve
+    country names without querying the database for each one.
 
-    names_to_search = get_names_to_search(name)
-    for name in names_to_search:
-        query = original_query.all()
-        for part in smart_split(name):
-            filter_combined = None
-            for field in fields:
-                filter_q = Q(**{f"{field}__icontains": part})
-                if not filter_combined:
-                    filter_combined = filter_q
-                else:
-                    filter_combined |= filter_q
+    Tries exact codes and names first, then a case and punctuation insensitive
+    lookup, and finally countries containing all the words in any of the fields.
 
-            query = query.filter(filter_combined)
+    The index is rebuilt whenever the version stored in the shared cache changes,
+    so changes to the countries made by any process are seen by all the others.
+    """
+
+    fields = ("code", "name", "official_name")
+    version_cache_key = "country_index_version"
+
+    def __init__(self):
+        self.invalidate()
+
+    def invalidate(self):
+        """Rebuild the index in this process only, when next used."""
+        self._countries = None
+        self._version = None
+        self._token_matches = {}
+
+    def changed(self):
+        """Rebuild the index in all processes, after countries were changed."""
+        self.invalidate()
+        cache.set(self.version_cache_key, uuid.uuid4().hex, timeout=None)
+
+    def _build(self):
+        countries = list(Country.objects.all())
+        self._by_value = {field: defaultdict(list) for field in self.fields}
+        self._by_normalized = defaultdict(set)
+        self._haystacks = []
+        for country in countries:
+            values = [getattr(country, field) or "" for field in self.fields]
+            for field, value in zip(self.fields, values, strict=True):
+                if value:
+                    self._by_value[field][value].append(country)
+                    self._by_normalized[normalize_name(value)].add(country)
+            self._haystacks.append(
+                (country, [value.lower() for value in values if value])
+            )
+
+        by_code = {country.code.upper(): country for country in countries}
+        for alias, code in COUNTRY_MAP.items():
+            if country := by_code.get(code):
+                self._by_normalized[normalize_name(alias)].add(country)
+        self._by_code = by_code
+        self._countries = countries
+
+    def _ensure_built(self):
+        # Read before building, so changes made meanwhile are not missed.
+        version = cache.get(self.version_cache_key)
+        if self._countries is None or version != self._version:
+            self._build()
+            self._version = version
+
+    def search(self, name: str):
+        name = (name or "").strip()
+        if not name:
+            return None
+
+        self._ensure_built()
+        for field in self.fields:
+            matches = self._by_value[field].get(name, [])
+            if len(matches) == 1:
+                return matches[0]
+
+        matches = self._by_normalized.get(normalize_name(name), set())
+        if len(matches) == 1:
+            return next(iter(matches))
 
         try:
-            return query.get()
-        except (model.DoesNotExist, model.MultipleObjectsReturned):
-            continue
-    raise model.DoesNotExist
+            country = self._token_matches[name]
+        except KeyError:
+            country = self._token_matches[name] = self._match_tokens(name)
+        if country is None:
+            raise Country.DoesNotExist
+        return country
 
+    def _match_tokens(self, name):
+        for to_search in get_names_to_search(name):
+            parts = [part.lower() for part in smart_split(to_search)]
+            matches = [
+                country
+                for country, haystack in self._haystacks
+                if all(any(part in value for value in haystack) for part in parts)
+            ]
+            if len(matches) == 1:
+                return matches[0]
+        return None
 
-def search_pycountry(name):
-    results = pycountry.countries.search_fuzzy(name)
-    if len(results) > 1:
-        raise LookupError(f"Multiple countries found for {name}: {results}")
-    return results[0]
+    def get_or_create(self, code, name):
+        self._ensure_built()
+        try:
+            return self._by_code[code.upper()]
+        except KeyError:
+            pass
+
+        # The index is rebuilt by the Country signals if it was created
+        return Country.objects.get_or_create(code=code, defaults={"name": name})[0]
+
+
+country_index = CountryIndex()
 
 
 def get_country(names: str | list[str]):
@@ -77,29 +166,85 @@ def get_country(names: str | list[str]):
     for name in names:
         name = COUNTRY_MAP.get(name, name)
         try:
-            return search_names(
-                Country.objects.all(),
-                name,
-                ["code", "name", "official_name"],
-            )
+            return country_index.search(name)
         except Country.DoesNotExist:
             pass
 
         for to_search in get_names_to_search(name):
-            try:
-                country = search_pycountry(to_search)
-            except LookupError:
-                continue
-
-            return Country.objects.get_or_create(
-                code=country.alpha_2,
-                defaults={
-                    "name": country.name,
-                },
-            )[0]
+            if country := search_pycountry_cached(to_search):
+                return country_index.get_or_create(country.alpha_2, country.name)
     raise LookupError(f"Unable to find country for: {names}")
 
 
+class ArrayTrigramSimilarity(Func):
+    """Highest trigram similarity between the string and any item of the array."""
+
+    output_field = FloatField()
+
+    def __init__(self, expression, string, **extra):
+        if not hasattr(string, "resolve_expression"):
+            string = Value(string)
+        super().__init__(expression, string, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        array_sql, array_params = compiler.compile(self.source_expressions[0])
+        string_sql, string_params = compiler.compile(self.source_expressions[1])
+        # Both parts are compiled expressions, with the values passed as params.
+        sql = (
+            f"(SELECT max(similarity(item, {string_sql})) "  # noqa: S608
+            f"FROM unnest({array_sql}) AS item)"
+        )
+        return sql, (*string_params, *array_params)
+
+
+def search_organization(queryset: QuerySet, name: str, threshold: float = None):
+    """
+    Return the organization whose name, or one of the alternative names, is the
+    most similar to `name`, with a trigram similarity of at least `threshold`.
+
+    Candidates are found using the trigram indexes. Raises
+    `Organization.DoesNotExist` if no organization is similar enough, or if the
+    best match is ambiguous.
+    """
+    name = (name or "").strip()
+    if not name:
+        return None
+
+    if threshold is None:
+        threshold = settings.FUZZY_ORGANIZATION_THRESHOLD
+
+    matches = list(
+        queryset.annotate(alt_names_text=AltNamesText("alt_names"))
+        .filter(
+            Q(name__trigram_similar=name) | Q(alt_names_text__trigram_word_similar=name)
+        )
+        .annotate(
+            similarity=Greatest(
+                TrigramSimilarity("name", name),
+                ArrayTrigramSimilarity("alt_names", name),
+            ),
+            exact=Case(
+                When(
+                    Q(name__iexact=name) | Q(alt_names__contains=[name]),
+                    then=Value(True),
+                ),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
+        .filter(similarity__gte=threshold)
+        .order_by("-similarity", "-exact", "pk")[:2]
+    )
+    if not matches:
+        raise Organization.DoesNotExist
+    if len(matches) > 1 and (matches[0].similarity, matches[0].exact) == (
+        matches[1].similarity,
+        matches[1].exact,
+    ):
+        raise Organization.DoesNotExist
+    return matches[0]
+
+
 def get_organization(names: str | list[str], party, country):
     if not isinstance(names, list):
         names = [names]
@@ -112,12 +257,11 @@ def get_organization(names: str | list[str], party, country):
         querysets.append(Organization.objects.filter(country=party))
         querysets.append(Organization.objects.filter(government=party))
 
-    if querysets:
+    for queryset in querysets:
         try:
-            for name in names:
-                return search_multiple(querysets, name, ["name", "alt_names"])
-        except LookupError:
-            pass
+            return search_organization(queryset, names[0])
+        except Organization.DoesNotExist:
+            continue
 
     return Organization.objects.create(
         name=names[0].strip(), acronym="", country=country, government=party
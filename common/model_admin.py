@@ -311,6 +311,7 @@ class ModelResource(_QuerysetMixIn, resources.ModelResource):
         excluded_fields = (
             EncryptedFieldMixin,
             models.FileField,
+            models.GeneratedField,
             KronosId,
             RichTextField,
         )
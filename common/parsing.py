@@ -1,9 +1,12 @@
+import codecs
+import json
 import re
 import string
 
 from core.models import BaseContact
 
 punctuation_translate = {ord(c): " " for c in string.punctuation}
+WHITESPACE = re.compile(r"\s*")
 CONTACT_MAPPING = {
     "organization": "organization",
     "title": "title",
@@ -90,3 +93,63 @@ def normalize_title(raw_title):
     localized_title = title if title in BaseContact.LocalizedTitle.values else ""
 
     return english_title, localized_title
+
+
+def iter_json_array(fp, chunk_size=64 * 1024):
+    """
+    Yield the items of the JSON array in the binary UTF-8 file one by one, reading
+    it in chunks instead of loading the whole file in memory.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer, pos, eof = "", 0, False
+    started = expect_comma = False
+
+    while True:
+        # Skip whitespace, reading more data as needed
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or eof:
+                break
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+            pos = 0
+
+        if pos == len(buffer):
+            raise ValueError("Unexpected end of JSON array")
+
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+        if expect_comma:
+            if buffer[pos] != ",":
+                raise ValueError(f"Expected ',' in JSON array, got {buffer[pos]!r}")
+            expect_comma = False
+            pos += 1
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = len(buffer)
+        # Items are always followed by "," or "]", otherwise the item (e.g. a number)
+        # might continue in the next chunk.
+        following = WHITESPACE.match(buffer, end).end()
+        if not eof and buffer[following : following + 1] not in (",", "]"):
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+            pos = 0
+            continue
+
+        yield item
+        pos = end
+        expect_comma = True
@@ -343,6 +343,9 @@ EMAIL_HOST_PASSWORD = env.str("EMAIL_HOST_PASSWORD", default="")
 EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", default=False)
 # https://docs.djangoproject.com/en/4.0/ref/settings/#email-timeout
 EMAIL_TIMEOUT = env.int("EMAIL_TIMEOUT", default=30)
+# Maximum number of pending emails of the same mailing sent by one worker job over
+# a single SMTP connection. Set to 1 to open a new connection for every email.
+EMAIL_SEND_BATCH_SIZE = env.int("EMAIL_SEND_BATCH_SIZE", default=1)
 # https://docs.djangoproject.com/en/4.0/ref/settings/#std:setting-DEFAULT_FROM_EMAIL
 DEFAULT_FROM_EMAIL = env.str("DEFAULT_FROM_EMAIL", default="") or (
     "noreply@" + socket.gethostname()
@@ -634,10 +637,44 @@ KRONOS_HOST = env.str("KRONOS_HOST", default="")
 KRONOS_USERNAME = env.str("KRONOS_USERNAME", default="")
 KRONOS_PASSWORD = env.str("KRONOS_PASSWORD", default="")
 
+# Kronos HTTP client
+KRONOS_TIMEOUT = env.int("KRONOS_TIMEOUT", default=60)
+# Number of keep-alive connections kept open for each Kronos host
+KRONOS_POOL_SIZE = env.int("KRONOS_POOL_SIZE", default=10)
+# Maximum number of in-flight requests to the same host, shared by all clients
+# in the same process.
+KRONOS_MAX_CONCURRENCY = env.int("KRONOS_MAX_CONCURRENCY", default=8)
+# Number of worker threads used to fetch the pages of paginated queries
+KRONOS_PAGE_WORKERS = env.int("KRONOS_PAGE_WORKERS", default=4)
+# Retries for 429/5xx responses and connection errors, using exponential backoff
+# with jitter: backoff_factor * 2^retry + random(0, backoff_jitter) seconds.
+KRONOS_MAX_RETRIES = env.int("KRONOS_MAX_RETRIES", default=5)
+KRONOS_BACKOFF_FACTOR = env.float("KRONOS_BACKOFF_FACTOR", default=0.5)
+KRONOS_BACKOFF_JITTER = env.float("KRONOS_BACKOFF_JITTER", default=1.0)
+# Shared cache of the Kronos reference data responses (org types, countries and
+# events). Responses are used without any request while fresh, and revalidated
+# with ETag/Last-Modified afterward, when Kronos supports it.
+KRONOS_CACHE_ENABLED = env.bool("KRONOS_CACHE_ENABLED", default=True)
+KRONOS_CACHE_TIMEOUT = env.int("KRONOS_CACHE_TIMEOUT", default=24 * 3600)
+KRONOS_MEETINGS_CACHE_TIMEOUT = env.int("KRONOS_MEETINGS_CACHE_TIMEOUT", default=0)
+
 FILE_UPLOAD_MAX_MEMORY_SIZE = env.int("FILE_UPLOAD_MAX_MEMORY_SIZE", 2621440)
 
 # Focal point imports
 FOCAL_POINT_ENDPOINT = "https://ors.ozone.unep.org/api/country-profiles/focal-points/"
+# Minimum trigram similarity (0-1) between an imported organization name and the
+# name, or one of the alternative names, of an existing organization to match it.
+FUZZY_ORGANIZATION_THRESHOLD = env.float("FUZZY_ORGANIZATION_THRESHOLD", default=0.7)
+# Minimum trigram similarity (0-1) between the names of two contacts to show them as
+# possible duplicates.
+FUZZY_DUPLICATE_THRESHOLD = env.float("FUZZY_DUPLICATE_THRESHOLD", default=0.6)
+# Blocking keys shared by more contacts than this (e.g. "info@" emails) are ignored
+# when looking for similar contacts.
+FUZZY_DUPLICATE_MAX_BLOCK_SIZE = env.int("FUZZY_DUPLICATE_MAX_BLOCK_SIZE", default=50)
+# Contacts updated up to this many seconds before the start of the last refresh are
+# compared again, since they might have been committed only after it started (e.g.
+# by long imports). Should be longer than the longest import transaction.
+FUZZY_DUPLICATE_REFRESH_MARGIN = env.int("FUZZY_DUPLICATE_REFRESH_MARGIN", default=3600)
 
 # Add EU ISO code which is exceptionally reserved.
 pycountry.countries.add_entry(alpha_2="EU", name="European Union")
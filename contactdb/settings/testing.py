@@ -3,6 +3,7 @@ from .settings import *  # noqa
 TESTING = True
 KRONOS_USERNAME = ""
 KRONOS_PASSWORD = ""
+KRONOS_CACHE_ENABLED = False
 
 RQ_QUEUES = {
     "default": {
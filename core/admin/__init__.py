@@ -5,8 +5,10 @@ from .import_contact_photos_task import *  # noqa: F403
 from .import_focal_points_task import *  # noqa: F403
 from .import_legacy_contacts_tasks import *  # noqa: F403
 from .log_entry import *  # noqa: F403
+from .merge_contact_groups_task import *  # noqa: F403
 from .organization import *  # noqa: F403
 from .organization_type import *  # noqa: F403
 from .possible_duplicate import *  # noqa: F403
+from .refresh_possible_duplicates_task import *  # noqa: F403
 from .region import *  # noqa: F403
 from .resolve_conflict import *  # noqa: F403
@@ -1,18 +1,15 @@
-from functools import singledispatch
-
 from django.contrib import admin, messages
 from django.contrib.admin.utils import flatten_fieldsets
-from django.db import IntegrityError, models, transaction
-from django.db.models import ManyToManyField, ManyToManyRel, ManyToOneRel, Prefetch
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404, redirect
 from django.template.loader import render_to_string
 from django.utils.html import format_html
 
-from common.array_field import ArrayField
 from common.model_admin import ModelAdmin
 from common.urls import reverse
-from core.models import Contact, ResolveConflict
-from events.models import Registration
+from core.jobs.duplicates import schedule_refresh_possible_duplicates
+from core.merge import merge_contacts
+from core.models import ResolveConflict
 
 MERGE_FROM_PARAM = "merge_from_temp"
 
@@ -172,132 +169,11 @@ class ContactAdminBase(ModelAdmin):
         return self.get_related_link(obj, "email_logs", "any_contact")
 
 
-@singledispatch
-def resolve_fk_merge_conflict(obj, contact1, contact2):
-    """
-    Resolve conflicts when transferring a foreign key item from contact2
-    to contact1 depending on the type. If there is no handler for the
-    type, the item related to contact1 is kept and the item related to
-    contact2 is deleted.
-    """
-    pass
-
-
-@resolve_fk_merge_conflict.register(Registration)
-def _(registration2, contact1, contact2):
-    """
-    Keep the registration with the latest date.
-    """
-    event = registration2.event
-
-    registration1 = Registration.objects.filter(contact=contact1, event=event).first()
-
-    if registration2.date > registration1.date:
-        registration1.delete()
-        registration2.contact = contact1
-        registration2.save()
-    else:
-        # Keep registration from contact1.
-        pass
-
-
 class MergeContacts:
     @staticmethod
     def merge_two_contacts(contact1, contact2):
-        ignored_fields = {
-            "id",
-            "contact_id",
-            "created_at",
-            "updated_at",
-            "possibleduplicatecontact",
-            "possibleduplicatecontactrelationship",
-            "conflicting_contacts",
-        }
-
-        has_conflict = False
-        for field in Contact._meta.get_fields():
-            if field.name in ignored_fields:
-                continue
-
-            if field.is_relation and getattr(field, "multiple", False):
-                if not field.related_name:
-                    raise RuntimeError(f"Missing related name: {field}")
-                name = field.related_name
-            else:
-                name = field.name
-
-            val1 = getattr(contact1, name)
-            val2 = getattr(contact2, name)
-
-            val1_empty = val1 == "" or val1 is None
-            val2_empty = val2 == "" or val2 is None
-
-            if isinstance(field, (ManyToManyRel, ManyToManyField)):
-                for item in val2.all():
-                    val1.add(item)
-            elif isinstance(field, ManyToOneRel):
-                # Move foreign key items from contact2 to contact1.
-                rel_name = field.field.name
-                for item in val2.all():
-                    try:
-                        with transaction.atomic():
-                            setattr(item, rel_name, contact1)
-                            item.save()
-                    except IntegrityError:
-                        resolve_fk_merge_conflict(item, contact1, contact2)
-                        continue
-            elif isinstance(field, models.BooleanField):
-                if val1 != val2:
-                    has_conflict = True
-            elif isinstance(field, ArrayField):
-                if val1 is None:
-                    setattr(contact1, name, [])
-                    val1 = getattr(contact1, name)
-
-                for item in val2 or []:
-                    if item not in val1:
-                        val1.append(item)
-
-                setattr(contact2, name, [])
-            elif isinstance(
-                field,
-                (
-                    models.CharField,
-                    models.TextField,
-                    models.IntegerField,
-                    models.FloatField,
-                    models.DecimalField,
-                    models.DateField,
-                    models.ForeignKey,
-                    models.ImageField,
-                    models.UUIDField,
-                    models.JSONField,
-                ),
-            ):
-                if val1 == val2:
-                    # Values are equal nothing to do
-                    continue
-                if val1_empty and val2_empty:
-                    # Values are empty but different (e.g. "" vs None).
-                    # No conflict.
-                    continue
-                if val1_empty or val2_empty:
-                    # Only one value is empty, use the non-empty one
-                    setattr(contact1, name, val1 or val2)
-                else:
-                    # Values differ
-                    has_conflict = True
-            else:
-                raise RuntimeError(f"Unexpected field type: {field!r}")
-        contact1.save()
-
-        conflict = None
-        if has_conflict:
-            conflict = ResolveConflict.create_from_contact(contact1, contact2)
-
-        contact2.delete()
-
-        return conflict
+        conflicts = merge_contacts(contact1, [contact2])
+        return conflicts[0] if conflicts else None
 
     def merge_action(self, request, queryset):
         all_contacts = list(queryset)
@@ -309,11 +185,9 @@ class MergeContacts:
             )
             return None
 
-        conflicts = []
         main_contact = all_contacts[0]
-        for other_contact in all_contacts[1:]:
-            if conflict := self.merge_two_contacts(main_contact, other_contact):
-                conflicts.append(conflict)
+        conflicts = merge_contacts(main_contact, all_contacts[1:], request=request)
+        schedule_refresh_possible_duplicates()
 
         if not conflicts:
             self.message_user(
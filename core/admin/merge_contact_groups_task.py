@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from common.model_admin import TaskAdmin
+from core.models import MergeContactGroupsTask
+
+
+@admin.register(MergeContactGroupsTask)
+class MergeContactGroupsTaskAdmin(TaskAdmin):
+    """Merge groups of duplicate contacts."""
@@ -1,7 +1,9 @@
 from admin_auto_filters.filters import AutocompleteFilterFactory
 from django.contrib import admin, messages
 from django.shortcuts import redirect
+from django.utils.formats import date_format
 from django.utils.safestring import mark_safe
+from django.utils.timezone import localtime
 from django_object_actions import DjangoObjectActions, action
 
 from common.array_field import ArrayFilterFactory, ArrayLength
@@ -14,9 +16,11 @@ from core.models import (
     Contact,
     DismissedDuplicateContact,
     DismissedDuplicateOrganization,
+    MergeContactGroupsTask,
     Organization,
     PossibleDuplicateContact,
     PossibleDuplicateOrganization,
+    RefreshPossibleDuplicatesTask,
 )
 
 
@@ -90,7 +94,22 @@ class PossibleDuplicateContactAdmin(MergeContacts, DjangoObjectActions, ModelAdm
         "is_dismissed",
     )
     change_actions = ("merge_possible_duplicate", "dismiss_duplicate")
-    actions = ("dismiss_duplicates",)
+    actions = ("dismiss_duplicates", "merge_duplicates")
+
+    def changelist_view(self, request, extra_context=None):
+        last_refresh = (
+            RefreshPossibleDuplicatesTask.objects.filter(status="SUCCESS")
+            .order_by("-completed_on")
+            .values_list("completed_on", flat=True)
+            .first()
+        )
+        if last_refresh:
+            last_refresh = date_format(localtime(last_refresh), "DATETIME_FORMAT")
+            subtitle = f"Last updated: {last_refresh}"
+        else:
+            subtitle = "Not updated yet"
+        extra_context = {"subtitle": subtitle, **(extra_context or {})}
+        return super().changelist_view(request, extra_context=extra_context)
 
     def get_index_page_count(self):
         return self.model.objects.filter(is_dismissed=False).count()
@@ -163,6 +182,25 @@ class PossibleDuplicateContactAdmin(MergeContacts, DjangoObjectActions, ModelAdm
             level=messages.SUCCESS,
         )
 
+    @action(
+        label="Merge",
+        description="Merge selected duplicates",
+        permissions=["resolve_duplicates"],
+    )
+    def merge_duplicates(self, request, queryset):
+        task = MergeContactGroupsTask.objects.create(
+            contact_groups=[duplicate.contact_ids for duplicate in queryset],
+            created_by=request.user,
+        )
+        task.run(is_async=True)
+
+        self.message_user(
+            request,
+            f"Merge task {task.id} started for {len(task.contact_groups)} "
+            "possible duplicate(s)",
+            level=messages.SUCCESS,
+        )
+
     def has_delete_permission(self, request, obj=None):
         return False
 
@@ -176,6 +214,10 @@ class PossibleDuplicateContactAdmin(MergeContacts, DjangoObjectActions, ModelAdm
     def identical_values(self, obj):
         return mark_safe("<br/>".join(obj.duplicate_values))
 
+    @admin.display(description="Dismissed", boolean=True)
+    def is_dismissed(self, obj):
+        return obj.is_dismissed
+
     @admin.display(description="Contacts", ordering="contact_count")
     def contacts_display(self, obj):
         urls = []
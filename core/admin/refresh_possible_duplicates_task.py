@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from common.model_admin import TaskAdmin
+from core.models import RefreshPossibleDuplicatesTask
+
+
+@admin.register(RefreshPossibleDuplicatesTask)
+class RefreshPossibleDuplicatesTaskAdmin(TaskAdmin):
+    """Refresh the list of possible duplicate contacts."""
@@ -435,3 +435,32 @@ class TestContactAdminPhotoImport(TestCase):
         # Verify contact has photo
         self.contact_with_kronos.refresh_from_db()
         self.assertTrue(self.contact_with_kronos.photo)
+
+    @patch("events.kronos.KronosClient.get_contact_photo")
+    @patch("events.kronos.KronosClient._login")
+    def test_job_execution_unchanged_photo(self, mock_login, mock_get_photo):
+        """Test that identical photos are not written again."""
+        mock_get_photo.return_value = self.mock_photo_data
+        contacts = ContactFactory.create_batch(5, contact_ids=["kronos999"])
+        contact_ids = [contact.id for contact in contacts]
+
+        task = ImportContactPhotosTask.objects.create(
+            contact_ids=contact_ids, concurrency=3
+        )
+        task.run(is_async=False)
+        task.refresh_from_db()
+        self.assertIn("Processed 5 contacts, imported 5 photos", task.description)
+
+        photos = dict(
+            Contact.objects.filter(id__in=contact_ids).values_list("id", "photo")
+        )
+        self.assertTrue(all(photos.values()))
+
+        task = ImportContactPhotosTask.objects.create(contact_ids=contact_ids)
+        task.run(is_async=False)
+        task.refresh_from_db()
+        self.assertIn("Processed 5 contacts, imported 0 photos", task.description)
+        self.assertEqual(
+            dict(Contact.objects.filter(id__in=contact_ids).values_list("id", "photo")),
+            photos,
+        )
@@ -1,9 +1,19 @@
 from datetime import UTC, datetime
 
+from auditlog.models import LogEntry
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
 from core.admin.contact_base import MergeContacts
-from core.models import Contact, ContactGroup, Country, Organization, ResolveConflict
+from core.merge import merge_contacts
+from core.models import (
+    Contact,
+    ContactGroup,
+    Country,
+    MergeContactGroupsTask,
+    Organization,
+    ResolveConflict,
+)
 from events.models import Event, Registration, RegistrationRole
 
 
@@ -270,3 +280,74 @@ class TestMergeContacts(TestCase):
         conflict = MergeContacts.merge_two_contacts(self.contact1, duplicate_contact)
         self.assertIsNone(conflict)
         self.assertEqual(Contact.objects.count(), 2)
+
+    def test_merge_many_contacts(self):
+        """
+        Test merging more contacts at once, with registrations for the same event
+        and the same groups.
+        """
+        contact3 = Contact.objects.create(
+            first_name="Jane 3", last_name="Eyre 3", emails=["janeeyre3@book.com"]
+        )
+        contact3.registrations.create(
+            event=self.event,
+            role=self.role2,
+            status=self.registered,
+            date=datetime(2023, 10, 2, tzinfo=UTC),
+        )
+        self.contact2.registrations.create(
+            event=self.event,
+            role=self.role2,
+            status=self.registered,
+            date=datetime(2023, 8, 2, tzinfo=UTC),
+        )
+        contact3.groups.add(self.group1, self.group2)
+
+        conflicts = merge_contacts(self.contact1, [self.contact2, contact3])
+
+        self.assertEqual(len(conflicts), 2)
+        self.assertEqual(list(Contact.objects.all()), [self.contact1])
+        self.assertEqual(
+            self.contact1.emails,
+            ["janeeyre1@book.com", "janeeyre2@book.com", "janeeyre3@book.com"],
+        )
+        self.assertEqual(set(self.contact1.groups.all()), {self.group1, self.group2})
+        # The latest registration for each event is kept
+        self.assertEqual(Registration.objects.count(), 2)
+        registration = self.contact1.registrations.get(event=self.event)
+        self.assertEqual(registration.date, datetime(2023, 10, 2, tzinfo=UTC))
+
+    def test_merge_contact_groups_task(self):
+        user = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="password"
+        )
+        contact3 = Contact.objects.create(first_name="Jane 1", last_name="Eyre 1")
+        registration = contact3.registrations.create(
+            event=self.other_event,
+            role=self.role1,
+            status=self.accredited,
+            date=datetime(2023, 9, 3, tzinfo=UTC),
+        )
+        task = MergeContactGroupsTask.objects.create(
+            contact_groups=[
+                [self.contact1.pk, contact3.pk],
+                [self.contact2.pk, contact3.pk],
+            ],
+            created_by=user,
+        )
+        task.run(is_async=False)
+        task.refresh_from_db()
+
+        self.assertEqual(task.status, "SUCCESS")
+        self.assertIn("not enough contacts left to merge", task.log_text)
+        self.assertEqual(set(Contact.objects.all()), {self.contact1, self.contact2})
+
+        # Changes are audited as made by the user that started the task
+        registration_log = LogEntry.objects.get_for_object(registration).latest(
+            "timestamp"
+        )
+        self.assertEqual(registration_log.action, LogEntry.Action.UPDATE)
+        self.assertEqual(registration_log.actor, user)
+        contact_log = LogEntry.objects.get_for_object(contact3).latest("timestamp")
+        self.assertEqual(contact_log.action, LogEntry.Action.DELETE)
+        self.assertEqual(contact_log.actor, user)
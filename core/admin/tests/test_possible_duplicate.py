@@ -1,7 +1,13 @@
 from django.test import TestCase
 
 from api.tests.factories import ContactFactory
-from core.models import Contact, Organization, PossibleDuplicateContact
+from core.models import (
+    Contact,
+    DismissedDuplicateContact,
+    Organization,
+    PossibleDuplicateContact,
+    RefreshPossibleDuplicatesTask,
+)
 
 
 class TestPossibleDuplicate(TestCase):
@@ -27,5 +33,47 @@ class TestPossibleDuplicate(TestCase):
         A contact with multiple duplicate emails that differ only in
         capitalization should not be considered a duplicate of itself.
         """
+        PossibleDuplicateContact.refresh_all()
         self.assertEqual(Contact.objects.count(), 1)
         self.assertEqual(PossibleDuplicateContact.objects.count(), 0)
+
+    def test_refresh_possible_duplicates(self):
+        contact = ContactFactory(first_name="Jane", last_name="Eyre")
+        self.assertEqual(PossibleDuplicateContact.objects.count(), 0)
+
+        task = RefreshPossibleDuplicatesTask.objects.create()
+        task.run(is_async=False)
+        task.refresh_from_db()
+        self.assertEqual(task.status, "SUCCESS")
+
+        duplicate = PossibleDuplicateContact.objects.get()
+        self.assertEqual(duplicate.duplicate_values, ["Name: jane eyre"])
+        self.assertIn(contact, duplicate.contacts.all())
+        self.assertFalse(duplicate.is_dismissed)
+
+        # Dismissing is shown without waiting for a refresh
+        DismissedDuplicateContact.objects.create(contact_ids=duplicate.contact_ids)
+        self.assertTrue(PossibleDuplicateContact.objects.get().is_dismissed)
+
+    def test_normalized_keys(self):
+        contact = ContactFactory(
+            first_name=" JANE ",
+            last_name="eyre",
+            emails=[" Jane.Eyre@example.com", "jane.eyre@example.com"],
+            email_ccs=None,
+        )
+        contact.refresh_from_db()
+        self.assertEqual(contact.name_key, "jane eyre")
+        self.assertEqual(contact.email_keys, ["jane.eyre@example.com"])
+        self.assertEqual(contact.email_cc_keys, [])
+
+        ContactFactory(first_name="Other", emails=["JANE.EYRE@example.com"])
+        PossibleDuplicateContact.refresh_all()
+        self.assertEqual(
+            sorted(
+                PossibleDuplicateContact.objects.values_list(
+                    "duplicate_values", flat=True
+                )
+            ),
+            [["Email: jane.eyre@example.com"], ["Name: jane eyre"]],
+        )
@@ -7,3 +7,4 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         import core.jobs  # noqa
+        import core.signals  # noqa
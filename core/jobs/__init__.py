@@ -1,3 +1,5 @@
 from .contact_photos import *  # noqa: F403
+from .duplicates import *  # noqa: F403
 from .focal_points import *  # noqa: F403
 from .legacy_contacts import *  # noqa: F403
+from .merge import *  # noqa: F403
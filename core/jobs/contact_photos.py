@@ -25,7 +25,9 @@ class ImportContactPhotos(Job):
         if not task.overwrite_existing:
             contacts_query = contacts_query.filter(photo__isnull=True)
 
-        processed, imported = parser.import_photos(contacts_query)
+        processed, imported = parser.import_photos(
+            contacts_query, concurrency=task.concurrency
+        )
 
         task.description = f"Processed {processed} contacts, imported {imported} photos"
         task.save()
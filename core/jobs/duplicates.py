@@ -0,0 +1,211 @@
+import datetime
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django_task.job import Job
+
+from common.scheduler import cron
+from core.models import (
+    Contact,
+    PossibleDuplicateContact,
+    RefreshPossibleDuplicatesTask,
+)
+
+BATCH_SIZE = 5000
+
+# Only one refresh can update the blocking keys and similar contacts at a time
+LOCK_KEY = int.from_bytes(
+    hashlib.sha256(b"core.find_similar_contacts").digest()[:8], signed=True
+)
+
+DELETE_BLOCKING_KEYS = """
+    DELETE FROM core_contactblockingkey WHERE contact_id = ANY(%(contact_ids)s)
+"""
+DELETE_SIMILAR_CONTACTS = """
+    DELETE FROM core_similarcontacts
+    WHERE contact_id = ANY(%(contact_ids)s) OR other_contact_id = ANY(%(contact_ids)s)
+"""
+
+# Contacts are compared only with the contacts sharing one of these keys:
+#  - the phonetic codes of the first and last names, in either order, to catch
+#    accents, typos and swapped names
+#  - each email local part
+#  - the organization and country, with the first phonetic letter of the last name
+INSERT_BLOCKING_KEYS = """
+    INSERT INTO core_contactblockingkey (contact_id, key)
+    SELECT DISTINCT contact.id, keys.key
+    FROM core_contact AS contact
+    CROSS JOIN LATERAL (
+        SELECT
+            nullif(dmetaphone(unaccent(contact.first_name)), '') AS first_name,
+            nullif(dmetaphone(unaccent(contact.last_name)), '') AS last_name
+    ) AS codes
+    CROSS JOIN LATERAL unnest(
+        ARRAY[
+            'name:' || least(codes.first_name, codes.last_name)
+                || ':' || greatest(codes.first_name, codes.last_name),
+            'org:' || contact.organization_id || ':' || contact.country_id
+                || ':' || left(codes.last_name, 1)
+        ]
+        || ARRAY(
+            SELECT 'email:' || split_part(email, '@', 1)
+            FROM unnest(contact.email_keys) AS email
+        )
+    ) AS keys(key)
+    WHERE contact.id = ANY(%(contact_ids)s) AND keys.key IS NOT NULL
+"""
+
+# Pairs already reported by the exact name or email matches are skipped.
+INSERT_SIMILAR_CONTACTS = """
+    WITH blocks AS (
+        SELECT array_agg(contact_id) AS contact_ids
+        FROM core_contactblockingkey
+        WHERE key IN (
+            SELECT key
+            FROM core_contactblockingkey
+            WHERE contact_id = ANY(%(contact_ids)s)
+        )
+        GROUP BY key
+        HAVING count(1) BETWEEN 2 AND %(max_block_size)s
+    ),
+    pairs AS (
+        SELECT DISTINCT
+            least(contact.id, other.id) AS contact_id,
+            greatest(contact.id, other.id) AS other_contact_id
+        FROM blocks, unnest(blocks.contact_ids) AS contact(id),
+             unnest(blocks.contact_ids) AS other(id)
+        WHERE contact.id = ANY(%(contact_ids)s) AND contact.id <> other.id
+    ),
+    scored AS (
+        SELECT
+            pairs.contact_id,
+            pairs.other_contact_id,
+            greatest(
+                similarity(
+                    unaccent(contact.name_key),
+                    unaccent(other.name_key)
+                ),
+                similarity(
+                    unaccent(contact.name_key),
+                    unaccent(other.last_name || ' ' || other.first_name)
+                )
+            ) AS score
+        FROM pairs
+        JOIN core_contact AS contact ON contact.id = pairs.contact_id
+        JOIN core_contact AS other ON other.id = pairs.other_contact_id
+        WHERE contact.name_key <> other.name_key
+            AND NOT contact.email_keys && other.email_keys
+    )
+    INSERT INTO core_similarcontacts (contact_id, other_contact_id, score)
+    SELECT contact_id, other_contact_id, score
+    FROM scored
+    WHERE score >= %(threshold)s
+    ON CONFLICT (contact_id, other_contact_id) DO NOTHING
+"""
+
+
+@cron("*/30 * * * *")
+def trigger_refresh_possible_duplicates():
+    # A refresh that has not started yet will include all the changes made so far.
+    # Older pending tasks are ignored, in case their job was lost.
+    if RefreshPossibleDuplicatesTask.objects.filter(
+        status="PENDING",
+        created_on__gte=timezone.now()
+        - datetime.timedelta(seconds=RefreshPossibleDuplicatesTask.TASK_TIMEOUT),
+    ).exists():
+        return
+
+    task = RefreshPossibleDuplicatesTask.objects.create()
+    task.run(is_async=True)
+
+
+def schedule_refresh_possible_duplicates():
+    """
+    Refresh the possible duplicates once the current transaction is committed.
+    Should be used after contacts are changed in bulk.
+    """
+    transaction.on_commit(trigger_refresh_possible_duplicates)
+
+
+class RefreshPossibleDuplicates(Job):
+    @staticmethod
+    def get_changed_contacts(task):
+        """
+        Ids of the contacts changed since the start of the last successful refresh
+        (minus the FUZZY_DUPLICATE_REFRESH_MARGIN setting), or all of them for the
+        first or a full refresh.
+        """
+        contacts = Contact.objects.order_by("pk")
+        last_refresh = (
+            RefreshPossibleDuplicatesTask.objects.filter(
+                status="SUCCESS", started_on__isnull=False
+            )
+            .exclude(pk=task.pk)
+            .order_by("-started_on")
+            .values_list("started_on", flat=True)
+            .first()
+        )
+        if last_refresh and not task.full_refresh:
+            contacts = contacts.filter(
+                updated_at__gte=last_refresh
+                - datetime.timedelta(seconds=settings.FUZZY_DUPLICATE_REFRESH_MARGIN)
+            )
+        return list(contacts.values_list("pk", flat=True))
+
+    @staticmethod
+    def find_similar_contacts(contact_ids):
+        """
+        Update the blocking keys and the similar contacts of the given contacts.
+        Returns the number of similar contacts pairs found.
+        """
+        batches = [
+            contact_ids[i : i + BATCH_SIZE]
+            for i in range(0, len(contact_ids), BATCH_SIZE)
+        ]
+        found = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [LOCK_KEY])
+            # All the keys must be updated before comparing, since contacts from
+            # different batches can be similar.
+            for batch in batches:
+                cursor.execute(DELETE_BLOCKING_KEYS, {"contact_ids": batch})
+                cursor.execute(DELETE_SIMILAR_CONTACTS, {"contact_ids": batch})
+                cursor.execute(INSERT_BLOCKING_KEYS, {"contact_ids": batch})
+
+            for batch in batches:
+                cursor.execute(
+                    INSERT_SIMILAR_CONTACTS,
+                    {
+                        "contact_ids": batch,
+                        "max_block_size": settings.FUZZY_DUPLICATE_MAX_BLOCK_SIZE,
+                        "threshold": settings.FUZZY_DUPLICATE_THRESHOLD,
+                    },
+                )
+                found += cursor.rowcount
+        return found
+
+    @classmethod
+    def execute(cls, job, task):
+        start = time.perf_counter()
+        contact_ids = cls.get_changed_contacts(task)
+        found = cls.find_similar_contacts(contact_ids)
+        task.log(
+            logging.INFO,
+            "Compared %s changed contacts, found %s similar contacts in %.2fs",
+            len(contact_ids),
+            found,
+            time.perf_counter() - start,
+        )
+
+        start = time.perf_counter()
+        PossibleDuplicateContact.refresh_all()
+        task.log(
+            logging.INFO,
+            "Refreshed %s possible duplicates in %.2fs",
+            PossibleDuplicateContact.objects.count(),
+            time.perf_counter() - start,
+        )
@@ -1,13 +1,19 @@
 import logging
+import traceback
 
 import requests
 from django.conf import settings
 from django_task.job import Job
 
 from common import fuzzy_search
+from common.audit import bulk_audit_create
 from common.parsing import parse_list
 from common.scheduler import cron
-from core.models import Contact, ImportFocalPointsTask
+from core.jobs.duplicates import schedule_refresh_possible_duplicates
+from core.models import Contact, ContactGroup, ImportFocalPointsTask
+
+BATCH_SIZE = 1000
+GROUPS = ("Focal point", "FPLS", "NFP")
 
 TITLES = {
     "Abog",
@@ -59,7 +65,7 @@ class ImportFocalPoints(Job):
         except (ValueError, AssertionError):
             title = ""
 
-        contact = Contact.objects.create(
+        contact = Contact(
             focal_point_ids=[item["id"]],
             title=title,
             first_name=first_name,
@@ -73,14 +79,48 @@ class ImportFocalPoints(Job):
             address=item["address"],
             city=item["city"],
         )
+        # Contacts are created with bulk_create, which doesn't call save()
+        contact.update_fingerprint()
 
-        contact.add_to_group("Focal point")
+        groups = ["Focal point"]
         if item["is_licensing_system"]:
-            contact.add_to_group("FPLS")
+            groups.append("FPLS")
         if item["is_national"]:
-            contact.add_to_group("NFP")
+            groups.append("NFP")
 
-        return contact
+        return contact, groups
+
+    @classmethod
+    def create_contacts(cls, task, batch, groups):
+        contacts = [contact for contact, _ in batch]
+        Contact.objects.bulk_create(contacts, batch_size=BATCH_SIZE)
+        bulk_audit_create(contacts)
+
+        for name in GROUPS:
+            if members := [contact for contact, names in batch if name in names]:
+                if name not in groups:
+                    groups[name] = ContactGroup.objects.get(name=name)
+                groups[name].add_contacts(members, batch_size=BATCH_SIZE)
+
+        for contact in contacts:
+            task.log(
+                logging.INFO,
+                "Contact with focal point %s created: %s",
+                contact.focal_point_ids[0],
+                contact,
+            )
+
+    @staticmethod
+    def get_existing_contacts(focal_ids):
+        """Map the focal point ids already imported to their contact."""
+        contacts = {}
+        queryset = Contact.objects.filter(
+            focal_point_ids__overlap=focal_ids
+        ).select_related("organization__country", "organization__government")
+        for contact in queryset:
+            for focal_id in contact.focal_point_ids:
+                contacts.setdefault(focal_id, contact)
+        return contacts
 
     @classmethod
     def execute(cls, job, task):
@@ -90,33 +130,52 @@ class ImportFocalPoints(Job):
         resp = requests.get(url, timeout=30)
         resp.raise_for_status()
 
+        items = resp.json()
+        existing = cls.get_existing_contacts([item["id"] for item in items])
+        # Groups are only loaded once, when first needed
+        groups = {}
+
         created, skipped = 0, 0
-        for item in resp.json():
-            focal_id = item["id"]
+        batch = []
+        try:
+            for item in items:
+                focal_id = item["id"]
+                if contact := existing.get(focal_id):
+                    task.log(
+                        logging.INFO,
+                        "Focal point with id %s already exists: %s",
+                        focal_id,
+                        contact,
+                    )
+                    skipped += 1
+                    continue
+
+                contact, contact_groups = cls.process_contact(item)
+                existing[focal_id] = contact
+                batch.append((contact, contact_groups))
+                created += 1
+                if len(batch) >= BATCH_SIZE:
+                    # Never retried if it fails
+                    batch, flushed = [], batch
+                    cls.create_contacts(task, flushed, groups)
+        except Exception:
+            # Keep the contacts processed before the error, like the import did
+            # when creating them one by one.
             try:
-                contact = Contact.objects.get(focal_point_ids__contains=[focal_id])
+                cls.create_contacts(task, batch, groups)
+            except Exception:
                 task.log(
-                    logging.INFO,
-                    "Focal point with id %s already exists: %s",
-                    focal_id,
-                    contact,
+                    logging.ERROR,
+                    "Could not create the contacts processed before the error: %s",
+                    traceback.format_exc(),
                 )
-                skipped += 1
-                continue
-            except Contact.DoesNotExist:
-                pass
+            raise
+        cls.create_contacts(task, batch, groups)
 
-            contact = cls.process_contact(item)
-            created += 1
-            task.log(
-                logging.INFO,
-                "Contact with focal point %s created: %s",
-                focal_id,
-                contact,
-            )
         task.description = f"Contacts created={created}; skipped={skipped}"
         task.save()
 
     @staticmethod
     def on_complete(job, task):
         task.log(logging.INFO, "Focal points imported")
+        schedule_refresh_possible_duplicates()
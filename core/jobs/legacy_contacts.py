@@ -1,12 +1,16 @@
-import json
 import logging
+import traceback
 
 from django_task.job import Job
 
 from common import fuzzy_search
-from common.parsing import parse_list
+from common.audit import bulk_audit_create
+from common.parsing import iter_json_array, parse_list
+from core.jobs.duplicates import schedule_refresh_possible_duplicates
 from core.models import Contact, ContactGroup
 
+BATCH_SIZE = 1000
+
 
 class ImportLegacyContacts(Job):
     @classmethod
@@ -27,7 +31,7 @@ class ImportLegacyContacts(Job):
             ]
         )
 
-        contact = Contact.objects.create(
+        contact = Contact(
             country=country,
             organization=None,
             address="\n".join(cls.get_addresses(item)),
@@ -45,33 +49,62 @@ class ImportLegacyContacts(Job):
             honorific=item.get("Salutation", ""),
             phones=parse_list(item.get("Telephone", "")),
         )
-        contact.add_to_group("Legacy contacts")
+        # Contacts are created with bulk_create, which doesn't call save()
+        contact.update_fingerprint()
         return contact
 
+    @classmethod
+    def create_contacts(cls, contacts, group):
+        Contact.objects.bulk_create(contacts, batch_size=BATCH_SIZE)
+        bulk_audit_create(contacts)
+        group.add_contacts(contacts, batch_size=BATCH_SIZE)
+
     @classmethod
     def execute(cls, job, task):
+        group = ContactGroup.objects.get(name="Legacy contacts")
         if task.clear_previous:
             task.log(logging.INFO, "Removing previous legacy contacts from")
-            details = (
-                ContactGroup.objects.get(name="Legacy contacts").contacts.all().delete()
-            )
+            details = group.contacts.all().delete()
             task.log(logging.INFO, "Removed old contacts: %s", details)
 
         task.log(logging.INFO, "Loading legacy contacts from file: %s", task.json_file)
-        with task.json_file.open() as fp:
-            contacts = json.load(fp)
+        size = task.json_file.size
+        created = 0
+        with task.json_file.open("rb") as fp:
+            batch = []
+            try:
+                for item in iter_json_array(fp):
+                    batch.append(cls.process_contact(item))
+                    if len(batch) < BATCH_SIZE:
+                        continue
+
+                    # Never retried if it fails
+                    batch, flushed = [], batch
+                    cls.create_contacts(flushed, group)
+                    created += len(flushed)
+                    task.log(logging.INFO, "Contacts created so far: %s", created)
+                    if size:
+                        task.set_progress(min(100, fp.tell() * 100 // size), step=1)
+            except Exception:
+                # Keep the contacts processed before the error, like the import did
+                # when creating them one by one.
+                try:
+                    cls.create_contacts(batch, group)
+                except Exception:
+                    task.log(
+                        logging.ERROR,
+                        "Could not create the contacts processed before the error: %s",
+                        traceback.format_exc(),
+                    )
+                raise
+            cls.create_contacts(batch, group)
+            created += len(batch)
 
-        for item in contacts:
-            contact = cls.process_contact(item)
-            task.log(
-                logging.INFO,
-                "Contact with legacy id %s created: %r",
-                item["AddressID"],
-                contact,
-            )
-        task.description = f"Contacts created={len(contacts)}"
+        task.description = f"Contacts created={created}"
+        task.set_progress(100, commit=False)
         task.save()
 
     @staticmethod
     def on_complete(job, task):
         task.log(logging.INFO, "Legacy contacts imported")
+        schedule_refresh_possible_duplicates()
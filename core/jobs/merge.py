@@ -0,0 +1,46 @@
+import logging
+
+from auditlog.context import set_actor
+from django_task.job import Job
+
+from core.jobs.duplicates import schedule_refresh_possible_duplicates
+from core.merge import merge_contacts
+from core.models import Contact
+
+
+class MergeContactGroups(Job):
+    @staticmethod
+    def execute(job, task):
+        total = len(task.contact_groups)
+        merged, conflicts_nr = 0, 0
+        for i, contact_ids in enumerate(task.contact_groups, 1):
+            contacts = Contact.objects.in_bulk(contact_ids)
+            contacts = [contacts[pk] for pk in contact_ids if pk in contacts]
+            if len(contacts) < 2:
+                task.log(
+                    logging.WARNING,
+                    "Skipping %s, not enough contacts left to merge",
+                    contact_ids,
+                )
+                continue
+
+            # Changes not saved in bulk are audited through the auditlog context
+            with set_actor(task.created_by):
+                conflicts = merge_contacts(
+                    contacts[0], contacts[1:], actor=task.created_by
+                )
+            merged += len(contacts) - 1
+            conflicts_nr += len(conflicts)
+            task.log(
+                logging.INFO,
+                "Merged %s contacts into %r, with %s conflicts to resolve",
+                len(contacts) - 1,
+                contacts[0],
+                len(conflicts),
+            )
+            task.set_progress(100 * i // total, step=1)
+
+        task.description = f"Contacts merged={merged} conflicts={conflicts_nr}"
+        task.set_progress(100, commit=False)
+        task.save()
+        schedule_refresh_possible_duplicates()
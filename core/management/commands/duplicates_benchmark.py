@@ -0,0 +1,171 @@
+"""
+Benchmark looking for similar contacts on synthetic data.
+
+Creates the given number of contacts, some of them near-duplicates of others (with
+accents removed, swapped names or typos), then looks for similar contacts among all
+of them and again after changing some of them, reporting the time and the number of
+queries of each step. All changes are rolled back at the end.
+"""
+
+import random
+import time
+import unicodedata
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.jobs.duplicates import RefreshPossibleDuplicates
+from core.models import Contact, PossibleDuplicateContact
+
+FIRST_NAMES = [
+    "Ana",
+    "André",
+    "Björn",
+    "Chloé",
+    "Fatima",
+    "François",
+    "Giovanni",
+    "Hélène",
+    "Ibrahim",
+    "Jonathan",
+    "José",
+    "Katarzyna",
+    "Li",
+    "María",
+    "Mohammed",
+    "Nguyen",
+    "Olga",
+    "Priya",
+    "Søren",
+    "Zoë",
+]
+CONSONANTS = "bcdfghklmnprstvz"
+VOWELS = "aeiouáéíóü"
+
+
+class RollbackError(Exception):
+    pass
+
+
+def strip_accents(value):
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", value) if not unicodedata.combining(c)
+    )
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--contacts", type=int, default=100_000, help="Number of contacts."
+        )
+        parser.add_argument(
+            "--duplicates",
+            type=float,
+            default=0.05,
+            help="Fraction of the contacts that are near-duplicates of others.",
+        )
+        parser.add_argument(
+            "--changed",
+            type=float,
+            default=0.01,
+            help="Fraction of the contacts changed before the incremental run.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["contacts"] < 2:
+            raise CommandError("--contacts must be at least 2")
+
+        self.rng = random.Random(options["seed"])  # noqa: S311 - not for security
+        self.results = []
+        try:
+            with transaction.atomic():
+                self.run_benchmarks(options)
+                raise RollbackError
+        except RollbackError:
+            pass
+
+        self.stdout.write(
+            f"{'step':<14}{'contacts':>10}{'seconds':>10}{'queries':>10}"
+            f"{'similar':>10}{'duplicates':>12}"
+        )
+        for name, contacts, seconds, queries, similar, duplicates in self.results:
+            self.stdout.write(
+                f"{name:<14}{contacts:>10}{seconds:>10.2f}{queries:>10}"
+                f"{similar:>10}{duplicates:>12}"
+            )
+
+    def run_benchmarks(self, options):
+        contacts = self.create_contacts(options["contacts"], options["duplicates"])
+        contact_ids = [contact.pk for contact in contacts]
+        self.benchmark("full", contact_ids)
+
+        changed = self.rng.sample(
+            contacts, max(1, int(len(contacts) * options["changed"]))
+        )
+        for contact in changed:
+            contact.first_name = self.make_typo(contact.first_name)
+        Contact.objects.bulk_update(changed, ["first_name"], batch_size=1000)
+        self.benchmark("incremental", [contact.pk for contact in changed])
+
+    def benchmark(self, name, contact_ids):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            similar = RefreshPossibleDuplicates.find_similar_contacts(contact_ids)
+            PossibleDuplicateContact.refresh_all()
+        seconds = time.perf_counter() - start
+
+        duplicates = PossibleDuplicateContact.objects.count()
+        self.results.append(
+            (name, len(contact_ids), seconds, queries, similar, duplicates)
+        )
+
+    def create_contacts(self, number, duplicates):
+        contacts = []
+        for i in range(number):
+            if contacts and self.rng.random() < duplicates:
+                contacts.append(self.make_near_duplicate(self.rng.choice(contacts), i))
+                continue
+
+            contacts.append(
+                Contact(
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.make_name(),
+                    emails=[f"contact{i}@example.com"],
+                )
+            )
+        return Contact.objects.bulk_create(contacts, batch_size=1000)
+
+    def make_near_duplicate(self, contact, i):
+        first_name, last_name = contact.first_name, contact.last_name
+        change = self.rng.choice(("accents", "swapped", "typo"))
+        if change == "accents":
+            first_name, last_name = strip_accents(first_name), strip_accents(last_name)
+        elif change == "swapped":
+            first_name, last_name = last_name, first_name
+        else:
+            last_name = self.make_typo(last_name)
+        return Contact(
+            first_name=first_name,
+            last_name=last_name,
+            emails=[f"contact{i}@example.org"],
+        )
+
+    def make_typo(self, value):
+        pos = self.rng.randrange(len(value))
+        return value[:pos] + value[pos] + value[pos:]
+
+    def make_name(self, syllables=3):
+        return "".join(
+            self.rng.choice(CONSONANTS) + self.rng.choice(VOWELS)
+            for _ in range(syllables)
+        ).capitalize()
@@ -0,0 +1,206 @@
+"""
+Merge duplicate contacts into a main contact.
+
+The fields of the main contact are completed with the values of the other contacts,
+while all their related rows (registrations, groups, emails, etc.) are moved to the
+main contact with a few set-based queries per related model, regardless of the
+number of contacts and rows.
+"""
+
+import functools
+from collections import defaultdict
+
+from auditlog.registry import auditlog
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models.functions import RowNumber
+
+from common.array_field import ArrayField
+from common.audit import bulk_audit_update
+from core.models import Contact, ContactBlockingKey, ResolveConflict, SimilarContacts
+from events.models import Registration
+
+IGNORED_FIELDS = {
+    "id",
+    "contact_id",
+    "created_at",
+    "updated_at",
+    "fingerprint",
+}
+
+# Related rows deleted along with the merged contacts, instead of being moved
+NOT_MOVED = {
+    (ResolveConflict, "existing_contact"),
+    (ContactBlockingKey, "contact"),
+    (SimilarContacts, "contact"),
+    (SimilarContacts, "other_contact"),
+}
+
+# When more contacts have a related row that must be unique (e.g. a registration for
+# the same event), only the first one in this order is kept. Otherwise, the row of
+# the main contact is kept.
+KEEP_ORDERING = {
+    Registration: [models.F("date").desc()],
+}
+
+
+def merge_fields(contact1, contact2):
+    """
+    Complete the fields of contact1 with the values of contact2. Array fields are
+    moved from contact2 to contact1. Returns whether the contacts have different
+    values for the same field.
+    """
+    has_conflict = False
+    for field in Contact._meta.concrete_fields:
+        if field.name in IGNORED_FIELDS or isinstance(field, models.GeneratedField):
+            continue
+
+        name = field.name
+        val1 = getattr(contact1, name)
+        val2 = getattr(contact2, name)
+
+        val1_empty = val1 == "" or val1 is None
+        val2_empty = val2 == "" or val2 is None
+
+        if isinstance(field, models.BooleanField):
+            if val1 != val2:
+                has_conflict = True
+        elif isinstance(field, ArrayField):
+            if val1 is None:
+                setattr(contact1, name, [])
+                val1 = getattr(contact1, name)
+
+            for item in val2 or []:
+                if item not in val1:
+                    val1.append(item)
+
+            setattr(contact2, name, [])
+        elif isinstance(
+            field,
+            (
+                models.CharField,
+                models.TextField,
+                models.IntegerField,
+                models.FloatField,
+                models.DecimalField,
+                models.DateField,
+                models.ForeignKey,
+                models.ImageField,
+                models.UUIDField,
+                models.JSONField,
+            ),
+        ):
+            if val1 == val2:
+                # Values are equal nothing to do
+                continue
+            if val1_empty and val2_empty:
+                # Values are empty but different (e.g. "" vs None).
+                # No conflict.
+                continue
+            if val1_empty or val2_empty:
+                # Only one value is empty, use the non-empty one
+                setattr(contact1, name, val1 or val2)
+            else:
+                # Values differ
+                has_conflict = True
+        else:
+            raise RuntimeError(f"Unexpected field type: {field!r}")
+    return has_conflict
+
+
+@functools.cache
+def get_related_fields():
+    """
+    All the foreign keys to contacts that must be moved, including the ones of the
+    many-to-many tables, with the other fields they must be unique together with.
+    """
+    result = []
+    for model in apps.get_models(include_auto_created=True):
+        if not model._meta.managed:
+            continue
+
+        for field in model._meta.concrete_fields:
+            if field.related_model is not Contact or (model, field.name) in NOT_MOVED:
+                continue
+
+            unique_sets = [*model._meta.unique_together]
+            unique_sets.extend(
+                constraint.fields
+                for constraint in model._meta.constraints
+                if isinstance(constraint, models.UniqueConstraint)
+                and constraint.fields
+                and not constraint.condition
+            )
+            unique_with = [
+                [name for name in fields if name != field.name]
+                for fields in unique_sets
+                if field.name in fields
+            ]
+            result.append((model, field, unique_with))
+    return result
+
+
+def move_related(main_contact, contact_ids, request=None, actor=None):
+    """Move all the related rows of the given contacts to the main contact."""
+    for model, field, unique_with in get_related_fields():
+        queryset = model._base_manager.filter(
+            **{f"{field.name}__in": [main_contact.pk, *contact_ids]}
+        )
+        for other_fields in unique_with:
+            # Rank the rows that would no longer be unique, and delete all but the
+            # first one.
+            ordering = [
+                *KEEP_ORDERING.get(model, []),
+                models.Case(
+                    models.When(**{field.attname: main_contact.pk}, then=0),
+                    default=1,
+                ),
+                "pk",
+            ]
+            duplicates = queryset.annotate(
+                rank=models.Window(
+                    RowNumber(), partition_by=other_fields, order_by=ordering
+                )
+            ).filter(rank__gt=1)
+            if pks := list(duplicates.values_list("pk", flat=True)):
+                model._base_manager.filter(pk__in=pks).delete()
+
+        to_move = model._base_manager.filter(**{f"{field.name}__in": contact_ids})
+        if auditlog.contains(model) and not model._meta.auto_created:
+            by_contact = defaultdict(list)
+            for obj in to_move:
+                by_contact[getattr(obj, field.attname)].append(obj)
+            for contact_id, objs in by_contact.items():
+                bulk_audit_update(
+                    objs,
+                    {field.name: [str(contact_id), str(main_contact.pk)]},
+                    request=request,
+                    actor=actor,
+                )
+        to_move.update(**{field.name: main_contact})
+
+
+@transaction.atomic
+def merge_contacts(main_contact, contacts, request=None, actor=None):
+    """
+    Merge the contacts into the main contact, and delete them. Returns the conflicts
+    created for the contacts that have different values than the main contact, to be
+    resolved manually.
+
+    Changes are audited as made by the user of the request, or by `actor` when
+    there is no request (e.g. in background jobs).
+    """
+    conflicting = [
+        contact for contact in contacts if merge_fields(main_contact, contact)
+    ]
+    main_contact.save()
+
+    contact_ids = [contact.pk for contact in contacts]
+    move_related(main_contact, contact_ids, request=request, actor=actor)
+
+    conflicts = [
+        ResolveConflict.create_from_contact(main_contact, contact)
+        for contact in conflicting
+    ]
+    Contact.objects.filter(pk__in=contact_ids).delete()
+    return conflicts
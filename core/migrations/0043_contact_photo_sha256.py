@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:24
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0042_organizationtype_protected"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contact",
+            name="photo_sha256",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="SHA-256 of the photo imported from Kronos.",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="importcontactphotostask",
+            name="concurrency",
+            field=models.PositiveSmallIntegerField(
+                default=4,
+                help_text="Number of photos to download from Kronos at the same time.",
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+    ]
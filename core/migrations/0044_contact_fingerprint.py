@@ -0,0 +1,95 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:36
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Frozen copy of BaseContact.FINGERPRINT_FIELDS and BaseContact.get_fingerprint()
+# at the time of this migration.
+FINGERPRINT_FIELDS = (
+    "organization",
+    "title",
+    "title_localized",
+    "first_name",
+    "last_name",
+    "designation",
+    "department",
+    "phones",
+    "mobiles",
+    "faxes",
+    "emails",
+    "email_ccs",
+    "notes",
+    "is_use_organization_address",
+    "address",
+    "city",
+    "state",
+    "country",
+    "postal_code",
+    "birth_date",
+    "primary_lang",
+    "second_lang",
+    "third_lang",
+)
+
+
+def get_fingerprint(values):
+    data = [values[name] for name in FINGERPRINT_FIELDS]
+    return hashlib.sha256(json.dumps(data, default=str).encode()).hexdigest()
+
+
+def populate_fingerprint(apps, schema_editor):
+    for model_name in ("Contact", "ResolveConflict"):
+        model = apps.get_model("core", model_name)
+        attnames = {
+            name: model._meta.get_field(name).attname for name in FINGERPRINT_FIELDS
+        }
+        objs = []
+        for obj in model.objects.only("pk", *FINGERPRINT_FIELDS).iterator(
+            chunk_size=BATCH_SIZE
+        ):
+            obj.fingerprint = get_fingerprint(
+                {name: getattr(obj, attname) for name, attname in attnames.items()}
+            )
+            objs.append(obj)
+            if len(objs) >= BATCH_SIZE:
+                model.objects.bulk_update(objs, ["fingerprint"])
+                objs = []
+        model.objects.bulk_update(objs, ["fingerprint"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0043_contact_photo_sha256"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contact",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                editable=False,
+                help_text="SHA-256 of the fields imported from Kronos.",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="resolveconflict",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                editable=False,
+                help_text="SHA-256 of the fields imported from Kronos.",
+                max_length=64,
+            ),
+        ),
+        migrations.RunPython(populate_fingerprint, migrations.RunPython.noop),
+    ]
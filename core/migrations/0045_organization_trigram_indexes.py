@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:44
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+import core.models
+
+# array_to_string() is only STABLE, but always returns the same result for text
+# arrays, so the wrapper can be used in indexes.
+CREATE_ALT_NAMES_TEXT = """
+CREATE FUNCTION organization_alt_names_text(text[]) RETURNS text
+AS $$ SELECT array_to_string($1, ' | ') $$
+LANGUAGE SQL IMMUTABLE PARALLEL SAFE
+"""
+DROP_ALT_NAMES_TEXT = "DROP FUNCTION organization_alt_names_text(text[])"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0044_contact_fingerprint"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(CREATE_ALT_NAMES_TEXT, DROP_ALT_NAMES_TEXT),
+        migrations.AddIndex(
+            model_name="organization",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass("name", name="gin_trgm_ops"),
+                name="organization_name_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="organization",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    core.models.AltNamesText("alt_names"), name="gin_trgm_ops"
+                ),
+                name="organization_alt_names_trgm",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:47
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0045_organization_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contact",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["focal_point_ids"], name="contact_focal_point_ids"
+            ),
+        ),
+    ]
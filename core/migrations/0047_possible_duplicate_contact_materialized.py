@@ -0,0 +1,72 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:53
+
+import importlib
+
+import django_db_views.migration_functions
+import django_db_views.operations
+from django.db import migrations
+
+INDEXES = """
+CREATE UNIQUE INDEX core_possibleduplicatecontact_id
+    ON core_possibleduplicatecontact (id);
+CREATE INDEX core_possibleduplicatecontact_contact_ids
+    ON core_possibleduplicatecontact USING gin (contact_ids);
+CREATE INDEX core_possibleduplicatecontact_duplicate_values
+    ON core_possibleduplicatecontact USING gin (duplicate_values);
+CREATE UNIQUE INDEX core_possibleduplicatecontactrelationship_id
+    ON core_possibleduplicatecontactrelationship (id);
+CREATE INDEX core_possibleduplicatecontactrelationship_contact_id
+    ON core_possibleduplicatecontactrelationship (contact_id);
+CREATE INDEX core_possibleduplicatecontactrelationship_duplicate_values_id
+    ON core_possibleduplicatecontactrelationship (duplicate_values_id);
+"""
+
+
+def drop_views(apps, schema_editor):
+    django_db_views.migration_functions.DropView(
+        "core_possibleduplicatecontactrelationship"
+    )(apps, schema_editor)
+    django_db_views.migration_functions.DropView("core_possibleduplicatecontact")(
+        apps, schema_editor
+    )
+
+
+def create_views(apps, schema_editor):
+    # Same views as before
+    previous = importlib.import_module("core.migrations.0020_auto_20250619_1245")
+    for operation in previous.Migration.operations:
+        operation.code(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0046_contact_focal_point_ids_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_views, create_views),
+        django_db_views.operations.ViewRunPython(
+            code=django_db_views.migration_functions.ForwardMaterializedViewMigration(
+                "SELECT\n                array_to_string(\n                    array_agg(duplicate_value ORDER BY duplicate_value), ','\n                ) AS id,\n                array_agg(\n                    duplicate_value ORDER BY duplicate_value\n                ) AS duplicate_values,\n                array_agg(\n                    duplicate_type ORDER BY duplicate_type\n                ) AS duplicate_fields,\n                contact_ids\n            FROM (\n            SELECT 'Name'                         AS duplicate_type,\n                   concat('Name: ', concat(TRIM(LOWER(first_name)), ' ', TRIM(LOWER(last_name))))    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS contact_ids\n            FROM core_contact\n            GROUP BY duplicate_value\n            HAVING count(DISTINCT id) > 1\n         UNION ALL \n            SELECT 'Email'                         AS duplicate_type,\n                   concat('Email: ', TRIM(LOWER(unnest(emails))))    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS contact_ids\n            FROM core_contact\n            GROUP BY duplicate_value\n            HAVING count(DISTINCT id) > 1\n        ) AS duplicate_groups\n            GROUP BY contact_ids\n            ORDER BY id, contact_ids",
+                "core_possibleduplicatecontact",
+                engine="django.db.backends.postgresql",
+            ),
+            reverse_code=django_db_views.migration_functions.DropMaterializedView(
+                "core_possibleduplicatecontact", engine="django.db.backends.postgresql"
+            ),
+            atomic=False,
+        ),
+        django_db_views.operations.ViewRunPython(
+            code=django_db_views.migration_functions.ForwardMaterializedViewMigration(
+                "SELECT\n            row_number() over (\n                ORDER BY duplicate.id, item.contact_id\n            )                                   AS id,\n            item.contact_id                     AS contact_id,\n            duplicate.id                        AS duplicate_values_id\n        FROM core_possibleduplicatecontact AS duplicate,\n             unnest(duplicate.contact_ids) AS item(contact_id)",
+                "core_possibleduplicatecontactrelationship",
+                engine="django.db.backends.postgresql",
+            ),
+            reverse_code=django_db_views.migration_functions.DropMaterializedView(
+                "core_possibleduplicatecontactrelationship",
+                engine="django.db.backends.postgresql",
+            ),
+            atomic=False,
+        ),
+        migrations.RunSQL(INDEXES, migrations.RunSQL.noop),
+    ]
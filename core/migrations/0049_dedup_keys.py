@@ -0,0 +1,103 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:02
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+import common.array_field
+import core.models
+
+CREATE_NORMALIZE_EMAILS = """
+CREATE FUNCTION normalize_emails(text[]) RETURNS text[]
+AS $$
+    SELECT coalesce(
+        array_agg(DISTINCT lower(trim(email)) ORDER BY lower(trim(email))), '{}'
+    )
+    FROM unnest($1) AS email
+    WHERE trim(email) <> ''
+$$
+LANGUAGE SQL IMMUTABLE PARALLEL SAFE
+"""
+DROP_NORMALIZE_EMAILS = "DROP FUNCTION normalize_emails(text[])"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0048_refresh_possible_duplicates_task"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_NORMALIZE_EMAILS, DROP_NORMALIZE_EMAILS),
+        migrations.AddField(
+            model_name="contact",
+            name="email_cc_keys",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=core.models.NormalizedEmails("email_ccs"),
+                output_field=common.array_field.ArrayField(
+                    base_field=models.TextField(), size=None
+                ),
+            ),
+        ),
+        migrations.AddField(
+            model_name="contact",
+            name="email_keys",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=core.models.NormalizedEmails("emails"),
+                output_field=common.array_field.ArrayField(
+                    base_field=models.TextField(), size=None
+                ),
+            ),
+        ),
+        migrations.AddField(
+            model_name="contact",
+            name="name_key",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.text.Concat(
+                    django.db.models.functions.text.Trim(
+                        django.db.models.functions.text.Lower("first_name")
+                    ),
+                    models.Value(" "),
+                    django.db.models.functions.text.Trim(
+                        django.db.models.functions.text.Lower("last_name")
+                    ),
+                ),
+                output_field=models.TextField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="organization",
+            name="name_key",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.text.Trim(
+                    django.db.models.functions.text.Lower("name")
+                ),
+                output_field=models.TextField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(fields=["name_key"], name="contact_name_key"),
+        ),
+        migrations.AddIndex(
+            model_name="contact",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["email_keys"], name="contact_email_keys"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contact",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["email_cc_keys"], name="contact_email_cc_keys"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="organization",
+            index=models.Index(
+                fields=["name_key", "government"], name="organization_name_key"
+            ),
+        ),
+    ]
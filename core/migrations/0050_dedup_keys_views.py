@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:03
+
+import importlib
+
+import django_db_views.migration_functions
+import django_db_views.operations
+from django.db import migrations
+
+# The relationship view depends on the contacts view, so it has to be recreated too,
+# along with all the indexes.
+previous = importlib.import_module(
+    "core.migrations.0047_possible_duplicate_contact_materialized"
+)
+relationship = previous.Migration.operations[2]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0049_dedup_keys"),
+    ]
+
+    operations = [
+        migrations.RunSQL(migrations.RunSQL.noop, previous.INDEXES),
+        migrations.RunPython(relationship.reverse_code, relationship.code),
+        django_db_views.operations.ViewRunPython(
+            code=django_db_views.migration_functions.ForwardMaterializedViewMigration(
+                "SELECT\n                array_to_string(\n                    array_agg(duplicate_value ORDER BY duplicate_value), ','\n                ) AS id,\n                array_agg(\n                    duplicate_value ORDER BY duplicate_value\n                ) AS duplicate_values,\n                array_agg(\n                    duplicate_type ORDER BY duplicate_type\n                ) AS duplicate_fields,\n                contact_ids\n            FROM (\n            SELECT 'Name'                         AS duplicate_type,\n                   concat('Name: ', name_key)    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS contact_ids\n            FROM core_contact\n            GROUP BY name_key\n            HAVING count(1) > 1\n         UNION ALL \n            SELECT 'Email'                         AS duplicate_type,\n                   concat('Email: ', email_key)    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS contact_ids\n            FROM core_contact, unnest(email_keys) AS email_key\n            GROUP BY email_key\n            HAVING count(1) > 1\n        ) AS duplicate_groups\n            GROUP BY contact_ids\n            ORDER BY id, contact_ids",
+                "core_possibleduplicatecontact",
+                engine="django.db.backends.postgresql",
+            ),
+            reverse_code=django_db_views.migration_functions.BackwardMaterializedViewMigration(
+                "SELECT\n                array_to_string(\n                    array_agg(duplicate_value ORDER BY duplicate_value), ','\n                ) AS id,\n                array_agg(\n                    duplicate_value ORDER BY duplicate_value\n                ) AS duplicate_values,\n                array_agg(\n                    duplicate_type ORDER BY duplicate_type\n                ) AS duplicate_fields,\n                contact_ids\n            FROM (\n            SELECT 'Name'                         AS duplicate_type,\n                   concat('Name: ', concat(TRIM(LOWER(first_name)), ' ', TRIM(LOWER(last_name))))    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS contact_ids\n            FROM core_contact\n            GROUP BY duplicate_value\n            HAVING count(DISTINCT id) > 1\n         UNION ALL \n            SELECT 'Email'                         AS duplicate_type,\n                   concat('Email: ', TRIM(LOWER(unnest(emails))))    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS contact_ids\n            FROM core_contact\n            GROUP BY duplicate_value\n            HAVING count(DISTINCT id) > 1\n        ) AS duplicate_groups\n            GROUP BY contact_ids\n            ORDER BY id, contact_ids",
+                "core_possibleduplicatecontact",
+                engine="django.db.backends.postgresql",
+            ),
+            atomic=False,
+        ),
+        migrations.RunPython(relationship.code, relationship.reverse_code),
+        migrations.RunSQL(previous.INDEXES, migrations.RunSQL.noop),
+        django_db_views.operations.ViewRunPython(
+            code=django_db_views.migration_functions.ForwardViewMigration(
+                "SELECT\n                array_to_string(\n                    array_agg(duplicate_value ORDER BY duplicate_value), ','\n                ) AS id,\n                array_agg(\n                    duplicate_value ORDER BY duplicate_value\n                ) AS duplicate_values,\n                array_agg(\n                    duplicate_type ORDER BY duplicate_type\n                ) AS duplicate_fields,\n                organization_ids,\n                EXISTS(\n                    SELECT 1 FROM core_dismissedduplicateorganization as dd\n                    WHERE dd.organization_ids = duplicate_groups.organization_ids\n                ) AS is_dismissed\n            FROM (\n            SELECT 'Name and government'                         AS duplicate_type,\n                   concat('Name and government: ', concat(organization.name_key, ', ', TRIM(LOWER(government.name))))    AS duplicate_value,\n                   array_agg(organization.id ORDER BY organization.id)::int[]\n                                                            AS organization_ids\n            FROM core_organization organization\n            LEFT JOIN public.core_country government\n                ON organization.government_id = government.code\n            GROUP BY organization.name_key, organization.government_id, government.name\n            HAVING count(1) > 1\n        ) AS duplicate_groups\n            GROUP BY organization_ids\n            ORDER BY id, organization_ids",
+                "core_possibleduplicateorganization",
+                engine="django.db.backends.postgresql",
+            ),
+            reverse_code=django_db_views.migration_functions.BackwardViewMigration(
+                "SELECT \n                array_to_string(\n                    array_agg(duplicate_value ORDER BY duplicate_value), ','\n                ) AS id,  \n                array_agg(\n                    duplicate_value ORDER BY duplicate_value\n                ) AS duplicate_values,  \n                array_agg(\n                    duplicate_type ORDER BY duplicate_type\n                ) AS duplicate_fields,  \n                organization_ids,\n                EXISTS(\n                    SELECT 1 FROM core_dismissedduplicateorganization as dd\n                    WHERE dd.organization_ids = duplicate_groups.organization_ids\n                ) AS is_dismissed\n            FROM (\n            SELECT 'Name and government'                         AS duplicate_type, \n                   concat('Name and government: ', concat(TRIM(LOWER(organization.name)), ', ', TRIM(LOWER(government.name))))    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS organization_ids\n            FROM core_organization organization \n            LEFT JOIN public.core_country government \n                ON organization.government_id = government.code\n            LEFT JOIN public.core_country country \n                ON organization.country_id = country.code    \n            GROUP BY duplicate_value\n            HAVING count(1) > 1\n        ) AS duplicate_groups\n            GROUP BY organization_ids\n            ORDER BY id, organization_ids",
+                "core_possibleduplicateorganization",
+                engine="django.db.backends.postgresql",
+            ),
+            atomic=False,
+        ),
+        django_db_views.operations.ViewRunPython(
+            code=django_db_views.migration_functions.ForwardViewMigration(
+                "SELECT\n                row_number() over ()        AS id,\n                unnest(organization_ids)    AS organization_id,\n                subq.id                     AS duplicate_values_id\n            FROM (\n            SELECT\n                array_to_string(\n                    array_agg(duplicate_value ORDER BY duplicate_value), ','\n                ) AS id,\n                array_agg(\n                    duplicate_value ORDER BY duplicate_value\n                ) AS duplicate_values,\n                array_agg(\n                    duplicate_type ORDER BY duplicate_type\n                ) AS duplicate_fields,\n                organization_ids,\n                EXISTS(\n                    SELECT 1 FROM core_dismissedduplicateorganization as dd\n                    WHERE dd.organization_ids = duplicate_groups.organization_ids\n                ) AS is_dismissed\n            FROM (\n            SELECT 'Name and government'                         AS duplicate_type,\n                   concat('Name and government: ', concat(organization.name_key, ', ', TRIM(LOWER(government.name))))    AS duplicate_value,\n                   array_agg(organization.id ORDER BY organization.id)::int[]\n                                                            AS organization_ids\n            FROM core_organization organization\n            LEFT JOIN public.core_country government\n                ON organization.government_id = government.code\n            GROUP BY organization.name_key, organization.government_id, government.name\n            HAVING count(1) > 1\n        ) AS duplicate_groups\n            GROUP BY organization_ids\n            ORDER BY id, organization_ids\n        ) AS subq",
+                "core_possibleduplicateorganizationrelationship",
+                engine="django.db.backends.postgresql",
+            ),
+            reverse_code=django_db_views.migration_functions.BackwardViewMigration(
+                "SELECT \n                row_number() over ()        AS id,\n                unnest(organization_ids)    AS organization_id,  \n                subq.id                     AS duplicate_values_id\n            FROM (\n            SELECT \n                array_to_string(\n                    array_agg(duplicate_value ORDER BY duplicate_value), ','\n                ) AS id,  \n                array_agg(\n                    duplicate_value ORDER BY duplicate_value\n                ) AS duplicate_values,  \n                array_agg(\n                    duplicate_type ORDER BY duplicate_type\n                ) AS duplicate_fields,  \n                organization_ids,\n                EXISTS(\n                    SELECT 1 FROM core_dismissedduplicateorganization as dd\n                    WHERE dd.organization_ids = duplicate_groups.organization_ids\n                ) AS is_dismissed\n            FROM (\n            SELECT 'Name and government'                         AS duplicate_type, \n                   concat('Name and government: ', concat(TRIM(LOWER(organization.name)), ', ', TRIM(LOWER(government.name))))    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS organization_ids\n            FROM core_organization organization \n            LEFT JOIN public.core_country government \n                ON organization.government_id = government.code\n            LEFT JOIN public.core_country country \n                ON organization.country_id = country.code    \n            GROUP BY duplicate_value\n            HAVING count(1) > 1\n        ) AS duplicate_groups\n            GROUP BY organization_ids\n            ORDER BY id, organization_ids\n        ) AS subq",
+                "core_possibleduplicateorganizationrelationship",
+                engine="django.db.backends.postgresql",
+            ),
+            atomic=False,
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:09
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import CreateExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0050_dedup_keys_views"),
+    ]
+
+    operations = [
+        CreateExtension("fuzzystrmatch"),
+        migrations.AddField(
+            model_name="refreshpossibleduplicatestask",
+            name="full_refresh",
+            field=models.BooleanField(
+                default=False,
+                help_text="Look for similar contacts among all contacts, instead of only the ones changed since the last refresh.",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ContactBlockingKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.TextField()),
+                (
+                    "contact",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.contact",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["key"], name="contact_blocking_key")],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("contact", "key"), name="unique_contact_blocking_key"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="SimilarContacts",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                (
+                    "contact",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.contact",
+                    ),
+                ),
+                (
+                    "other_contact",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.contact",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "similar contacts",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("contact", "other_contact"),
+                        name="unique_similar_contacts",
+                    ),
+                    models.CheckConstraint(
+                        condition=models.Q(("contact__lt", models.F("other_contact"))),
+                        name="similar_contacts_ordered",
+                    ),
+                ],
+            },
+        ),
+    ]
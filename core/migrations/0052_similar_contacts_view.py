@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:09
+
+import importlib
+
+import django_db_views.migration_functions
+import django_db_views.operations
+from django.db import migrations
+
+# Same as in the 0050 migration
+previous = importlib.import_module(
+    "core.migrations.0047_possible_duplicate_contact_materialized"
+)
+relationship = previous.Migration.operations[2]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0051_similar_contacts"),
+    ]
+
+    operations = [
+        migrations.RunSQL(migrations.RunSQL.noop, previous.INDEXES),
+        migrations.RunPython(relationship.reverse_code, relationship.code),
+        django_db_views.operations.ViewRunPython(
+            code=django_db_views.migration_functions.ForwardMaterializedViewMigration(
+                "SELECT\n                concat(\n                    array_to_string(\n                        array_agg(duplicate_value ORDER BY duplicate_value), ','\n                    ),\n                    ' #',\n                    array_to_string(contact_ids, ',')\n                ) AS id,\n                array_agg(\n                    duplicate_value ORDER BY duplicate_value\n                ) AS duplicate_values,\n                array_agg(\n                    duplicate_type ORDER BY duplicate_type\n                ) AS duplicate_fields,\n                contact_ids\n            FROM (\n            SELECT 'Name'                         AS duplicate_type,\n                   concat('Name: ', name_key)    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS contact_ids\n            FROM core_contact\n            GROUP BY name_key\n            HAVING count(1) > 1\n         UNION ALL \n            SELECT 'Email'                         AS duplicate_type,\n                   concat('Email: ', email_key)    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS contact_ids\n            FROM core_contact, unnest(email_keys) AS email_key\n            GROUP BY email_key\n            HAVING count(1) > 1\n         UNION ALL \n            SELECT 'Similar name'                               AS duplicate_type,\n                   concat('Similar name: ', round(score::numeric, 2))\n                                                                AS duplicate_value,\n                   ARRAY[contact_id, other_contact_id]::int[]   AS contact_ids\n            FROM core_similarcontacts\n        ) AS duplicate_groups\n            GROUP BY contact_ids\n            ORDER BY id, contact_ids",
+                "core_possibleduplicatecontact",
+                engine="django.db.backends.postgresql",
+            ),
+            reverse_code=django_db_views.migration_functions.BackwardMaterializedViewMigration(
+                "SELECT\n                array_to_string(\n                    array_agg(duplicate_value ORDER BY duplicate_value), ','\n                ) AS id,\n                array_agg(\n                    duplicate_value ORDER BY duplicate_value\n                ) AS duplicate_values,\n                array_agg(\n                    duplicate_type ORDER BY duplicate_type\n                ) AS duplicate_fields,\n                contact_ids\n            FROM (\n            SELECT 'Name'                         AS duplicate_type,\n                   concat('Name: ', name_key)    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS contact_ids\n            FROM core_contact\n            GROUP BY name_key\n            HAVING count(1) > 1\n         UNION ALL \n            SELECT 'Email'                         AS duplicate_type,\n                   concat('Email: ', email_key)    AS duplicate_value,\n                   array_agg(id ORDER BY id)::int[]         AS contact_ids\n            FROM core_contact, unnest(email_keys) AS email_key\n            GROUP BY email_key\n            HAVING count(1) > 1\n        ) AS duplicate_groups\n            GROUP BY contact_ids\n            ORDER BY id, contact_ids",
+                "core_possibleduplicatecontact",
+                engine="django.db.backends.postgresql",
+            ),
+            atomic=False,
+        ),
+        migrations.RunPython(relationship.code, relationship.reverse_code),
+        migrations.RunSQL(previous.INDEXES, migrations.RunSQL.noop),
+    ]
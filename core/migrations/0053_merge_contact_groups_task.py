@@ -0,0 +1,123 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:23
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0052_similar_contacts_view"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MergeContactGroupsTask",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                        verbose_name="id",
+                    ),
+                ),
+                (
+                    "description",
+                    models.CharField(
+                        blank=True, max_length=256, verbose_name="description"
+                    ),
+                ),
+                (
+                    "created_on",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created on"),
+                ),
+                (
+                    "started_on",
+                    models.DateTimeField(null=True, verbose_name="started on"),
+                ),
+                (
+                    "completed_on",
+                    models.DateTimeField(null=True, verbose_name="completed on"),
+                ),
+                (
+                    "progress",
+                    models.IntegerField(blank=True, null=True, verbose_name="progress"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "PENDING"),
+                            ("RECEIVED", "RECEIVED"),
+                            ("STARTED", "STARTED"),
+                            ("PROGESS", "PROGESS"),
+                            ("SUCCESS", "SUCCESS"),
+                            ("FAILURE", "FAILURE"),
+                            ("REVOKED", "REVOKED"),
+                            ("REJECTED", "REJECTED"),
+                            ("RETRY", "RETRY"),
+                            ("IGNORED", "IGNORED"),
+                        ],
+                        db_index=True,
+                        default="PENDING",
+                        max_length=128,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "job_id",
+                    models.CharField(blank=True, max_length=128, verbose_name="job id"),
+                ),
+                (
+                    "mode",
+                    models.CharField(
+                        choices=[
+                            ("UNKNOWN", "UNKNOWN"),
+                            ("SYNC", "SYNC"),
+                            ("ASYNC", "ASYNC"),
+                        ],
+                        db_index=True,
+                        default="UNKNOWN",
+                        max_length=128,
+                        verbose_name="mode",
+                    ),
+                ),
+                (
+                    "failure_reason",
+                    models.CharField(
+                        blank=True, max_length=256, verbose_name="failure reason"
+                    ),
+                ),
+                ("log_text", models.TextField(blank=True, verbose_name="log text")),
+                (
+                    "contact_groups",
+                    models.JSONField(
+                        default=list,
+                        help_text="Lists of contact ids; the contacts of each list are merged into the first one.",
+                    ),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_on",),
+                "get_latest_by": "created_on",
+                "abstract": False,
+            },
+        ),
+    ]
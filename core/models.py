@@ -1,16 +1,22 @@
 import contextlib
+import hashlib
+import json
 import textwrap
 
 import pycountry
 from colorfield.fields import ColorField
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
-from django_db_views.db_view import DBView
+from django.db.models.functions import Concat, Lower, Trim
+from django_db_views.db_view import DBMaterializedView, DBView
 from django_task.models import TaskRQ
 from encrypted_fields import EncryptedCharField, EncryptedDateField, EncryptedJSONField
 from psycopg import sql
 
 from common.array_field import ArrayField
+from common.audit import bulk_audit_update
 from common.citext import CICharField, CIEmailField
 from common.model import KronosId, get_protected_storage
 
@@ -101,6 +107,32 @@ class OrganizationType(models.Model):
         return self.statistics_title or self.title
 
 
+class AltNamesText(models.Func):
+    """
+    All the alternative names joined in a single string. Uses an immutable SQL
+    function (see the core 0045 migration), so it can be indexed.
+    """
+
+    function = "organization_alt_names_text"
+    output_field = models.TextField()
+
+
+class NormalizedEmails(models.Func):
+    """
+    The distinct trimmed, lowercase emails, sorted. Uses an immutable SQL function
+    (see the core 0049 migration), so it can be used in generated columns.
+    """
+
+    function = "normalize_emails"
+    template = "%(function)s((%(expressions)s)::text[])"
+    output_field = ArrayField(base_field=models.TextField())
+
+
+def normalize_emails(emails):
+    """Same as `NormalizedEmails`, in Python."""
+    return sorted({key for email in emails or () if (key := email.strip().lower())})
+
+
 class Organization(models.Model):
     organization_id = KronosId()
     name = models.TextField()
@@ -153,8 +185,28 @@ class Organization(models.Model):
     include_in_invitation = models.BooleanField(default=True)
     sort_order = models.PositiveIntegerField(default=None, blank=True, null=True)
 
+    # Normalized name used to find possible duplicates
+    name_key = models.GeneratedField(
+        expression=Trim(Lower("name")),
+        output_field=models.TextField(),
+        db_persist=True,
+    )
+
     class Meta:
         ordering = ("sort_order", "name", "country__name")
+        indexes = [
+            models.Index(
+                fields=["name_key", "government"], name="organization_name_key"
+            ),
+            GinIndex(
+                OpClass("name", name="gin_trgm_ops"),
+                name="organization_name_trgm",
+            ),
+            GinIndex(
+                OpClass(AltNamesText("alt_names"), name="gin_trgm_ops"),
+                name="organization_alt_names_trgm",
+            ),
+        ]
 
     def __str__(self):
         if self.government:
@@ -164,8 +216,9 @@ class Organization(models.Model):
         return self.name
 
     def filter_contacts_by_emails(self, emails: list[str]):
+        keys = normalize_emails(emails)
         return self.contacts.filter(
-            models.Q(emails__overlap=emails) | models.Q(email_ccs__overlap=emails)
+            models.Q(email_keys__overlap=keys) | models.Q(email_cc_keys__overlap=keys)
         )
 
     def get_related_invite_organizations(self):
@@ -216,6 +269,33 @@ class BaseContact(models.Model):
 
     HL_TITLES = (Title.HE_MR, Title.HE_MS, Title.HON_MR, Title.HON_MS)
 
+    # Fields imported from Kronos, used to compute the fingerprint.
+    FINGERPRINT_FIELDS = (
+        "organization",
+        "title",
+        "title_localized",
+        "first_name",
+        "last_name",
+        "designation",
+        "department",
+        "phones",
+        "mobiles",
+        "faxes",
+        "emails",
+        "email_ccs",
+        "notes",
+        "is_use_organization_address",
+        "address",
+        "city",
+        "state",
+        "country",
+        "postal_code",
+        "birth_date",
+        "primary_lang",
+        "second_lang",
+        "third_lang",
+    )
+
     title = models.CharField(max_length=30, choices=Title.choices, blank=True)
 
     class LocalizedTitle(models.TextChoices):
@@ -330,12 +410,54 @@ class BaseContact(models.Model):
     passport_date_of_issue = EncryptedDateField(blank=True, null=True)
     passport_date_of_expiry = EncryptedDateField(blank=True, null=True)
 
+    fingerprint = models.CharField(
+        max_length=64,
+        default="",
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="SHA-256 of the fields imported from Kronos.",
+    )
+
     class Meta:
         abstract = True
 
     def __str__(self):
         return self.display_name_with_org
 
+    def save(self, *args, **kwargs):
+        self.update_fingerprint()
+        if (update_fields := kwargs.get("update_fields")) is not None:
+            kwargs["update_fields"] = {*update_fields, "fingerprint"}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def get_fingerprint(cls, values: dict) -> str:
+        """
+        Hash the imported fields in `values`, missing fields are hashed with their
+        default value. Related objects can be given either as instances or as pks.
+        """
+        data = []
+        for name in cls.FINGERPRINT_FIELDS:
+            try:
+                value = values[name]
+            except KeyError:
+                value = cls._meta.get_field(name).get_default()
+            data.append(getattr(value, "pk", value))
+        return hashlib.sha256(json.dumps(data, default=str).encode()).hexdigest()
+
+    def update_fingerprint(self):
+        """
+        Recompute the fingerprint, needed when the contact is saved without
+        calling `save()`, for example with `bulk_create()`.
+        """
+        self.fingerprint = self.get_fingerprint(
+            {
+                name: getattr(self, self._meta.get_field(name).attname)
+                for name in self.FINGERPRINT_FIELDS
+            }
+        )
+
     def _get_possible_names(self):
         yield self.full_name
         yield from self.emails or []
@@ -457,6 +579,13 @@ class Contact(BaseContact):
         help_text="Contact photo; initially imported from Kronos",
         storage=get_protected_storage,
     )
+    photo_sha256 = models.CharField(
+        max_length=64,
+        default="",
+        blank=True,
+        editable=False,
+        help_text="SHA-256 of the photo imported from Kronos.",
+    )
 
     groups = models.ManyToManyField(
         "ContactGroup",
@@ -464,11 +593,59 @@ class Contact(BaseContact):
         related_name="contacts",
     )
 
+    # Normalized names and emails used to find possible duplicates
+    name_key = models.GeneratedField(
+        expression=Concat(
+            Trim(Lower("first_name")), models.Value(" "), Trim(Lower("last_name"))
+        ),
+        output_field=models.TextField(),
+        db_persist=True,
+    )
+    email_keys = models.GeneratedField(
+        expression=NormalizedEmails("emails"),
+        output_field=ArrayField(base_field=models.TextField()),
+        db_persist=True,
+    )
+    email_cc_keys = models.GeneratedField(
+        expression=NormalizedEmails("email_ccs"),
+        output_field=ArrayField(base_field=models.TextField()),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["focal_point_ids"], name="contact_focal_point_ids"),
+            models.Index(fields=["name_key"], name="contact_name_key"),
+            GinIndex(fields=["email_keys"], name="contact_email_keys"),
+            GinIndex(fields=["email_cc_keys"], name="contact_email_cc_keys"),
+        ]
+
     def add_to_group(self, name):
         return self.groups.add(ContactGroup.objects.get(name=name))
 
 
-class PossibleDuplicateContact(DBView):
+class PossibleDuplicateContactManager(models.Manager):
+    def get_queryset(self):
+        # Not part of the materialized view, so dismissing is reflected right away
+        return (
+            super()
+            .get_queryset()
+            .annotate(
+                is_dismissed=models.Exists(
+                    DismissedDuplicateContact.objects.filter(
+                        contact_ids=models.OuterRef("contact_ids")
+                    )
+                )
+            )
+        )
+
+
+class PossibleDuplicateContact(DBMaterializedView):
+    """
+    Materialized, refreshed by the `RefreshPossibleDuplicates` job periodically
+    and after contacts are imported or merged.
+    """
+
     id = models.TextField(primary_key=True)
     duplicate_fields = ArrayField(base_field=models.TextField())
     duplicate_values = ArrayField(base_field=models.TextField())
@@ -476,36 +653,57 @@ class PossibleDuplicateContact(DBView):
     contacts = models.ManyToManyField(
         Contact, through="PossibleDuplicateContactRelationship"
     )
-    is_dismissed = models.BooleanField(default=False)
+
+    objects = PossibleDuplicateContactManager()
 
     @staticmethod
     def view_definition():
         fields = (
             {
                 "field_name": "Name",
-                "field": "concat(TRIM(LOWER(first_name)), ' ', TRIM(LOWER(last_name)))",
+                "field": "name_key",
+                "source": "core_contact",
             },
             {
                 "field_name": "Email",
-                "field": "TRIM(LOWER(unnest(emails)))",
+                "field": "email_key",
+                "source": "core_contact, unnest(email_keys) AS email_key",
             },
         )
+        # The keys are normalized and indexed columns, and each contact has
+        # distinct email keys.
         query_template = """
             SELECT '%(field_name)s'                         AS duplicate_type,
                    concat('%(field_name)s: ', %(field)s)    AS duplicate_value,
                    array_agg(id ORDER BY id)::int[]         AS contact_ids
-            FROM core_contact
-            GROUP BY duplicate_value
-            HAVING count(DISTINCT id) > 1
+            FROM %(source)s
+            GROUP BY %(field)s
+            HAVING count(1) > 1
         """
-        union_query = " UNION ALL ".join([query_template % field for field in fields])
+        # Pairs of contacts with similar names, see `SimilarContacts`
+        similar_query = """
+            SELECT 'Similar name'                               AS duplicate_type,
+                   concat('Similar name: ', round(score::numeric, 2))
+                                                                AS duplicate_value,
+                   ARRAY[contact_id, other_contact_id]::int[]   AS contact_ids
+            FROM core_similarcontacts
+        """
+        union_query = " UNION ALL ".join(
+            [*(query_template % field for field in fields), similar_query]
+        )
 
+        # The similar names values are not unique, so the id also includes the
+        # contact ids.
         return (
             sql.SQL(
                 """
             SELECT
-                array_to_string(
-                    array_agg(duplicate_value ORDER BY duplicate_value), ','
+                concat(
+                    array_to_string(
+                        array_agg(duplicate_value ORDER BY duplicate_value), ','
+                    ),
+                    ' #',
+                    array_to_string(contact_ids, ',')
                 ) AS id,
                 array_agg(
                     duplicate_value ORDER BY duplicate_value
@@ -513,11 +711,7 @@ class PossibleDuplicateContact(DBView):
                 array_agg(
                     duplicate_type ORDER BY duplicate_type
                 ) AS duplicate_fields,
-                contact_ids,
-                EXISTS(
-                    SELECT 1 FROM core_dismissedduplicatecontact as dd
-                    WHERE dd.contact_ids = duplicate_groups.contact_ids
-                ) AS is_dismissed
+                contact_ids
             FROM ({}) AS duplicate_groups
             GROUP BY contact_ids
             ORDER BY id, contact_ids
@@ -530,28 +724,31 @@ class PossibleDuplicateContact(DBView):
     class Meta:
         managed = False
 
+    @classmethod
+    def refresh_all(cls):
+        """
+        Refresh the possible duplicates and their contacts, without blocking reads.
+        """
+        cls.refresh(concurrently=True)
+        PossibleDuplicateContactRelationship.refresh(concurrently=True)
+
 
-class PossibleDuplicateContactRelationship(DBView):
+class PossibleDuplicateContactRelationship(DBMaterializedView):
     contact = models.ForeignKey(Contact, on_delete=models.DO_NOTHING)
     duplicate_values = models.ForeignKey(
         PossibleDuplicateContact, on_delete=models.DO_NOTHING
     )
 
-    @staticmethod
-    def view_definition():
-        return (
-            sql.SQL(
-                """
-            SELECT
-                row_number() over ()    AS id,
-                unnest(contact_ids)     AS contact_id,
-                subq.id                 AS duplicate_values_id
-            FROM ({}) AS subq
-        """
-            )
-            .format(sql.SQL(PossibleDuplicateContact.view_definition()))
-            .as_string()
-        )
+    view_definition = """
+        SELECT
+            row_number() over (
+                ORDER BY duplicate.id, item.contact_id
+            )                                   AS id,
+            item.contact_id                     AS contact_id,
+            duplicate.id                        AS duplicate_values_id
+        FROM core_possibleduplicatecontact AS duplicate,
+             unnest(duplicate.contact_ids) AS item(contact_id)
+    """
 
     class Meta:
         managed = False
@@ -564,6 +761,56 @@ class DismissedDuplicateContact(models.Model):
         return f"Dismissed duplicates: {self.contact_ids}"
 
 
+class ContactBlockingKey(models.Model):
+    """
+    Only contacts sharing a blocking key (similar sounding names, same email local
+    part, same organization and country) are compared when looking for similar
+    contacts. Maintained by the `RefreshPossibleDuplicates` job.
+    """
+
+    contact = models.ForeignKey(Contact, on_delete=models.CASCADE, related_name="+")
+    key = models.TextField()
+
+    class Meta:
+        indexes = [models.Index(fields=["key"], name="contact_blocking_key")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["contact", "key"], name="unique_contact_blocking_key"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Blocking key: {self.key}"
+
+
+class SimilarContacts(models.Model):
+    """
+    A pair of contacts with similar names, scored by trigram similarity. Found by
+    the `RefreshPossibleDuplicates` job, and shown as possible duplicates.
+    """
+
+    contact = models.ForeignKey(Contact, on_delete=models.CASCADE, related_name="+")
+    other_contact = models.ForeignKey(
+        Contact, on_delete=models.CASCADE, related_name="+"
+    )
+    score = models.FloatField()
+
+    class Meta:
+        verbose_name_plural = "similar contacts"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["contact", "other_contact"], name="unique_similar_contacts"
+            ),
+            models.CheckConstraint(
+                condition=models.Q(contact__lt=models.F("other_contact")),
+                name="similar_contacts_ordered",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Similar contacts: {self.contact_id}, {self.other_contact_id}"
+
+
 class PossibleDuplicateOrganization(DBView):
     id = models.TextField(primary_key=True)
     duplicate_fields = ArrayField(base_field=models.TextField())
@@ -579,19 +826,21 @@ class PossibleDuplicateOrganization(DBView):
         fields = (
             {
                 "field_name": "Name and government",
-                "field": "concat(TRIM(LOWER(organization.name)), ', ', TRIM(LOWER(government.name)))",
+                "field": "concat(organization.name_key, ', ', TRIM(LOWER(government.name)))",
+                "group_by": "organization.name_key, organization.government_id",
             },
         )
+        # Grouped by the indexed columns, the government name only depends on the
+        # government id.
         query_template = """
             SELECT '%(field_name)s'                         AS duplicate_type,
                    concat('%(field_name)s: ', %(field)s)    AS duplicate_value,
-                   array_agg(id ORDER BY id)::int[]         AS organization_ids
+                   array_agg(organization.id ORDER BY organization.id)::int[]
+                                                            AS organization_ids
             FROM core_organization organization
             LEFT JOIN public.core_country government
                 ON organization.government_id = government.code
-            LEFT JOIN public.core_country country
-                ON organization.country_id = country.code
-            GROUP BY duplicate_value
+            GROUP BY %(group_by)s, government.name
             HAVING count(1) > 1
         """
         union_query = " UNION ALL ".join([query_template % field for field in fields])
@@ -713,6 +962,27 @@ class ContactGroup(models.Model):
     def natural_key(self):
         return (self.name,)
 
+    def add_contacts(self, contacts, batch_size=1000):
+        """Add the contacts to the group in bulk, logging the change on each one."""
+        Contact.groups.through.objects.bulk_create(
+            [
+                Contact.groups.through(contactgroup=self, contact=contact)
+                for contact in contacts
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        bulk_audit_update(
+            contacts,
+            {
+                "groups": {
+                    "type": "m2m",
+                    "operation": "add",
+                    "objects": [str(self)],
+                }
+            },
+        )
+
 
 class ImportFocalPointsTask(TaskRQ):
     DEFAULT_VERBOSITY = 2
@@ -731,7 +1001,7 @@ class ImportFocalPointsTask(TaskRQ):
 class ImportLegacyContactsTask(TaskRQ):
     DEFAULT_VERBOSITY = 2
     TASK_QUEUE = "default"
-    TASK_TIMEOUT = 300
+    TASK_TIMEOUT = 1800
     LOG_TO_FIELD = True
     LOG_TO_FILE = False
 
@@ -771,6 +1041,11 @@ class ImportContactPhotosTask(TaskRQ):
     overwrite_existing = models.BooleanField(
         default=True, help_text="Overwrite any existing photos."
     )
+    concurrency = models.PositiveSmallIntegerField(
+        default=4,
+        validators=[MinValueValidator(1)],
+        help_text="Number of photos to download from Kronos at the same time.",
+    )
 
     @staticmethod
     def get_jobclass():
@@ -779,6 +1054,50 @@ class ImportContactPhotosTask(TaskRQ):
         return ImportContactPhotos
 
 
+class RefreshPossibleDuplicatesTask(TaskRQ):
+    DEFAULT_VERBOSITY = 2
+    TASK_QUEUE = "default"
+    TASK_TIMEOUT = 1800
+    LOG_TO_FIELD = True
+    LOG_TO_FILE = False
+
+    full_refresh = models.BooleanField(
+        default=False,
+        help_text=(
+            "Look for similar contacts among all contacts, instead of only the ones "
+            "changed since the last refresh."
+        ),
+    )
+
+    @staticmethod
+    def get_jobclass():
+        from core.jobs.duplicates import RefreshPossibleDuplicates
+
+        return RefreshPossibleDuplicates
+
+
+class MergeContactGroupsTask(TaskRQ):
+    DEFAULT_VERBOSITY = 2
+    TASK_QUEUE = "default"
+    TASK_TIMEOUT = 1800
+    LOG_TO_FIELD = True
+    LOG_TO_FILE = False
+
+    contact_groups = models.JSONField(
+        default=list,
+        help_text=(
+            "Lists of contact ids; the contacts of each list are merged into the "
+            "first one."
+        ),
+    )
+
+    @staticmethod
+    def get_jobclass():
+        from core.jobs.merge import MergeContactGroups
+
+        return MergeContactGroups
+
+
 class Region(models.Model):
     code = CICharField(max_length=4, primary_key=True, help_text="Up to 4 characters")
     name = CICharField(max_length=255, blank=True)
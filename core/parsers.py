@@ -1,13 +1,17 @@
 import base64
+import hashlib
 import logging
-from itertools import chain
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from pathlib import Path
 
 from django.core.files.base import ContentFile
 from django.db import transaction
 
 from common.parsing import CONTACT_MAPPING, REGISTRATION_MAPPING, normalize_title
 from core.models import Contact, Country, Organization
-from events.kronos import KronosClient
+from events.kronos import KronosClient, fetch_concurrently
 from events.models import (
     Event,
     PriorityPass,
@@ -54,9 +58,22 @@ class ContactPhotosParser:
 
     def import_photo_for_contact(self, contact: Contact):
         """Import photo for a single contact."""
+        photo = self.fetch_photo(contact)
+        if not photo:
+            return False
+        return self.save_photo(contact, *photo)
+
+    def fetch_photo(self, contact: Contact):
+        """
+        Download the photo for a single contact from Kronos, returning a tuple of
+        (kronos_id, image_data, ext, date) or None if no photo was found.
+
+        Only uses the contact's id and Kronos ids, so it is safe to call from
+        other threads.
+        """
         if not contact.contact_ids:
             self.task.log(logging.WARNING, f"Contact {contact.id} has no Kronos IDs")
-            return False
+            return None
 
         # If only one Kronos ID, skip metadata lookup
         if len(contact.contact_ids) == 1:
@@ -67,28 +84,20 @@ class ContactPhotosParser:
                     self.task.log(
                         logging.INFO, f"No photo found for contact {contact.id}"
                     )
-                    return False
+                    return None
 
                 image_data, ext = self.parse_photo_data(photo_data)
                 if not image_data:
-                    return False
-
-                filename = f"contact_{contact.id}_{kronos_id}.{ext}"
-                contact.photo.save(filename, ContentFile(image_data), save=True)
-                contact.save()
+                    return None
 
-                self.task.log(
-                    logging.INFO,
-                    f"Photo imported for contact {contact.id} using Kronos ID {kronos_id}",
-                )
-                return True
+                return kronos_id, image_data, ext, None
 
             except Exception as e:
                 self.task.log(
                     logging.ERROR,
                     f"Error importing photo for contact {contact.id} with Kronos ID {kronos_id}: {e}",
                 )
-                return False
+                return None
 
         # Multiple Kronos IDs - try to find most recent contact with a picture
         contacts_with_dates = []
@@ -126,7 +135,7 @@ class ContactPhotosParser:
             self.task.log(
                 logging.INFO, f"No Kronos IDs with dates found for contact {contact.id}"
             )
-            return False
+            return None
 
         # Try each Kronos ID in reverse creation date order, until we find a photo
         contacts_with_dates.sort(key=lambda x: x["date"], reverse=True)
@@ -147,15 +156,7 @@ class ContactPhotosParser:
                 if not image_data:
                     continue
 
-                filename = f"contact_{contact.id}_{kronos_id}.{ext}"
-                contact.photo.save(filename, ContentFile(image_data), save=True)
-
-                self.task.log(
-                    logging.INFO,
-                    f"Photo imported for contact {contact.id} using Kronos ID "
-                    f"{kronos_id} (date: {contact_with_date['date']})",
-                )
-                return True
+                return kronos_id, image_data, ext, contact_with_date["date"]
 
             except Exception as e:
                 self.task.log(
@@ -170,23 +171,77 @@ class ContactPhotosParser:
             logging.INFO,
             f"No photos found for contact {contact.id}",
         )
-        return False
+        return None
+
+    def save_photo(self, contact: Contact, kronos_id, image_data, ext, date=None):
+        """
+        Save the downloaded photo for the contact, unless it's identical to the
+        current one. Returns True if the photo was saved.
+        """
+        filename = f"contact_{contact.id}_{kronos_id}.{ext}"
+        photo_sha256 = hashlib.sha256(image_data).hexdigest()
+        # The hash only applies to photos imported from Kronos, photos uploaded
+        # manually have a different name and are always replaced.
+        if (
+            contact.photo
+            and contact.photo_sha256 == photo_sha256
+            and Path(contact.photo.name).stem.startswith(Path(filename).stem)
+        ):
+            self.task.log(
+                logging.INFO,
+                f"Photo unchanged for contact {contact.id} using Kronos ID {kronos_id}",
+            )
+            return False
+
+        contact.photo_sha256 = photo_sha256
+        contact.photo.save(filename, ContentFile(image_data), save=True)
+
+        if date:
+            self.task.log(
+                logging.INFO,
+                f"Photo imported for contact {contact.id} using Kronos ID "
+                f"{kronos_id} (date: {date})",
+            )
+        else:
+            self.task.log(
+                logging.INFO,
+                f"Photo imported for contact {contact.id} using Kronos ID {kronos_id}",
+            )
+        return True
+
+    def import_photos(self, contact_queryset, concurrency=1):
+        """
+        Import photos for all contacts in supplied queryset.
 
-    def import_photos(self, contact_queryset):
-        """Import photos for all contacts in supplied queryset."""
+        Photos are downloaded by up to `concurrency` threads, and saved one by one,
+        in order, on the calling thread.
+        """
         processed = 0
         imported = 0
 
-        for contact in contact_queryset:
-            try:
-                if self.import_photo_for_contact(contact):
-                    imported += 1
-                processed += 1
-            except Exception as e:
-                # Ignoring and moving to next contact
-                self.task.log(
-                    logging.ERROR, f"Failed to process contact {contact.id}: {e}"
-                )
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # Keep a bounded number of downloads in flight, so memory usage does
+            # not grow with the number of contacts.
+            pending = deque()
+            contacts = iter(contact_queryset.iterator(chunk_size=1000))
+            while True:
+                for contact in islice(contacts, concurrency * 2 - len(pending)):
+                    pending.append(
+                        (contact, executor.submit(self.fetch_photo, contact))
+                    )
+                if not pending:
+                    break
+
+                contact, future = pending.popleft()
+                try:
+                    photo = future.result()
+                    if photo and self.save_photo(contact, *photo):
+                        imported += 1
+                except Exception as e:
+                    # Ignoring and moving to next contact
+                    self.task.log(
+                        logging.ERROR, f"Failed to process contact {contact.id}: {e}"
+                    )
                 processed += 1
 
         self.task.log(
@@ -339,6 +394,9 @@ class ContactParser:
         """
         Import contact from Kronos with registrations. Existing contacts
         are deleted and recreated.
+
+        The data of all contacts is fetched concurrently first, so the contacts
+        are only deleted once everything was received.
         """
         contacts = Contact.objects.filter(contact_ids__overlap=list(kronos_ids))
 
@@ -347,16 +405,17 @@ class ContactParser:
         all_kronos_ids = set(
             chain.from_iterable(contacts.values_list("contact_ids", flat=True))
         ) | set(kronos_ids)
+        all_kronos_ids = sorted(kronos_id for kronos_id in all_kronos_ids if kronos_id)
+
+        kronos_data = fetch_concurrently(self.fetch_contact_data, all_kronos_ids)
 
         new_contacts = []
         with transaction.atomic():
             contacts.delete()
 
-            for kronos_id in all_kronos_ids:
-                if not kronos_id:
-                    continue
-
-                contact_data = self.client.get_contact_data(kronos_id)
+            for kronos_id, (contact_data, registrations_data) in zip(
+                all_kronos_ids, kronos_data, strict=True
+            ):
                 if not contact_data:
                     continue
 
@@ -365,7 +424,6 @@ class ContactParser:
                 contact = self.create_contact(contact_data)
                 new_contacts.append(contact)
 
-                registrations_data = self.client.get_registrations_data(kronos_id)
                 if not registrations_data:
                     continue
 
@@ -376,3 +434,10 @@ class ContactParser:
                     )
 
         return new_contacts
+
+    def fetch_contact_data(self, kronos_id):
+        """Get the contact and registrations data of a Kronos contact."""
+        contact_data = self.client.get_contact_data(kronos_id)
+        if not contact_data:
+            return None, None
+        return contact_data, self.client.get_registrations_data(kronos_id)
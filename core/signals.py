@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.fuzzy_search import country_index
+from core.models import Country
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def country_changed(sender, instance: Country, **kwargs):
+    country_index.changed()
@@ -213,3 +213,24 @@ class TestImportContactFromKronos(TestCase):
         self.assertEqual(
             registration.role, RegistrationRole.objects.get(name="Alternate Head")
         )
+
+    def test_import_merged_contact_from_kronos(self):
+        Contact.objects.create(
+            first_name="Jane", contact_ids=["contactid", "otherid", "goneid"]
+        )
+        self.mock_client.return_value.get_contact_data.side_effect = lambda kronos_id: (
+            None if kronos_id == "goneid" else deepcopy(self.fake_contact)
+        )
+
+        contacts = ContactParser().import_contacts_with_registrations(["contactid"])
+
+        self.assertEqual(
+            sorted(contact.contact_ids for contact in contacts),
+            [["contactid"], ["otherid"]],
+        )
+        self.assertEqual(Contact.objects.count(), 2)
+        for contact in contacts:
+            self.assertEqual(contact.registrations.count(), 1)
+        self.assertEqual(
+            self.mock_client.return_value.get_registrations_data.call_count, 2
+        )
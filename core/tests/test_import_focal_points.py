@@ -1,9 +1,18 @@
 from unittest.mock import patch
 
 from django.core.management import call_command
-from django.test import TestCase
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
 
-from core.models import Contact, ContactGroup, Country, Organization
+from common import fuzzy_search
+from core.jobs.focal_points import ImportFocalPoints
+from core.models import (
+    Contact,
+    ContactGroup,
+    Country,
+    ImportFocalPointsTask,
+    Organization,
+)
 
 
 class TestImportFocalPoints(TestCase):
@@ -85,6 +94,70 @@ class TestImportFocalPoints(TestCase):
         call_command("import_focal_points")
         self.assertEqual(Contact.objects.count(), 1)
 
+    def test_import_many_focal_points(self):
+        self.mock_data = []
+        for i in range(5):
+            item = dict(self.fake_item, id=i, name=f"Mr. Johnny Doe{i}")
+            item["is_national"] = i % 2 == 0
+            self.mock_data.append(item)
+        # Duplicated in the feed
+        self.mock_data.append(dict(self.mock_data[0]))
+
+        call_command("import_focal_points")
+        self.assertEqual(Contact.objects.count(), 5)
+        self.assertEqual(
+            ContactGroup.objects.get(name="Focal point").contacts.count(), 5
+        )
+        self.assertEqual(ContactGroup.objects.get(name="NFP").contacts.count(), 3)
+        contact = Contact.objects.get(focal_point_ids=[0])
+        self.assertEqual(contact.last_name, "Doe0")
+        self.assertTrue(contact.fingerprint)
+
+        call_command("import_focal_points")
+        self.assertEqual(Contact.objects.count(), 5)
+
+    @patch("core.jobs.focal_points.BATCH_SIZE", 2)
+    def test_import_error(self):
+        self.mock_data = [
+            dict(self.fake_item, id=i, name=f"Mr. Johnny Doe{i}") for i in range(5)
+        ]
+        process_contact = ImportFocalPoints.process_contact
+
+        def fail_on_fourth(item):
+            if item["id"] == 3:
+                raise ValueError("Bad focal point")
+            return process_contact(item)
+
+        with patch.object(
+            ImportFocalPoints, "process_contact", side_effect=fail_on_fourth
+        ):
+            call_command("import_focal_points")
+
+        # The contacts processed before the error are kept
+        self.assertEqual(Contact.objects.count(), 3)
+        task = ImportFocalPointsTask.objects.get()
+        self.assertEqual(task.status, "FAILURE")
+        self.assertEqual(task.failure_reason, "Bad focal point")
+
+    @patch("core.jobs.focal_points.BATCH_SIZE", 2)
+    def test_create_error(self):
+        self.mock_data = [
+            dict(self.fake_item, id=i, name=f"Mr. Johnny Doe{i}") for i in range(5)
+        ]
+
+        with patch.object(
+            ImportFocalPoints,
+            "create_contacts",
+            side_effect=[IntegrityError("Bad batch"), RuntimeError("Not raised")],
+        ) as create_contacts:
+            call_command("import_focal_points")
+
+        # The failed batch is not created again
+        self.assertEqual(create_contacts.call_args_list[1].args[1], [])
+        task = ImportFocalPointsTask.objects.get()
+        self.assertEqual(task.status, "FAILURE")
+        self.assertEqual(task.failure_reason, "Bad batch")
+
     def test_check_licensing_system(self):
         self.fake_item["is_licensing_system"] = True
         call_command("import_focal_points")
@@ -138,6 +211,36 @@ class TestImportFocalPoints(TestCase):
         call_command("import_focal_points")
         self.assertEqual(Contact.objects.count(), 0)
 
+    def test_country_index(self):
+        fuzzy_search.country_index.invalidate()
+        # Only the query building the index
+        with self.assertNumQueries(1):
+            self.assertEqual(fuzzy_search.get_country("PT").code, "PT")
+            self.assertEqual(fuzzy_search.get_country(" portugal. ").code, "PT")
+            self.assertEqual(fuzzy_search.get_country("Great britain").code, "GB")
+            self.assertEqual(fuzzy_search.get_country("Great britain").code, "GB")
+            self.assertEqual(
+                fuzzy_search.get_country("The Islamic Emirate of Afghanistan").code,
+                "AF",
+            )
+            with self.assertRaises(LookupError):
+                fuzzy_search.get_country("Hallownest")
+
+    def test_country_index_changed(self):
+        self.assertEqual(fuzzy_search.get_country("Portugal").code, "PT")
+
+        # Renamed in the admin
+        country = Country.objects.get(code="PT")
+        country.name = "Lusitania"
+        country.save()
+        self.assertEqual(fuzzy_search.get_country("Lusitania").code, "PT")
+
+        # Changed by another process
+        other_index = fuzzy_search.CountryIndex()
+        self.assertEqual(other_index.search("Lusitania").code, "PT")
+        Country.objects.create(code="XH", name="Hallownest")
+        self.assertEqual(other_index.search("Hallownest").code, "XH")
+
     def test_check_organization_match_name(self):
         org = Organization.objects.create(
             name="Intergalactic Defense Coalition",
@@ -201,3 +304,26 @@ class TestImportFocalPoints(TestCase):
             contact.organization.name,
             "Intergalactic Defense Coalition",
         )
+
+    def test_check_organization_best_match(self):
+        Organization.objects.create(
+            name="Intergalactic Defense Coalition Office",
+            country=Country.objects.get(code="PT"),
+        )
+        org = Organization.objects.create(
+            name="Intergalactic Defence Coalition",
+            country=Country.objects.get(code="PT"),
+        )
+        call_command("import_focal_points")
+        contact = Contact.objects.first()
+        self.assertEqual(contact.organization, org)
+
+    @override_settings(FUZZY_ORGANIZATION_THRESHOLD=0.5)
+    def test_check_organization_match_threshold(self):
+        org = Organization.objects.create(
+            name="Defense Coalition",
+            country=Country.objects.get(code="PT"),
+        )
+        call_command("import_focal_points")
+        contact = Contact.objects.first()
+        self.assertEqual(contact.organization, org)
@@ -0,0 +1,122 @@
+import json
+from io import BytesIO
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from common.parsing import iter_json_array
+from core.jobs.legacy_contacts import ImportLegacyContacts
+from core.models import Contact, ContactGroup, ImportLegacyContactsTask
+
+
+class TestImportLegacyContacts(TestCase):
+    fixtures = [
+        "initial/contactgroup",
+        "initial/region",
+        "initial/subregion",
+        "initial/country",
+    ]
+
+    def setUp(self):
+        self.fake_item = {
+            "AddressID": 1,
+            "Country_code": "PT",
+            "Address Line 1": "Real Street 42",
+            "Address Line 2": "  ",
+            "Address City": "Lisbon",
+            "E-Mail": "johnny.doe@example.com; johnny@example.com",
+            "NameLast": "Doe",
+            "NameOthers": "Johnny",
+            "NameTitle": "Mr.",
+            "Primary Language": "E",
+        }
+
+    def import_contacts(self, items, clear=False):
+        task = ImportLegacyContactsTask.objects.create(
+            json_file=ContentFile(json.dumps(items).encode(), name="legacy.json"),
+            clear_previous=clear,
+        )
+        task.run(is_async=False)
+        task.refresh_from_db()
+        return task
+
+    def test_import_legacy_contacts(self):
+        task = self.import_contacts([self.fake_item])
+
+        self.assertEqual(task.status, "SUCCESS")
+        self.assertEqual(task.progress, 100)
+        contact = Contact.objects.get()
+        self.assertEqual(contact.full_name, "Mr. Johnny Doe")
+        self.assertEqual(contact.country.code, "PT")
+        self.assertEqual(contact.address, "Real Street 42")
+        self.assertEqual(
+            contact.emails, ["johnny.doe@example.com", "johnny@example.com"]
+        )
+        self.assertEqual(contact.primary_lang, "E")
+        self.assertTrue(contact.fingerprint)
+        self.assertEqual(
+            list(contact.groups.all()),
+            [ContactGroup.objects.get(name="Legacy contacts")],
+        )
+
+    @patch("core.jobs.legacy_contacts.BATCH_SIZE", 2)
+    def test_import_legacy_contacts_batches(self):
+        items = [
+            dict(self.fake_item, AddressID=i, NameLast=f"Doe{i}") for i in range(5)
+        ]
+        task = self.import_contacts(items)
+
+        self.assertEqual(task.description, "Contacts created=5")
+        group = ContactGroup.objects.get(name="Legacy contacts")
+        self.assertEqual(group.contacts.count(), 5)
+
+        # Previous legacy contacts are replaced
+        self.import_contacts(items[:2], clear=True)
+        self.assertEqual(group.contacts.count(), 2)
+        self.assertEqual(Contact.objects.count(), 2)
+
+    @patch("core.jobs.legacy_contacts.BATCH_SIZE", 2)
+    def test_import_legacy_contacts_error(self):
+        items = [
+            dict(self.fake_item, AddressID=i, NameLast=f"Doe{i}") for i in range(5)
+        ]
+        process_contact = ImportLegacyContacts.process_contact
+
+        def fail_on_fourth(item):
+            if item["AddressID"] == 3:
+                raise ValueError("Bad legacy contact")
+            return process_contact(item)
+
+        with patch.object(
+            ImportLegacyContacts, "process_contact", side_effect=fail_on_fourth
+        ):
+            task = self.import_contacts(items)
+
+        # The contacts processed before the error are kept
+        self.assertEqual(task.status, "FAILURE")
+        self.assertEqual(task.failure_reason, "Bad legacy contact")
+        self.assertEqual(
+            sorted(Contact.objects.values_list("last_name", flat=True)),
+            ["Doe0", "Doe1", "Doe2"],
+        )
+
+
+class TestIterJsonArray(TestCase):
+    def test_iter_json_array(self):
+        items = [{"name": "é" * i, "values": [i, i / 2]} for i in range(50)] + [
+            1,
+            2.5,
+            None,
+        ]
+        data = json.dumps(items, ensure_ascii=False).encode()
+        for chunk_size in (1, 3, 1024):
+            self.assertEqual(
+                list(iter_json_array(BytesIO(data), chunk_size=chunk_size)), items
+            )
+        self.assertEqual(list(iter_json_array(BytesIO(b" [ ] "))), [])
+
+    def test_iter_json_array_invalid(self):
+        for data in (b"", b"{}", b"[1 2]", b"[1,", b'[{"a":'):
+            with self.assertRaises(ValueError):
+                list(iter_json_array(BytesIO(data), chunk_size=2))
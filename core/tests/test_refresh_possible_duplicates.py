@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.jobs.duplicates import trigger_refresh_possible_duplicates
+from core.models import (
+    Contact,
+    PossibleDuplicateContact,
+    RefreshPossibleDuplicatesTask,
+    SimilarContacts,
+)
+
+
+class TestRefreshPossibleDuplicates(TestCase):
+    def setUp(self):
+        self.contacts = [
+            self.create_contact("José", "Pérez", "jperez@example.com"),
+            self.create_contact("Jose", "Perez", "jose.perez@example.org"),
+            self.create_contact("Charlotte", "Bronte", "cb@example.com"),
+            self.create_contact("Bronte", "Charlotte", "charlotte@example.org"),
+            self.create_contact("Jonathan", "Swift", "jswift@example.com"),
+            self.create_contact("Jonathon", "Swift", "jswift@example.org"),
+            self.create_contact("Jane", "Austen", "jane@example.com"),
+        ]
+
+    @staticmethod
+    def create_contact(first_name, last_name, email):
+        return Contact.objects.create(
+            first_name=first_name, last_name=last_name, emails=[email]
+        )
+
+    def run_task(self, **kwargs):
+        task = RefreshPossibleDuplicatesTask.objects.create(**kwargs)
+        task.run(is_async=False)
+        task.refresh_from_db()
+        self.assertEqual(task.status, "SUCCESS")
+        return task
+
+    def test_similar_contacts(self):
+        task = self.run_task()
+        self.assertIn("Compared 7 changed contacts, found 3 similar", task.log_text)
+
+        duplicates = PossibleDuplicateContact.objects.filter(
+            duplicate_fields=["Similar name"]
+        )
+        self.assertEqual(
+            sorted(duplicates.values_list("contact_ids", flat=True)),
+            [[self.contacts[i].pk, self.contacts[i + 1].pk] for i in (0, 2, 4)],
+        )
+        for duplicate in duplicates:
+            self.assertEqual(duplicate.contacts.count(), 2)
+
+    @override_settings(FUZZY_DUPLICATE_REFRESH_MARGIN=0)
+    def test_only_changed_contacts(self):
+        self.run_task()
+        task = self.run_task()
+        self.assertIn("Compared 0 changed contacts", task.log_text)
+        self.assertEqual(SimilarContacts.objects.count(), 3)
+
+        self.contacts[-1].first_name = "Jonathen"
+        self.contacts[-1].last_name = "Swift"
+        self.contacts[-1].save()
+        task = self.run_task()
+        self.assertIn("Compared 1 changed contacts, found 2 similar", task.log_text)
+        self.assertEqual(SimilarContacts.objects.count(), 5)
+
+        task = self.run_task(full_refresh=True)
+        self.assertIn("Compared 7 changed contacts, found 5 similar", task.log_text)
+
+    @override_settings(FUZZY_DUPLICATE_REFRESH_MARGIN=60)
+    def test_contacts_committed_after_refresh_started(self):
+        task = self.run_task()
+        Contact.objects.update(updated_at=task.started_on - timedelta(days=1))
+        # Saved before the refresh started, but committed after it
+        Contact.objects.filter(pk=self.contacts[0].pk).update(
+            updated_at=task.started_on - timedelta(seconds=10)
+        )
+
+        task = self.run_task()
+        self.assertIn("Compared 1 changed contacts", task.log_text)
+
+    @patch.object(RefreshPossibleDuplicatesTask, "run")
+    def test_trigger_coalesced(self, run):
+        trigger_refresh_possible_duplicates()
+        trigger_refresh_possible_duplicates()
+        self.assertEqual(run.call_count, 1)
+
+        # Changes made while a refresh is running need another one
+        RefreshPossibleDuplicatesTask.objects.update(status="STARTED")
+        trigger_refresh_possible_duplicates()
+        trigger_refresh_possible_duplicates()
+        self.assertEqual(run.call_count, 2)
+
+        # Pending refreshes whose job was lost are ignored
+        RefreshPossibleDuplicatesTask.objects.update(
+            created_on=timezone.now() - timedelta(days=1)
+        )
+        trigger_refresh_possible_duplicates()
+        self.assertEqual(run.call_count, 3)
+
+    @override_settings(FUZZY_DUPLICATE_THRESHOLD=1)
+    def test_threshold(self):
+        self.run_task()
+        # Only the same names, without accents or in a different order
+        self.assertEqual(
+            sorted(SimilarContacts.objects.values_list("contact", "other_contact")),
+            [(self.contacts[i].pk, self.contacts[i + 1].pk) for i in (0, 2)],
+        )
+
+    def test_exact_duplicates_skipped(self):
+        self.contacts[1].emails = ["jperez@example.com"]
+        self.contacts[1].save()
+        self.run_task()
+        self.assertFalse(
+            SimilarContacts.objects.filter(contact=self.contacts[0]).exists()
+        )
+
+
+class TestDuplicatesBenchmark(TestCase):
+    def test_benchmark(self):
+        out = StringIO()
+        call_command(
+            "duplicates_benchmark", "--contacts=200", "--duplicates=0.2", stdout=out
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split()[:2] for line in lines[1:]],
+            [["full", "200"], ["incremental", "2"]],
+        )
+        # Everything is rolled back
+        self.assertFalse(Contact.objects.exists())
@@ -1,10 +1,21 @@
+import datetime
 import logging
+import time
 
+import django_rq
+from django.conf import settings
+from django.core.mail import get_connection
 from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from django_task.job import Job
 from django_task.utils import get_model_from_id
+from rq.job import Job as RQJob
+from rq.timeouts import JobTimeoutException
 
-from emails.models import Email, InvitationEmail, SendEmailTask
+from common.scheduler import cron
+from core.models import Contact
+from emails.models import BATCH_SIZE, Email, InvitationEmail, SendEmailTask
 from emails.services import get_organization_recipients
 from events.models import EventInvitation
 
@@ -12,18 +23,135 @@ logger = logging.getLogger(__name__)
 
 
 class SendEmailJob(Job):
+    @classmethod
+    def run(cls, task_class, task_id):
+        # Wait for the task to be committed, like `Job.run` does
+        if not get_model_from_id(task_class, task_id):
+            logger.warning("Could not find email task %s", task_id)
+            return
+        # The task might have already been sent by the job of another task of the
+        # same email, see `claim_pending_tasks`.
+        if not task_class.objects.filter(pk=task_id, status="PENDING").update(
+            status="STARTED", started_on=timezone.now()
+        ):
+            logger.info("Email task %s already started, skipping", task_id)
+            return
+        super().run(task_class, task_id)
+
+    @staticmethod
+    def get_queued_task_ids():
+        """Ids of the email tasks with a job waiting in the queue, or running."""
+        queue = django_rq.get_queue(SendEmailTask.TASK_QUEUE)
+        job_ids = [*queue.get_job_ids(), *queue.started_job_registry.get_job_ids()]
+        return {
+            job.kwargs.get("task_id")
+            for job in RQJob.fetch_many(job_ids, connection=queue.connection)
+            if job and job.kwargs.get("task_class") is SendEmailTask
+        }
+
+    @staticmethod
+    def claim_pending_tasks(task: SendEmailTask):
+        """
+        Claim other pending tasks of the same email, to be sent together with this
+        one, up to the EMAIL_SEND_BATCH_SIZE setting.
+        """
+        if settings.EMAIL_SEND_BATCH_SIZE <= 1:
+            return []
+
+        select_related = [
+            f"contact__{path}" for path in task.email.get_contact_select_related()
+        ]
+        with transaction.atomic():
+            tasks = list(
+                SendEmailTask.objects.filter(email_id=task.email_id, status="PENDING")
+                .exclude(pk=task.pk)
+                .select_related("contact", "invitation", *select_related)
+                .select_for_update(skip_locked=True, of=("self",))
+                .order_by("created_on")[: settings.EMAIL_SEND_BATCH_SIZE - 1]
+            )
+            for other in tasks:
+                # Share the email, so its templates are only parsed once
+                other.email = task.email
+                other.set_status("STARTED", job_id=task.job_id)
+        return tasks
+
+    @staticmethod
+    def release_tasks(tasks):
+        """Queue again the claimed tasks that were not sent."""
+        if not tasks:
+            return
+
+        for task in tasks:
+            task.log(logging.INFO, "Not sent, queueing again")
+            task.status = "PENDING"
+            task.job_id = ""
+        SendEmailTask.objects.filter(pk__in=[task.pk for task in tasks]).update(
+            status="PENDING", job_id="", started_on=None
+        )
+        SendEmailTask.run_many(tasks)
+
+    @classmethod
+    def execute(cls, job, task: SendEmailTask):
+        if task.contact_id:
+            # Load the contact with the relations used by the placeholders
+            task.contact = (
+                Contact.objects.select_related(*task.email.get_contact_select_related())
+                .filter(pk=task.contact_id)
+                .first()
+            )
+
+        start = time.perf_counter()
+        # Stop sending the other emails in time to send this one as well
+        deadline = start + task.TASK_TIMEOUT - task.SEND_TIMEOUT
+        sent = 0
+        with get_connection() as connection:
+            others = cls.claim_pending_tasks(task)
+            unsent = list(others)
+            try:
+                while unsent and time.perf_counter() < deadline:
+                    other = unsent.pop(0)
+                    other.log(logging.INFO, "Sending together with task %s", task.pk)
+                    try:
+                        cls.send_email(other, connection)
+                    except JobTimeoutException:
+                        other.set_status("FAILURE", failure_reason="Job timed out")
+                        raise
+                    except Exception as e:
+                        other.log(logging.ERROR, str(e))
+                        other.set_status("FAILURE", failure_reason=str(e))
+                    else:
+                        other.set_status("SUCCESS")
+                        sent += 1
+            finally:
+                cls.release_tasks(unsent)
+
+            cls.send_email(task, connection)
+            sent += 1
+
+        if others:
+            seconds = time.perf_counter() - start
+            task.log(
+                logging.INFO,
+                "Sent %s of %s emails in %.2fs (%.2f messages/sec)",
+                sent,
+                len(others) + 1 - len(unsent),
+                seconds,
+                sent / seconds,
+            )
+
     @staticmethod
-    def execute(job, task: SendEmailTask):
+    def send_email(task: SendEmailTask, connection):
         task.log(logging.INFO, "Building email %r", task.email)
 
-        # For invitation emails, use the pre-computed email address recipients
+        # For invitation emails, use the pre-computed email address recipients.
+        # The "global" Cc and Bcc recipients are pre-computed for all emails.
         is_invitation_email = not task.contact
 
         msg = task.email.build_email(
             contact=task.contact,
             to_list=task.email_to if is_invitation_email else [],
-            cc_list=task.email_cc if is_invitation_email else [],
-            bcc_list=task.email_bcc if is_invitation_email else [],
+            cc_list=task.email_cc,
+            bcc_list=task.email_bcc,
             invitation=task.invitation,
         )
         if not (recipients := msg.recipients()):
@@ -46,16 +174,38 @@ class SendEmailJob(Job):
             task.email_to = msg.to
             task.email_cc = msg.cc
             task.email_bcc = msg.bcc
-            # Link to contacts as well for tracking; useful since group memberships can
-            # change after this email is sent.
-            task.cc_contacts.add(*task.email.all_cc_contacts)
-            task.bcc_contacts.add(*task.email.all_bcc_contacts)
         task.save()
 
+        msg.connection = connection
         msg.send()
         task.log(logging.INFO, "Email %r sent to all addresses", task.email)
 
 
+@cron("*/10 * * * *")
+def recover_stale_email_tasks():
+    """
+    Recover the tasks left started by jobs that were killed (e.g. by a worker
+    restart). The ones that were never built are queued again, the others might have
+    been sent already, and are marked as failed.
+
+    Old pending tasks whose job was lost (e.g. Redis was flushed) are queued again.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=2 * SendEmailTask.TASK_TIMEOUT)
+    stale = SendEmailTask.objects.filter(
+        Q(started_on__lt=cutoff) | Q(started_on__isnull=True), status="STARTED"
+    )
+    for task in stale.exclude(sent_email=""):
+        task.set_status("FAILURE", failure_reason="Interrupted while sending")
+    SendEmailJob.release_tasks(list(stale.filter(sent_email="")))
+
+    pending = SendEmailTask.objects.filter(
+        status="PENDING", job_id="", created_on__lt=cutoff
+    ).exclude(pk__in=SendEmailJob.get_queued_task_ids())
+    if tasks := list(pending):
+        logger.warning("Queueing again %s email tasks without a job", len(tasks))
+        SendEmailTask.run_many(tasks)
+
+
 def queue_emails(email_id):
     if email := get_model_from_id(Email, email_id):
         email.queue_emails()
@@ -84,6 +234,7 @@ def queue_invitation_emails(invitation_email_id, original_email_id=None):
         invitation_email=original_email,
     )
 
+    tasks = []
     for org, data in org_recipients.items():
         if not data["to_emails"]:
             continue
@@ -127,4 +278,9 @@ def queue_invitation_emails(invitation_email_id, original_email_id=None):
             task.cc_contacts.set(data["cc_contacts"])
             task.bcc_contacts.set(data["bcc_contacts"])
 
-        task.run(is_async=True)
+        tasks.append(task)
+        if len(tasks) >= BATCH_SIZE:
+            SendEmailTask.run_many(tasks)
+            tasks = []
+
+    SendEmailTask.run_many(tasks)
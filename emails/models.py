@@ -1,4 +1,5 @@
 import html
+import itertools
 import re
 from email import message_from_string
 from functools import cached_property
@@ -10,7 +11,10 @@ from django.core.mail import EmailMultiAlternatives
 from django.db import models, transaction
 from django.db.models import Exists, OuterRef, Q
 from django.utils.html import strip_tags
+from django_task.app_settings import ALWAYS_EAGER
+from django_task.exceptions import TaskError
 from django_task.models import TaskRQ
+from rq import Queue
 
 from accounts.models import User
 from common.array_field import ArrayField
@@ -21,12 +25,12 @@ from core.models import (
     Organization,
     OrganizationType,
 )
-from emails.placeholders import (
-    replace_placeholders,
-)
+from emails.placeholders import PlaceholderTemplate
 from emails.validators import validate_placeholders
 from events.models import Event, EventGroup, EventInvitation, Registration
 
+BATCH_SIZE = 1000
+
 
 def get_relative_image_urls(email_body):
     img_tag_pattern = r'<img.*?src="(.*?)"'
@@ -200,13 +204,39 @@ class Email(models.Model):
             raise ValidationError("Reminder emails cannot be saved as draft.")
 
     def queue_emails(self):
+        # The Cc and Bcc recipients are the same for all the sent emails, so they are
+        # resolved only once and saved on each task.
+        cc_contacts = self.all_cc_contacts
+        bcc_contacts = self.all_bcc_contacts
+        email_cc = [email for contact in cc_contacts for email in contact.emails or []]
+        email_bcc = [
+            email for contact in bcc_contacts for email in contact.emails or []
+        ]
+
         tasks = []
-        for contact in self.all_to_contacts:
-            task = SendEmailTask(
-                email=self, contact=contact, created_by=self.created_by
+        for contacts in itertools.batched(self.all_to_contacts, BATCH_SIZE):
+            batch = SendEmailTask.objects.bulk_create(
+                SendEmailTask(
+                    email=self,
+                    contact=contact,
+                    created_by=self.created_by,
+                    email_cc=email_cc,
+                    email_bcc=email_bcc,
+                )
+                for contact in contacts
             )
-            task.run(is_async=True)
-            tasks.append(task)
+            SendEmailTask.cc_contacts.through.objects.bulk_create(
+                SendEmailTask.cc_contacts.through(sendemailtask=task, contact=contact)
+                for task in batch
+                for contact in cc_contacts
+            )
+            SendEmailTask.bcc_contacts.through.objects.bulk_create(
+                SendEmailTask.bcc_contacts.through(sendemailtask=task, contact=contact)
+                for task in batch
+                for contact in bcc_contacts
+            )
+            SendEmailTask.run_many(batch)
+            tasks.extend(batch)
         return tasks
 
     @property
@@ -244,10 +274,24 @@ class Email(models.Model):
             result.update(group.contacts.all())
         return result
 
+    @cached_property
+    def subject_template(self):
+        return PlaceholderTemplate(self.subject)
+
+    @cached_property
+    def content_template(self):
+        return PlaceholderTemplate(self.content.strip())
+
+    def get_contact_select_related(self):
+        """Contact relations used by the placeholders of the subject and content."""
+        return self.subject_template.get_select_related(
+            Contact
+        ) | self.content_template.get_select_related(Contact)
+
     def build_email(
         self, contact=None, to_list=None, cc_list=None, bcc_list=None, invitation=None
     ):
-        subject = replace_placeholders([contact, invitation], self.subject)
+        subject = self.subject_template.render([contact, invitation])
         msg = EmailMultiAlternatives(
             subject=subject,
             from_email=settings.DEFAULT_FROM_EMAIL,
@@ -256,12 +300,6 @@ class Email(models.Model):
         if contact:
             msg.to.extend(contact.emails or [])
             msg.cc.extend(contact.email_ccs or [])
-            # Add "global" CCs and BCCs (will be included in *all* actual emails generated
-            # for this Email instance).
-            for cc_contact in self.all_cc_contacts:
-                msg.cc.extend(cc_contact.emails or [])
-            for bcc_contact in self.all_bcc_contacts:
-                msg.bcc.extend(bcc_contact.emails or [])
 
         if to_list:
             msg.to.extend(to_list)
@@ -270,8 +308,7 @@ class Email(models.Model):
         if bcc_list:
             msg.bcc.extend(bcc_list)
 
-        html_content = self.content.strip()
-        html_content = replace_placeholders([contact, invitation], html_content)
+        html_content = self.content_template.render([contact, invitation])
 
         # Remove all HTML Tags, leaving only the plaintext
         text_content = strip_tags(html_content)
@@ -404,7 +441,10 @@ class InvitationEmail(Email):
 class SendEmailTask(TaskRQ):
     DEFAULT_VERBOSITY = 2
     TASK_QUEUE = "default"
-    TASK_TIMEOUT = 60
+    # Time allowed for sending one email; each job can send up to
+    # EMAIL_SEND_BATCH_SIZE emails, see SendEmailJob.
+    SEND_TIMEOUT = 60
+    TASK_TIMEOUT = SEND_TIMEOUT * max(1, settings.EMAIL_SEND_BATCH_SIZE)
     LOG_TO_FIELD = True
     LOG_TO_FILE = False
 
@@ -488,6 +528,36 @@ class SendEmailTask(TaskRQ):
 
         return SendEmailJob
 
+    @classmethod
+    def run_many(cls, tasks):
+        """
+        Same as `run(is_async=True)` for each of the tasks, but with a single query
+        and a single Redis round-trip per batch of tasks.
+        """
+        jobclass = cls.get_jobclass()
+        mode = "SYNC" if ALWAYS_EAGER else "ASYNC"
+        for batch in itertools.batched(tasks, BATCH_SIZE):
+            if any(task.job_id for task in batch):
+                raise TaskError("already scheduled for execution")
+
+            for task in batch:
+                task.mode = mode
+            cls.objects.filter(pk__in=[task.pk for task in batch]).update(mode=mode)
+
+            queue = batch[0].get_queue()
+            with queue.connection.pipeline() as pipe:
+                queue.enqueue_many(
+                    [
+                        Queue.prepare_data(
+                            jobclass.run,
+                            kwargs={"task_class": cls, "task_id": task.pk},
+                        )
+                        for task in batch
+                    ],
+                    pipeline=pipe,
+                )
+                pipe.execute()
+
     @cached_property
     def msg(self):
         return message_from_string(self.sent_email)
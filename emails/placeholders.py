@@ -1,9 +1,12 @@
-from functools import singledispatch
+from functools import cached_property, singledispatch
 from typing import Any
 
 from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
 
 from core.models import Contact
+from emails.validators import PLACEHOLDER_RE
 from events.models import EventInvitation
 
 
@@ -38,6 +41,64 @@ def deep_getattr(obj, attr, default=None):
         return default
 
 
+class PlaceholderTemplate:
+    """
+    Text with [[placeholder]] tags, parsed once and then rendered for any number of
+    objects. Only the placeholders found in the text are looked up.
+    """
+
+    def __init__(self, text: str):
+        # Literal text on even positions, placeholder names on odd positions
+        self.segments = PLACEHOLDER_RE.split(text)
+
+    @cached_property
+    def placeholders(self) -> set[str]:
+        return set(self.segments[1::2])
+
+    def get_select_related(self, model) -> set[str]:
+        """
+        The relations of `model` needed by the placeholders in the text, to be
+        loaded together with the objects passed to `render`.
+        """
+        result = set()
+        placeholders = get_placeholders.dispatch(model)(None)
+        for name in self.placeholders & placeholders.keys():
+            handles = placeholders[name]
+            for attr in filter(None, (handles["attr"], handles.get("fallback"))):
+                path = []
+                opts = model._meta
+                for part in attr.split("__"):
+                    try:
+                        field = opts.get_field(part)
+                    except FieldDoesNotExist:
+                        break
+                    if not isinstance(field, models.ForeignKey):
+                        break
+                    path.append(part)
+                    opts = field.related_model._meta
+                if path:
+                    result.add("__".join(path))
+        return result
+
+    def render(self, objs: list[Any]) -> str:
+        """
+        Replace the placeholders with their values from the first object in `objs`
+        that defines them, as defined by `get_placeholders`. Unknown placeholders
+        are left unchanged.
+        """
+        values = {}
+        for obj in filter(None, objs):
+            for name, handles in get_placeholders(obj).items():
+                if name in self.placeholders and name not in values:
+                    value = deep_getattr(obj, handles["attr"], handles.get("fallback"))
+                    values[name] = "" if value is None else str(value)
+
+        result = self.segments.copy()
+        for i in range(1, len(result), 2):
+            result[i] = values.get(result[i], f"[[{result[i]}]]")
+        return "".join(result)
+
+
 def replace_placeholders(objs: list[Any], text: str) -> str:
     """
     For each object in `objs`, replace [[placeholder]] tags in `text`
@@ -48,21 +109,4 @@ def replace_placeholders(objs: list[Any], text: str) -> str:
     if not objs or not text:
         return text
 
-    objs = filter(None, objs)
-
-    for obj in objs:
-        # Get placeholders for the object type
-        placeholders = get_placeholders(obj)
-
-        placeholder_values = {}
-        for placeholder, handles in placeholders.items():
-            attr = handles["attr"]
-            fallback = handles.get("fallback")
-            value = deep_getattr(obj, attr, fallback)
-            placeholder_values[placeholder] = "" if value is None else value
-
-        # Replace placeholders with values
-        for placeholder, value in placeholder_values.items():
-            text = text.replace(f"[[{placeholder}]]", str(value))
-
-    return text
+    return PlaceholderTemplate(text).render(objs)
@@ -1,8 +1,16 @@
+import datetime
+from unittest.mock import PropertyMock, patch
+
 from django.contrib.admin.sites import AdminSite
 from django.contrib.auth import get_user_model
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.core import mail
+from django.core.mail import get_connection
 from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django_task.job import Job
+from rq import Queue
+from rq.timeouts import JobTimeoutException
 
 from api.tests.factories import (
     ContactFactory,
@@ -10,7 +18,7 @@ from api.tests.factories import (
 )
 from core.models import ContactGroup, Country, OrganizationType
 from emails.admin import EmailAdmin
-from emails.jobs import SendEmailJob
+from emails.jobs import SendEmailJob, recover_stale_email_tasks
 from emails.models import Email, SendEmailTask
 
 
@@ -242,3 +250,231 @@ class TestEmailAdminOrganizations(TestCase):
 
         self.assertEqual(len(to_contacts), 0)
         self.assertEqual(len(cc_contacts), 0)
+
+    @patch("emails.models.BATCH_SIZE", 2)
+    def test_queue_emails_in_batches(self):
+        """Test tasks are created and enqueued in batches."""
+        group = ContactGroup.objects.create(name="Test Group")
+        group.contacts.add(*ContactFactory.create_batch(5))
+
+        email = Email.objects.create(
+            subject="Test Batches",
+            content="Hello, group!",
+            created_by=self.user,
+        )
+        email.groups.add(group)
+
+        with patch(
+            "rq.Queue.enqueue_many", autospec=True, side_effect=Queue.enqueue_many
+        ) as enqueue_many:
+            tasks = email.queue_emails()
+
+        self.assertEqual(len(tasks), 5)
+        self.assertEqual(enqueue_many.call_count, 3)
+        enqueued = [
+            job_data.kwargs["task_id"]
+            for call in enqueue_many.call_args_list
+            for job_data in call.args[1]
+        ]
+        self.assertCountEqual(enqueued, [task.pk for task in tasks])
+        self.assertEqual(
+            set(SendEmailTask.objects.filter(email=email).values_list("mode")),
+            {("ASYNC",)},
+        )
+
+    def test_queue_emails_resolves_cc_once(self):
+        """Test Cc and Bcc recipients are saved on the tasks when queueing."""
+        cc_group = ContactGroup.objects.create(name="Cc Group")
+        cc_contact = ContactFactory(emails=["cc@example.com"])
+        cc_group.contacts.add(cc_contact)
+        bcc_contact = ContactFactory(emails=["bcc@example.com"])
+        recipients = ContactFactory.create_batch(3)
+
+        email = Email.objects.create(
+            subject="Test Cc",
+            content="Hello!",
+            created_by=self.user,
+        )
+        email.recipients.add(*recipients)
+        email.cc_groups.add(cc_group)
+        email.bcc_recipients.add(bcc_contact)
+
+        tasks = email.queue_emails()
+        self.assertEqual(len(tasks), 3)
+
+        with (
+            patch.object(Email, "all_cc_contacts", new_callable=PropertyMock) as cc,
+            patch.object(Email, "all_bcc_contacts", new_callable=PropertyMock) as bcc,
+        ):
+            for task in SendEmailTask.objects.filter(email=email):
+                SendEmailJob.execute(None, task)
+        cc.assert_not_called()
+        bcc.assert_not_called()
+
+        self.assertEqual(len(mail.outbox), 3)
+        for msg in mail.outbox:
+            self.assertEqual(msg.cc, ["cc@example.com"])
+            self.assertEqual(msg.bcc, ["bcc@example.com"])
+        for task in SendEmailTask.objects.filter(email=email):
+            self.assertEqual(list(task.cc_contacts.all()), [cc_contact])
+            self.assertEqual(list(task.bcc_contacts.all()), [bcc_contact])
+            self.assertEqual(task.email_cc, ["cc@example.com"])
+
+    @override_settings(EMAIL_SEND_BATCH_SIZE=10)
+    @patch.object(SendEmailTask, "TASK_TIMEOUT", 600)
+    def test_send_emails_in_batches(self):
+        """Test pending emails of the same email are sent together."""
+        email = Email.objects.create(
+            subject="Test Batch Sending",
+            content="Hello!",
+            created_by=self.user,
+        )
+        email.recipients.add(*ContactFactory.create_batch(3))
+        email.recipients.add(ContactFactory(emails=[]))
+        other_email = Email.objects.create(subject="Other", content="Other")
+        other_email.recipients.add(self.primary_contact)
+
+        tasks = email.queue_emails()
+        other_task = other_email.queue_emails()[0]
+        task = next(task for task in tasks if task.contact.emails)
+
+        with patch("emails.jobs.get_connection", wraps=get_connection) as connection:
+            SendEmailJob.execute(None, task)
+        connection.assert_called_once()
+
+        self.assertEqual(len(mail.outbox), 3)
+        others = SendEmailTask.objects.filter(email=email).exclude(pk=task.pk)
+        self.assertEqual(others.filter(status="SUCCESS").count(), 2)
+        self.assertEqual(others.get(contact__emails=[]).status, "FAILURE")
+        other_task.refresh_from_db()
+        self.assertEqual(other_task.status, "PENDING")
+
+        # The jobs of the tasks already sent are skipped
+        sent_task = others.filter(status="SUCCESS").first()
+        SendEmailJob.run(task_class=SendEmailTask, task_id=sent_task.pk)
+        self.assertEqual(len(mail.outbox), 3)
+        sent_task.refresh_from_db()
+        self.assertEqual(sent_task.status, "SUCCESS")
+
+    def queue_batch_email(self, recipients=4):
+        email = Email.objects.create(
+            subject="Test Batch Sending",
+            content="Hello!",
+            created_by=self.user,
+        )
+        email.recipients.add(*ContactFactory.create_batch(recipients))
+        return email.queue_emails()
+
+    @override_settings(EMAIL_SEND_BATCH_SIZE=10)
+    @patch.object(SendEmailTask, "TASK_TIMEOUT", 600)
+    def test_send_emails_interrupted(self):
+        """Test the claimed emails are queued again when the job times out."""
+        task, *others = self.queue_batch_email()
+        send_email = SendEmailJob.send_email
+
+        def timeout_on_second(other, connection):
+            if len(mail.outbox) == 1:
+                raise JobTimeoutException
+            send_email(other, connection)
+
+        with (
+            patch.object(SendEmailJob, "send_email", side_effect=timeout_on_second),
+            self.assertRaises(JobTimeoutException),
+        ):
+            SendEmailJob.execute(None, task)
+
+        self.assertEqual(len(mail.outbox), 1)
+        statuses = SendEmailTask.objects.filter(pk__in=[t.pk for t in others])
+        self.assertCountEqual(
+            statuses.values_list("status", "job_id"),
+            [("SUCCESS", ""), ("FAILURE", ""), ("PENDING", "")],
+        )
+        self.assertEqual(statuses.get(status="FAILURE").failure_reason, "Job timed out")
+
+    @override_settings(EMAIL_SEND_BATCH_SIZE=10)
+    def test_send_emails_time_budget(self):
+        """Test no more emails are sent together once the time budget is used."""
+        task, *others = self.queue_batch_email()
+
+        with patch.object(SendEmailTask, "run_many") as run_many:
+            SendEmailJob.execute(None, task)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertCountEqual(run_many.call_args.args[0], others)
+        self.assertEqual(
+            set(
+                SendEmailTask.objects.filter(pk__in=[t.pk for t in others]).values_list(
+                    "status"
+                )
+            ),
+            {("PENDING",)},
+        )
+
+    def test_recover_stale_email_tasks(self):
+        """Test the tasks of killed jobs are queued again or failed."""
+        built, not_built, recent = self.queue_batch_email(3)
+        started_on = timezone.now() - datetime.timedelta(hours=1)
+        SendEmailTask.objects.filter(pk__in=[built.pk, not_built.pk]).update(
+            status="STARTED", started_on=started_on, job_id="job"
+        )
+        SendEmailTask.objects.filter(pk=built.pk).update(sent_email="Sent")
+        SendEmailTask.objects.filter(pk=recent.pk).update(
+            status="STARTED", started_on=timezone.now(), job_id="job"
+        )
+
+        with patch.object(SendEmailJob, "get_queued_task_ids", return_value=set()):
+            recover_stale_email_tasks()
+
+        for task in (built, not_built, recent):
+            task.refresh_from_db()
+        self.assertEqual(built.status, "FAILURE")
+        self.assertEqual((not_built.status, not_built.job_id), ("PENDING", ""))
+        self.assertEqual(recent.status, "STARTED")
+
+    def test_recover_lost_email_tasks(self):
+        """Test old pending tasks without a job are queued again."""
+        lost, queued, recent = self.queue_batch_email(3)
+        self.assertLessEqual(
+            {lost.pk, queued.pk, recent.pk}, SendEmailJob.get_queued_task_ids()
+        )
+        SendEmailTask.objects.filter(pk__in=[lost.pk, queued.pk]).update(
+            created_on=timezone.now() - datetime.timedelta(hours=1)
+        )
+
+        with (
+            patch.object(SendEmailJob, "get_queued_task_ids", return_value={queued.pk}),
+            patch.object(SendEmailTask, "run_many") as run_many,
+        ):
+            recover_stale_email_tasks()
+
+        run_many.assert_called_once_with([lost])
+
+    def test_send_email_job_claims_task(self):
+        """Test the task is claimed with its start time before running the job."""
+        task = self.queue_batch_email(1)[0]
+
+        with patch.object(Job, "run") as run:
+            SendEmailJob.run(task_class=SendEmailTask, task_id=task.pk)
+        run.assert_called_once_with(SendEmailTask, task.pk)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, "STARTED")
+        self.assertIsNotNone(task.started_on)
+
+        # A stopped worker leaves the task to be recovered
+        SendEmailTask.objects.filter(pk=task.pk).update(
+            started_on=timezone.now() - datetime.timedelta(hours=1)
+        )
+        with patch.object(SendEmailTask, "run_many") as run_many:
+            recover_stale_email_tasks()
+        run_many.assert_called_once_with([task])
+
+    def test_send_email_job_missing_task(self):
+        """Test the job waits for the task to be visible, and then gives up."""
+        with (
+            patch("emails.jobs.get_model_from_id", return_value=None) as get_model,
+            patch.object(Job, "run") as run,
+        ):
+            SendEmailJob.run(task_class=SendEmailTask, task_id=0)
+        get_model.assert_called_once_with(SendEmailTask, 0)
+        run.assert_not_called()
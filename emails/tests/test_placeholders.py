@@ -0,0 +1,57 @@
+from django.test import TestCase
+
+from api.tests.factories import ContactFactory, CountryFactory, OrganizationFactory
+from core.models import Contact
+from emails.placeholders import PlaceholderTemplate, replace_placeholders
+from events.models import EventInvitation
+
+
+class TestPlaceholderTemplate(TestCase):
+    def setUp(self):
+        self.country = CountryFactory(name="Romania")
+        self.organization = OrganizationFactory(
+            name="Test Org", government=self.country
+        )
+        self.contact = ContactFactory(
+            first_name="Ana", last_name="Pop", organization=self.organization
+        )
+
+    def test_render(self):
+        text = (
+            "Dear [[first_name]] [[last_name]] ([[party]]), [[unknown]] [[first_name]]"
+        )
+        template = PlaceholderTemplate(text)
+        self.assertEqual(
+            template.placeholders, {"first_name", "last_name", "party", "unknown"}
+        )
+        self.assertEqual(
+            template.render([self.contact, None]),
+            "Dear Ana Pop (Romania), [[unknown]] Ana",
+        )
+        self.assertEqual(
+            replace_placeholders([self.contact, None], text),
+            "Dear Ana Pop (Romania), [[unknown]] Ana",
+        )
+
+    def test_render_first_object_wins(self):
+        invitation = EventInvitation(country=CountryFactory(name="Poland"))
+        template = PlaceholderTemplate("[[party]] [[first_name]]")
+        self.assertEqual(template.render([self.contact, invitation]), "Romania Ana")
+        self.assertEqual(template.render([None, invitation]), "Poland [[first_name]]")
+
+    def test_only_used_placeholders(self):
+        template = PlaceholderTemplate("Hello [[first_name]]!")
+        contact = Contact.objects.get(pk=self.contact.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(template.render([contact]), "Hello Ana!")
+
+    def test_select_related(self):
+        template = PlaceholderTemplate("[[party]] [[organization]] [[country]]")
+        select_related = template.get_select_related(Contact)
+        self.assertEqual(select_related, {"organization__government", "organization"})
+
+        contact = Contact.objects.select_related(*select_related).get(
+            pk=self.contact.pk
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(template.render([contact]), "Romania Test Org ")
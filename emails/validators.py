@@ -3,9 +3,11 @@ import re
 from django.conf import settings
 from django.core.exceptions import ValidationError
 
+PLACEHOLDER_RE = re.compile(r"\[\[([\w-]{1,50})\]\]")
+
 
 def find_placeholders(value):
-    return set(re.findall(r"\[\[([\w-]{1,50})\]\]", value or ""))
+    return set(PLACEHOLDER_RE.findall(value or ""))
 
 
 def validate_placeholders(value):
@@ -76,6 +76,7 @@ class LoadParticipantsFromKronosTaskAdmin(TaskAdmin):
         "registrations_nr",
         "conflicts_nr",
         "skipped_nr",
+        "unchanged_nr",
     ]
     list_filter = (
         AutocompleteFilterFactory("event", "event"),
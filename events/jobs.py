@@ -20,6 +20,7 @@ class LoadEventsFromKronos(Job):
 
         parser = KronosEventsParser(task=task)
         count_created, count_updated = parser.parse_event_list()
+        parser.log_cache_stats()
         task.description = (
             f"Imported {count_created} new events and "
             f"updated {count_updated} existing events."
@@ -37,6 +38,7 @@ class LoadParticipantsFromKronos(Job):
         task.log(logging.INFO, "Loading participants from Kronos")
         parser = KronosParticipantsParser(task=task)
         parser.parse_contact_list()
+        parser.log_cache_stats()
         task.save()
 
     @staticmethod
@@ -50,6 +52,7 @@ class LoadOrganizationsFromKronos(Job):
         task.log(logging.INFO, "Loading organizations from Kronos")
         parser = KronosOrganizationsParser(task=task)
         parser.parse_organizations_list()
+        parser.log_cache_stats()
         task.save()
 
     @staticmethod
@@ -1,119 +1,335 @@
+import hashlib
 import json
+import math
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 ACCOUNTS_HOST = settings.ACCOUNTS_HOST
 KRONOS_HOST = settings.KRONOS_HOST
 KRONOS_USERNAME = settings.KRONOS_USERNAME
 KRONOS_PASSWORD = settings.KRONOS_PASSWORD
 
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# How long cached responses are kept for revalidation after they are stale
+CACHE_STALE_TIMEOUT = 7 * 24 * 3600
+PAGE_SIZE = 500
+ORGANIZATIONS_PAGE_SIZE = 1000
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+# Transport adapter used by new sessions instead of the network, e.g. a local
+# Kronos stand-in for benchmarks. See events.kronos_standin.
+transport_override = None
+
+
+def get_host_semaphore(host):
+    """Semaphore limiting the concurrent requests made to the same host.
+
+    Shared by all clients in the process, so parallel jobs cannot overload Kronos.
+    """
+    with _host_semaphores_lock:
+        try:
+            return _host_semaphores[host]
+        except KeyError:
+            semaphore = threading.BoundedSemaphore(settings.KRONOS_MAX_CONCURRENCY)
+            _host_semaphores[host] = semaphore
+            return semaphore
+
+
+def fetch_concurrently(func, items):
+    """
+    Call `func` for each item from a pool of threads, returning the results in the
+    same order as the items.
+
+    Meant for functions making Kronos requests, which are I/O bound. The requests
+    made to the same host are still limited by `KRONOS_MAX_CONCURRENCY`.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+
+    workers = min(settings.KRONOS_MAX_CONCURRENCY, len(items))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, items))
+
+
+def create_retry():
+    return Retry(
+        total=settings.KRONOS_MAX_RETRIES,
+        status_forcelist=RETRY_STATUSES,
+        # All calls made are either reads or queries (POST is only used because
+        # of the query size), so they are all safe to retry.
+        allowed_methods=None,
+        backoff_factor=settings.KRONOS_BACKOFF_FACTOR,
+        backoff_jitter=settings.KRONOS_BACKOFF_JITTER,
+        respect_retry_after_header=True,
+        # Return the last response instead, so raise_for_status() can handle it.
+        raise_on_status=False,
+    )
+
+
+def create_session():
+    """Create a pooled, keep-alive session that retries transient failures."""
+    adapter = transport_override or HTTPAdapter(
+        pool_maxsize=settings.KRONOS_POOL_SIZE,
+        max_retries=create_retry(),
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.headers.update(
+        {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+    )
+    return session
+
 
 class KronosClient:
     # TODO: at least part of this should be moved to core or common!
     def __init__(self):
+        self.session = create_session()
+        self._login_lock = threading.Lock()
+        # Responses from a stand-in must never mix with the real cached ones
+        self.use_cache = settings.KRONOS_CACHE_ENABLED and not transport_override
+        self.cache_stats = Counter()
         self.auth_token = None
         self.auth_token = self._login()
 
+    def close(self):
+        self.session.close()
+
     def send_kronos(
         self, path, params=None, json_data=None, method="GET", host=KRONOS_HOST
     ):
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        }
-        if self.auth_token:
-            headers["Authorization"] = f"Token {self.auth_token}"
-
-        resp = requests.request(
-            method=method,
-            url=f"https://{host}{path}",
-            headers=headers,
-            json=json_data or {},
-            params=params or {},
-            timeout=60,
-        )
-
+        resp = self._send(path, params, json_data, method, host)
         resp.raise_for_status()
         return resp.json()
 
+    def send_kronos_cached(self, path, params=None, timeout=None):
+        """
+        Same as `send_kronos` for GET requests, but use the shared response cache.
+
+        Cached responses are used as they are for `timeout` seconds (defaults to
+        KRONOS_CACHE_TIMEOUT), then revalidated with a conditional request.
+        """
+        if not self.use_cache:
+            return self.send_kronos(path, params=params)
+
+        if timeout is None:
+            timeout = settings.KRONOS_CACHE_TIMEOUT
+        key = (
+            "kronos:"
+            + hashlib.sha256(
+                json.dumps([KRONOS_HOST, path, params], sort_keys=True).encode()
+            ).hexdigest()
+        )
+
+        entry = cache.get(key)
+        if entry and entry["fresh_until"] > time.time():
+            self.cache_stats["hits"] += 1
+            return entry["data"]
+
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = self._send(path, params, None, "GET", KRONOS_HOST, headers)
+        if resp.status_code == 304 and entry:
+            self.cache_stats["revalidated"] += 1
+        else:
+            resp.raise_for_status()
+            self.cache_stats["misses"] += 1
+            entry = {
+                "data": resp.json(),
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+
+        entry["fresh_until"] = time.time() + timeout
+        if entry["etag"] or entry["last_modified"]:
+            # Keep it around after it's stale, so it can be revalidated.
+            cache.set(key, entry, timeout + CACHE_STALE_TIMEOUT)
+        elif timeout:
+            cache.set(key, entry, timeout)
+        return entry["data"]
+
+    def _send(self, path, params, json_data, method, host, headers=None):
+        auth_token = self.auth_token
+        resp = self._request(path, params, json_data, method, host, auth_token, headers)
+        if resp.status_code == 401 and auth_token:
+            # The token has most likely expired; get a new one and try again.
+            self._refresh_token(auth_token)
+            resp = self._request(
+                path, params, json_data, method, host, self.auth_token, headers
+            )
+        return resp
+
+    def _request(self, path, params, json_data, method, host, auth_token, headers=None):
+        headers = dict(headers or {})
+        if auth_token:
+            headers["Authorization"] = f"Token {auth_token}"
+
+        with get_host_semaphore(host):
+            return self.session.request(
+                method=method,
+                url=f"https://{host}{path}",
+                headers=headers,
+                json=json_data or {},
+                params=params or {},
+                timeout=settings.KRONOS_TIMEOUT,
+            )
+
+    def _refresh_token(self, expired_token):
+        with self._login_lock:
+            # Another thread sharing this client may have already refreshed it.
+            if self.auth_token == expired_token:
+                self._login()
+
     def _login(self):
-        data = self.send_kronos(
+        resp = self._request(
             path="/api/v2013/authentication/token",
-            host=ACCOUNTS_HOST,
+            params=None,
             json_data={
                 "email": f"{KRONOS_USERNAME}",
                 "password": f"{KRONOS_PASSWORD}",
             },
             method="POST",
+            host=ACCOUNTS_HOST,
+            auth_token=None,
         )
+        resp.raise_for_status()
 
-        self.auth_token = data.get("authenticationToken")
+        self.auth_token = resp.json().get("authenticationToken")
         return self.auth_token
 
     def get_meetings(self):
-        return self.send_kronos(path="/api/v2018/events")["records"]
+        return list(chain.from_iterable(self.iter_meetings()))
+
+    def iter_meetings(self):
+        """Yield all Kronos events, one page of records at a time."""
+        yield from self._iter_pages(
+            "/api/v2018/events",
+            {},
+            cache_timeout=settings.KRONOS_MEETINGS_CACHE_TIMEOUT,
+        )
 
     def get_participants(self, event_id: str):
+        return list(chain.from_iterable(self.iter_participants(event_id)))
+
+    def iter_participants(self, event_id: str):
+        """Yield the participants of the event, one page of records at a time."""
         qparams = {
             "eventIds": [event_id],
             "registrationStatusForEventIds": [event_id],
         }
-        return self.send_kronos(
-            path="/api/v2018/contacts",
-            params={
-                "q": json.dumps(qparams),
-            },
-        )["records"]
+        yield from self._iter_pages("/api/v2018/contacts", qparams)
+
+    def _iter_pages(self, path: str, query: dict, cache_timeout=None):
+        """
+        Yield all records, one page at a time. Pages are only cached if a
+        `cache_timeout` is given.
+        """
+        skip = 0
+        previous_records = None
+        while True:
+            params = {"q": json.dumps({**query, "limit": PAGE_SIZE, "skip": skip})}
+            if cache_timeout is None:
+                page = self.send_kronos(path=path, params=params)
+            else:
+                page = self.send_kronos_cached(path, params, timeout=cache_timeout)
+            records = page["records"]
+            if records and records == previous_records:
+                # The endpoint ignores `skip`, the rest of the records can't be read
+                raise RuntimeError(f"Kronos returned the same page twice for {path}")
+            previous_records = records
+            if records:
+                yield records
+
+            skip += len(records)
+            # Kronos may return fewer records than requested, so only stop once the
+            # total is reached, or on an empty page if the total is not known. An
+            # oversized page means paging is not supported by the endpoint.
+            if (
+                not records
+                or len(records) > PAGE_SIZE
+                or skip >= page.get("totalRecordCount", math.inf)
+            ):
+                break
 
     def get_org_types(self):
-        return self.send_kronos("/api/v2018/organizations/types")
+        return self.send_kronos_cached("/api/v2018/organizations/types")
 
     def get_countries(self):
-        return self.send_kronos("/api/v2018/countries")
+        return self.send_kronos_cached("/api/v2018/countries")
 
     def get_organizations_for_event(self, event_id: str):
-        limit = 1000
-        total_count: int | None = None
-        results = []
-        post_data = {"eventIds": [event_id], "limit": limit, "skip": 0}
-
-        while total_count is None or len(results) < total_count:
-            page_result = self.send_kronos(
-                "/api/v2018/organizations/query",
-                json_data=post_data,
-                method="POST",
-            )
-            total_count = page_result["totalRecordCount"]
-            results.extend(page_result["records"])
-            post_data["skip"] += limit
+        return list(chain.from_iterable(self.iter_organizations_for_event(event_id)))
 
-        return results
+    def iter_organizations_for_event(self, event_id: str):
+        yield from self.iter_query_organizations({"eventIds": [event_id]})
 
     def get_all_organizations(self):
-        limit = 1000
-        total_count: int | None = None
-        results = []
+        return list(chain.from_iterable(self.iter_all_organizations()))
 
+    def iter_all_organizations(self):
         org_types = [
             org_type["organizationTypeId"] for org_type in self.get_org_types()
         ]
-        post_data = {
-            "organizationTypeIds": org_types,
-            "limit": limit,
-            "skip": 0,
-        }
+        yield from self.iter_query_organizations({"organizationTypeIds": org_types})
 
-        while total_count is None or len(results) < total_count:
-            page_result = self.send_kronos(
-                "/api/v2018/organizations/query",
-                json_data=post_data,
-                method="POST",
-            )
-            total_count = page_result["totalRecordCount"]
-            results.extend(page_result["records"])
-            post_data["skip"] += limit
-        return results
+    def iter_query_organizations(self, query: dict):
+        """
+        Yield all organizations matching the query, one page of records at a time.
+
+        The total number of records is only known after the first page is
+        received, the rest of the pages are then fetched in parallel and
+        yielded in order. Only a few pages are fetched ahead of the consumer,
+        so memory usage does not depend on the number of records.
+        """
+        first_page = self._query_organizations_page(query, skip=0)
+        total_count = first_page["totalRecordCount"]
+        yield first_page["records"]
+
+        # Kronos may return fewer records per page than requested, in which case
+        # the rest of the pages are requested with the same size.
+        page_size = min(len(first_page["records"]), ORGANIZATIONS_PAGE_SIZE)
+        if not page_size:
+            return
+        skips = range(page_size, total_count, page_size)
+        if not skips:
+            return
+
+        workers = min(settings.KRONOS_PAGE_WORKERS, len(skips))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for skip in skips:
+                pending.append(
+                    executor.submit(self._query_organizations_page, query, skip)
+                )
+                if len(pending) >= workers:
+                    yield pending.popleft().result()["records"]
+            while pending:
+                yield pending.popleft().result()["records"]
+
+    def _query_organizations_page(self, query: dict, skip: int):
+        return self.send_kronos(
+            "/api/v2018/organizations/query",
+            json_data={**query, "limit": ORGANIZATIONS_PAGE_SIZE, "skip": skip},
+            method="POST",
+        )
 
     def get_contact_photo(self, contact_kronos_id: str):
         """Get photo for a single specific contact Kronos id."""
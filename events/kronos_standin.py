@@ -0,0 +1,338 @@
+"""
+Local stand-in for the Kronos and accounts APIs, to run imports offline.
+
+The stand-in is a `requests` transport adapter, serving either synthetically
+generated data or responses recorded from the real APIs. Every `KronosClient`
+created inside `with install(adapter):` talks to it instead of the network.
+"""
+
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from events import kronos
+
+# 1x1 PNG
+PHOTO_SRC = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42"
+    "mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg=="
+)
+LOGIN_PATH = "/api/v2013/authentication/token"
+
+COUNTRIES = ["AO", "BR", "DE", "FR", "IN", "KE", "PL", "RO"]
+TITLES = ["Mr.", "Ms.", "Dr.", "H.E. Mr.", "H.E. Ms."]
+TAGS = ["Speaker", "Media", "Observer"]
+
+
+@contextmanager
+def install(adapter):
+    """Use the adapter for all Kronos clients created inside the block."""
+    previous, kronos.transport_override = kronos.transport_override, adapter
+    try:
+        yield adapter
+    finally:
+        kronos.transport_override = previous
+
+
+def get_request_key(request):
+    """Identify a request by its method, path, query and body."""
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    return f"{request.method} {request.path_url} {body.decode()}"
+
+
+def make_response(request, status_code, data):
+    resp = Response()
+    resp.status_code = status_code
+    resp.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    resp._content = json.dumps(data).encode()
+    resp.encoding = "utf-8"
+    resp.url = request.url
+    resp.request = request
+    return resp
+
+
+class KronosStandIn(BaseAdapter):
+    """
+    Serve Kronos responses locally, waiting `latency` seconds for each request to
+    simulate the network.
+    """
+
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.latency = latency
+        self.requests_nr = 0
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requests_nr += 1
+        if self.latency:
+            time.sleep(self.latency)
+        status_code, data = self.get_response(request)
+        return make_response(request, status_code, data)
+
+    def close(self):
+        pass
+
+    def get_response(self, request):
+        """Return the (status_code, data) of the response for the request."""
+        raise NotImplementedError
+
+
+class SyntheticKronos(KronosStandIn):
+    """
+    Generate Kronos data of the given size. The same seed always generates the
+    same data.
+
+    Participants of consecutive events partially overlap, so imports also go
+    through the existing contacts code paths.
+    """
+
+    def __init__(
+        self,
+        events_nr=2,
+        participants_nr=100,
+        organizations_nr=50,
+        org_types_nr=4,
+        seed=0,
+        latency=0.0,
+    ):
+        super().__init__(latency=latency)
+        self.rng = random.Random(seed)  # noqa: S311 - not used for security
+        self.org_types = [self.make_org_type(i) for i in range(org_types_nr)]
+        self.organizations = [
+            self.make_organization(i) for i in range(organizations_nr)
+        ]
+        self.events = [self.make_event(i) for i in range(events_nr)]
+        self.participants = {
+            event["eventId"]: [
+                self.make_participant(event, i)
+                for i in range(
+                    event_nr * participants_nr // 2,
+                    event_nr * participants_nr // 2 + participants_nr,
+                )
+            ]
+            for event_nr, event in enumerate(self.events)
+        }
+        self.contacts = {
+            participant["contactId"]: participant
+            for participants in self.participants.values()
+            for participant in participants
+        }
+
+    @staticmethod
+    def make_id(kind, i):
+        # Kronos ids are 24 hex chars
+        return f"{kind:08x}{i:016x}"
+
+    def make_org_type(self, i):
+        return {
+            "organizationTypeId": self.make_id(1, i),
+            "acronym": f"SYN{i}",
+            "title": f"Synthetic organization type {i}",
+            "description": "",
+        }
+
+    def make_organization(self, i):
+        org_type = self.org_types[i % len(self.org_types)]
+        return {
+            "organizationId": self.make_id(2, i),
+            "organizationTypeId": org_type["organizationTypeId"],
+            "organizationType": org_type["acronym"],
+            "name": f"Synthetic organization {i}",
+            "acronym": f"SO{i}",
+            "country": self.rng.choice(COUNTRIES).lower(),
+            "government": self.rng.choice(COUNTRIES).lower(),
+            "address": f"{i} Synthetic street",
+            "city": "Synthville",
+            "state": "",
+            "postalCode": f"{i:06d}",
+            "phones": [f"+1{i:09d}"],
+            "faxes": [],
+            "emails": [f"org{i}@example.org"],
+            "emailCcs": [f"org{i}.cc@example.org"],
+            "webs": [],
+            "notes": "#invite" if i % 3 == 0 else "",
+            "createdOn": "2020-01-01T00:00:00.000Z",
+            "updatedOn": "2024-01-01T00:00:00.000Z",
+        }
+
+    def make_event(self, i):
+        return {
+            "eventId": self.make_id(3, i),
+            "title": f"Synthetic meeting {i}",
+            "code": f"SYN-{i}",
+            "startDate": f"{2020 + i}-06-01T00:00:00Z",
+            "endDate": f"{2020 + i}-06-05T00:00:00Z",
+            "venueCountry": self.rng.choice(COUNTRIES).lower(),
+            "venueCity": "Synthville",
+            "dates": f"1-5 June {2020 + i}",
+        }
+
+    def make_participant(self, event, i):
+        org = (
+            self.organizations[i % len(self.organizations)]
+            if self.organizations
+            else {}
+        )
+        return {
+            "contactId": self.make_id(4, i),
+            "title": self.rng.choice(TITLES),
+            "firstName": f"First{i}",
+            "lastName": f"Last{i}",
+            "designation": "Delegate",
+            "department": "",
+            "phones": [f"+2{i:09d}"],
+            "mobiles": [],
+            "faxes": [],
+            "emails": [f"contact{i}@example.com"],
+            "emailCcs": [],
+            "notes": "##E\r\n##F",
+            "isUseOrganizationAddress": False,
+            "address": f"{i} Participant road",
+            "city": "Synthville",
+            "state": "",
+            "country": self.rng.choice(COUNTRIES).lower(),
+            "postalCode": "",
+            "organization": {
+                key: org[key]
+                for key in ("organizationId", "organizationTypeId", "name")
+                if key in org
+            },
+            "registrationStatuses": [
+                {
+                    "eventId": event["eventId"],
+                    "code": event["code"],
+                    "status": self.rng.choice([1, 2, 4]),
+                    "role": self.rng.choice([0, 1]),
+                    "date": event["startDate"],
+                    "isFunded": self.rng.random() < 0.3,
+                    "tags": self.rng.sample(TAGS, self.rng.randint(0, 2)),
+                }
+            ],
+            "createdOn": "2020-01-01T00:00:00.000Z",
+            "updatedOn": "2024-01-01T00:00:00.000Z",
+        }
+
+    @staticmethod
+    def page(records, limit, skip):
+        return {
+            "totalRecordCount": len(records),
+            "records": records[skip : skip + limit],
+        }
+
+    def get_response(self, request):
+        url = urlsplit(request.url)
+        path = url.path
+        query = parse_qs(url.query)
+        q = json.loads(query["q"][0]) if "q" in query else {}
+        body = json.loads(request.body) if request.body else {}
+
+        if path == LOGIN_PATH:
+            return 200, {"authenticationToken": "stand-in"}
+        if path == "/api/v2018/events":
+            return 200, self.page(self.events, q["limit"], q["skip"])
+        if path == "/api/v2018/contacts":
+            participants = self.participants.get(q["eventIds"][0], [])
+            return 200, self.page(participants, q["limit"], q["skip"])
+        if path == "/api/v2018/organizations/types":
+            return 200, self.org_types
+        if path == "/api/v2018/countries":
+            return 200, [{"code": code.lower()} for code in COUNTRIES]
+        if path == "/api/v2018/organizations/query":
+            if "eventIds" in body:
+                org_ids = {
+                    participant["organization"].get("organizationId")
+                    for participant in self.participants.get(body["eventIds"][0], [])
+                }
+                orgs = [
+                    org
+                    for org in self.organizations
+                    if org["organizationId"] in org_ids
+                ]
+            else:
+                type_ids = set(body.get("organizationTypeIds", []))
+                orgs = [
+                    org
+                    for org in self.organizations
+                    if org["organizationTypeId"] in type_ids
+                ]
+            return 200, self.page(orgs, body["limit"], body["skip"])
+        if path == "/api/v2018/event-participants":
+            return 200, {"records": []}
+        if path.startswith("/api/v2018/contacts/"):
+            contact_id, _, photo = path.removeprefix("/api/v2018/contacts/").partition(
+                "/"
+            )
+            if contact_id not in self.contacts:
+                return 404, {}
+            if photo:
+                return 200, {"contactId": contact_id, "src": PHOTO_SRC}
+            return 200, self.contacts[contact_id]
+        return 404, {}
+
+
+class RecordedKronos(KronosStandIn):
+    """Replay the responses saved by `KronosRecorder`."""
+
+    def __init__(self, path, latency=0.0):
+        super().__init__(latency=latency)
+        with Path(path).open() as f:
+            self.responses = json.load(f)
+
+    def get_response(self, request):
+        if urlsplit(request.url).path == LOGIN_PATH:
+            return 200, {"authenticationToken": "stand-in"}
+
+        try:
+            response = self.responses[get_request_key(request)]
+        except KeyError:
+            return 404, {}
+        return response["status_code"], response["data"]
+
+
+class KronosRecorder(HTTPAdapter):
+    """
+    Send requests to the real APIs, keeping all the responses so they can be
+    saved and replayed later with `RecordedKronos`. Logins are not recorded.
+    """
+
+    def __init__(self):
+        super().__init__(
+            pool_maxsize=settings.KRONOS_POOL_SIZE,
+            max_retries=kronos.create_retry(),
+        )
+        self.responses = {}
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        if urlsplit(request.url).path == LOGIN_PATH:
+            return resp
+
+        try:
+            data = resp.json()
+        except ValueError:
+            return resp
+
+        with self._lock:
+            self.responses[get_request_key(request)] = {
+                "status_code": resp.status_code,
+                "data": data,
+            }
+        return resp
+
+    def save(self, path):
+        with Path(path).open("w") as f:
+            json.dump(self.responses, f)
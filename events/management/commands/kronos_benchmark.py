@@ -0,0 +1,217 @@
+"""
+Benchmark the Kronos imports against a local Kronos stand-in.
+
+Runs the events, organizations, participants and contact photos imports in order,
+reporting the records/sec, number of queries and peak memory of each one. All
+changes are rolled back at the end, unless --keep is used.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.core.files.storage import InMemoryStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Contact, ImportContactPhotosTask, Organization
+from core.parsers import ContactPhotosParser
+from events.kronos_standin import (
+    KronosRecorder,
+    RecordedKronos,
+    SyntheticKronos,
+    install,
+)
+from events.models import (
+    Event,
+    LoadEventsFromKronosTask,
+    LoadOrganizationsFromKronosTask,
+    LoadParticipantsFromKronosTask,
+)
+from events.parsers import (
+    KronosEventsParser,
+    KronosOrganizationsParser,
+    KronosParticipantsParser,
+)
+
+
+class RollbackError(Exception):
+    pass
+
+
+@contextmanager
+def photo_storage(storage):
+    field = Contact._meta.get_field("photo")
+    previous, field.storage = field.storage, storage
+    try:
+        yield
+    finally:
+        field.storage = previous
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--events", type=int, default=2, help="Number of synthetic events."
+        )
+        parser.add_argument(
+            "--participants",
+            type=int,
+            default=500,
+            help="Number of synthetic participants per event.",
+        )
+        parser.add_argument(
+            "--organizations",
+            type=int,
+            default=200,
+            help="Number of synthetic organizations.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0,
+            help="Simulated latency of each Kronos request, in milliseconds.",
+        )
+        parser.add_argument(
+            "--photo-concurrency",
+            type=int,
+            default=4,
+            help="Number of photos downloaded at the same time.",
+        )
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument(
+            "--replay",
+            metavar="PATH",
+            help="Serve the Kronos responses recorded in this file.",
+        )
+        group.add_argument(
+            "--record",
+            metavar="PATH",
+            help=(
+                "Run against the real Kronos instead, and save all the responses "
+                "to this file, to be replayed later."
+            ),
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the imported data and photos, instead of rolling back.",
+        )
+
+    def handle(self, *args, **options):
+        if options["photo_concurrency"] < 1:
+            raise CommandError("--photo-concurrency must be at least 1")
+
+        latency = options["latency"] / 1000
+        if options["record"]:
+            adapter = KronosRecorder()
+        elif options["replay"]:
+            adapter = RecordedKronos(options["replay"], latency=latency)
+        else:
+            adapter = SyntheticKronos(
+                events_nr=options["events"],
+                participants_nr=options["participants"],
+                organizations_nr=options["organizations"],
+                seed=options["seed"],
+                latency=latency,
+            )
+
+        self.results = []
+        try:
+            with install(adapter), transaction.atomic():
+                if options["keep"]:
+                    self.run_benchmarks(options)
+                else:
+                    with photo_storage(InMemoryStorage()):
+                        self.run_benchmarks(options)
+                    raise RollbackError
+        except RollbackError:
+            pass
+        finally:
+            if options["record"]:
+                adapter.save(options["record"])
+
+        self.stdout.write(
+            f"{'import':<14}{'records':>10}{'seconds':>10}{'records/s':>12}"
+            f"{'queries':>10}{'peak MB':>10}"
+        )
+        for name, records, seconds, queries, peak in self.results:
+            self.stdout.write(
+                f"{name:<14}{records:>10}{seconds:>10.2f}"
+                f"{records / seconds if seconds else 0:>12.1f}"
+                f"{queries:>10}{peak / 1024 / 1024:>10.1f}"
+            )
+
+    def run_benchmarks(self, options):
+        self.benchmark("events", self.import_events, options)
+        self.benchmark("organizations", self.import_organizations, options)
+        self.benchmark("participants", self.import_participants, options)
+        self.benchmark("photos", self.import_photos, options)
+
+    def benchmark(self, name, func, options):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_queries):
+                records = func(options)
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.results.append((name, records, seconds, queries, peak))
+
+    def create_task(self, model, options, **kwargs):
+        task = model.objects.create(**kwargs)
+        # Task logs are only shown with -v 2 or higher
+        task.task_verbosity = options["verbosity"] if options["verbosity"] > 1 else 0
+        return task
+
+    def import_events(self, options):
+        task = self.create_task(LoadEventsFromKronosTask, options)
+        KronosEventsParser(task).parse_event_list()
+        return Event.objects.filter(event_id__isnull=False).count()
+
+    def import_organizations(self, options):
+        task = self.create_task(LoadOrganizationsFromKronosTask, options)
+        KronosOrganizationsParser(task).parse_organizations_list()
+        return Organization.objects.filter(organization_id__isnull=False).count()
+
+    def import_participants(self, options):
+        records = 0
+        for event in Event.objects.filter(event_id__isnull=False):
+            task = self.create_task(
+                LoadParticipantsFromKronosTask, options, event=event
+            )
+            KronosParticipantsParser(task).parse_contact_list()
+            records += (
+                task.contacts_nr
+                + task.conflicts_nr
+                + task.skipped_nr
+                + task.unchanged_nr
+            )
+        return records
+
+    def import_photos(self, options):
+        task = self.create_task(
+            ImportContactPhotosTask,
+            options,
+            concurrency=options["photo_concurrency"],
+        )
+        contacts = Contact.objects.exclude(contact_ids__isnull=True).exclude(
+            contact_ids=[]
+        )
+        processed, _ = ContactPhotosParser(task).import_photos(
+            contacts, concurrency=task.concurrency
+        )
+        return processed
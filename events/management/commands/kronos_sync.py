@@ -1,8 +1,13 @@
 """Script to run the kronos event load tasks from cmd line."""
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 from events.models import (
     Event,
@@ -10,11 +15,63 @@ from events.models import (
     LoadParticipantsFromKronosTask,
 )
 
+COUNTERS = (
+    "contacts_nr",
+    "registrations_nr",
+    "conflicts_nr",
+    "skipped_nr",
+    "unchanged_nr",
+)
+
+
+def parse_since(value):
+    date = parse_date(value)
+    if not date:
+        raise CommandError(f"Invalid date for --since: {value}")
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+def run_task(task):
+    try:
+        task.run(is_async=False)
+        task.refresh_from_db()
+        return task
+    finally:
+        # Each worker thread has its own database connection.
+        connections.close_all()
+
 
 class Command(BaseCommand):
     help = __doc__
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full-sync",
+            action="store_true",
+            help="Process all participants, even if unchanged since the last import.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of events to load participants for at the same time.",
+        )
+        parser.add_argument(
+            "--since",
+            nargs="?",
+            const="",
+            default=None,
+            metavar="YYYY-MM-DD",
+            help=(
+                "Only load participants for events that ended on or after this date. "
+                "Defaults to today if no date is given."
+            ),
+        )
+
     def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+
         self.stderr.write("Loading events")
         task = LoadEventsFromKronosTask.objects.create()
         task.run(is_async=False)
@@ -24,14 +81,38 @@ class Command(BaseCommand):
             self.stderr.write("Event load task failed!")
             sys.exit(1)
 
+        events = Event.objects.filter(event_id__isnull=False).order_by("start_date")
+        if options["since"] is not None:
+            since = options["since"]
+            since = parse_since(since) if since else timezone.now()
+            events = events.filter(end_date__gte=since)
+
         all_tasks = []
-        for event in Event.objects.filter(event_id__isnull=False):
+        for event in events:
             self.stderr.write("Loading participants for :%s" % event)
-            task = LoadParticipantsFromKronosTask.objects.create(event=event)
-            all_tasks.append(task)
-            task.run(is_async=False)
-            task.refresh_from_db()
+            all_tasks.append(
+                LoadParticipantsFromKronosTask.objects.create(
+                    event=event, full_sync=options["full_sync"]
+                )
+            )
+
+        if options["concurrency"] == 1:
+            for task in all_tasks:
+                task.run(is_async=False)
+                task.refresh_from_db()
+        else:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                all_tasks = list(executor.map(run_task, all_tasks))
+
+        for counter in COUNTERS:
+            total = sum(getattr(task, counter) for task in all_tasks)
+            self.stdout.write(f"{counter}: {total}")
 
-        if not all(task.status == "SUCCESS" for task in all_tasks):
+        if failed := [task for task in all_tasks if task.status != "SUCCESS"]:
+            for task in failed:
+                self.stderr.write(
+                    "Loading participants for %s failed: %s"
+                    % (task.event, task.failure_reason)
+                )
             self.stderr.write("Not ALL tasks completed successfully.")
             sys.exit(1)
@@ -3,6 +3,8 @@ Script to update event registrations fields (organization, designation,
 and department) using participant data from Kronos.
 """
 
+from itertools import chain
+
 from django.core.management.base import BaseCommand
 
 from core.models import Organization
@@ -22,7 +24,9 @@ class Command(BaseCommand):
         for event in events:
             updated_count = 0
             batch = []
-            for contact_dict in client.get_participants(event.event_id):
+            for contact_dict in chain.from_iterable(
+                client.iter_participants(event.event_id)
+            ):
                 contact_id = contact_dict["contactId"]
 
                 designation = contact_dict.get("designation", "")
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0029_registration_credentials_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loadparticipantsfromkronostask",
+            name="full_sync",
+            field=models.BooleanField(
+                default=False,
+                help_text="Process all participants, including the ones not changed in Kronos since the previous import.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="loadparticipantsfromkronostask",
+            name="unchanged_nr",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of participants not changed in Kronos since the previous import, that were not processed again.",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ParticipantImportState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("contact_id", models.CharField(max_length=24)),
+                ("content_hash", models.CharField(max_length=64)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="participant_import_states",
+                        to="events.event",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("event", "contact_id"),
+                        name="unique_event_participant_import_state",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -912,6 +912,21 @@ class LoadParticipantsFromKronosTask(TaskRQ):
         editable=False,
         help_text="Number of contacts with no changes that were ignored.",
     )
+    unchanged_nr = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=(
+            "Number of participants not changed in Kronos since the previous import, "
+            "that were not processed again."
+        ),
+    )
+    full_sync = models.BooleanField(
+        default=False,
+        help_text=(
+            "Process all participants, including the ones not changed in Kronos "
+            "since the previous import."
+        ),
+    )
 
     class Meta:
         get_latest_by = "created_on"
@@ -926,6 +941,31 @@ class LoadParticipantsFromKronosTask(TaskRQ):
         return LoadParticipantsFromKronos
 
 
+class ParticipantImportState(models.Model):
+    """
+    Content hash of each Kronos participant, as seen by the last import of the event.
+    Used to skip participants that have not changed since then.
+    """
+
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="participant_import_states"
+    )
+    contact_id = models.CharField(max_length=24)
+    content_hash = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "contact_id"],
+                name="unique_event_participant_import_state",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event.code} - {self.contact_id}"
+
+
 class LoadOrganizationsFromKronosTask(TaskRQ):
     """
     Task for loading Organizations not imported when Events were parsed.
@@ -1,32 +1,43 @@
+import hashlib
+import json
 import logging
 import re
+from collections import Counter, defaultdict
 from datetime import UTC, datetime
 from functools import cached_property
 
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, connection, transaction
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.encoding import smart_str
 
+from common.audit import bulk_audit_create, bulk_audit_update
 from common.parsing import (
     CONTACT_MAPPING,
     normalize_title,
     parse_list,
 )
+from core.jobs.duplicates import schedule_refresh_possible_duplicates
 from core.models import (
     Contact,
     Country,
     Organization,
     OrganizationType,
     ResolveConflict,
+    normalize_emails,
 )
 from events.kronos import KronosClient
 from events.models import (
     Event,
+    ParticipantImportState,
     PriorityPass,
     Registration,
     RegistrationRole,
     RegistrationTag,
 )
 
+BATCH_SIZE = 1000
+
 KRONOS_STATUS_MAP = {
     1: Registration.Status.NOMINATED,
     2: Registration.Status.ACCREDITED,
@@ -38,10 +49,63 @@ def check_is_different(obj, dictionary):
     return any(getattr(obj, key) != value for key, value in dictionary.items())
 
 
+class ContactEmailIndex:
+    """
+    Ids of the contacts using each email, in either `emails` or `email_ccs`, built
+    with a single query. Emails are case-insensitive.
+    """
+
+    def __init__(self, queryset):
+        self.index = defaultdict(set)
+        for pk, email_keys, email_cc_keys in queryset.values_list(
+            "pk", "email_keys", "email_cc_keys"
+        ).iterator(chunk_size=BATCH_SIZE):
+            for email in email_keys + email_cc_keys:
+                self.index[email].add(pk)
+
+    @classmethod
+    def for_emails(cls, emails):
+        """Only load the contacts using any of the given emails."""
+        keys = normalize_emails(emails)
+        return cls(
+            Contact.objects.filter(
+                Q(email_keys__overlap=keys) | Q(email_cc_keys__overlap=keys)
+            )
+        )
+
+    def get(self, emails):
+        """Get the ids of all the contacts using any of the given emails."""
+        return set().union(
+            *(self.index.get(key, ()) for key in normalize_emails(emails))
+        )
+
+
+def add_org_contacts(matches):
+    """
+    Add primary and secondary contacts to organizations in bulk, from a list of
+    (organization, is_primary, contact_id).
+    """
+    for is_primary, field in (
+        (True, Organization.primary_contacts),
+        (False, Organization.secondary_contacts),
+    ):
+        field.through.objects.bulk_create(
+            [
+                field.through(organization_id=org.pk, contact_id=contact_id)
+                for org, match_is_primary, contact_id in matches
+                if match_is_primary == is_primary
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
 class KronosParser:
     def __init__(self, task):
         self.task = task
         self.client = KronosClient()
+        self.cache_hits = Counter()
+        self.cache_misses = Counter()
 
     @cached_property
     def kronos_org_types(self):
@@ -50,6 +114,81 @@ class KronosParser:
             for org_type in self.client.get_org_types()
         }
 
+    @cached_property
+    def countries(self):
+        return {obj.code.upper(): obj for obj in Country.objects.all()}
+
+    @cached_property
+    def org_types(self):
+        return {
+            obj.organization_type_id: obj
+            for obj in OrganizationType.objects.filter(
+                organization_type_id__isnull=False
+            )
+        }
+
+    def get_cached(self, name, cache, key, create):
+        """
+        Get `key` from the run-scoped `cache`, calling `create` on a miss. Hits and
+        misses are counted under `name` and reported by `log_cache_stats`.
+        """
+        try:
+            obj = cache[key]
+        except KeyError:
+            self.cache_misses[name] += 1
+            obj = cache[key] = create()
+        else:
+            self.cache_hits[name] += 1
+        return obj
+
+    def log_cache_stats(self):
+        for name in sorted(self.cache_hits.keys() | self.cache_misses.keys()):
+            self.task.log(
+                logging.INFO,
+                "Cached %s lookups: %s hits, %s misses",
+                name,
+                self.cache_hits[name],
+                self.cache_misses[name],
+            )
+
+        stats = self.client.cache_stats
+        if any(stats.values()):
+            self.task.log(
+                logging.INFO,
+                "Kronos response cache: %s hits, %s revalidated, %s misses",
+                stats["hits"],
+                stats["revalidated"],
+                stats["misses"],
+            )
+
+    def create_or_get(self, model, lookup, defaults=None):
+        """
+        Create a new object, or get the existing one if another worker created it
+        while we were working.
+        """
+        obj = model(**lookup, **(defaults or {}))
+        obj.clean()
+        try:
+            with transaction.atomic():
+                obj.save(force_insert=True)
+        except IntegrityError:
+            # Race condition - another worker created it while we were working
+            self.task.log(
+                logging.INFO,
+                "%s %s created by another worker",
+                model._meta.verbose_name.capitalize(),
+                lookup,
+            )
+            return model.objects.get(**lookup)
+
+        self.task.log(
+            logging.INFO,
+            "Created %s: %r",
+            model._meta.verbose_name.capitalize(),
+            obj,
+        )
+        return obj
+
     def parse_date(self, value):
         try:
             return datetime.strptime(value, "%Y-%m-%d").astimezone(UTC).date()
@@ -64,45 +203,34 @@ class KronosParser:
             return None
 
         code = code.upper()
-        try:
-            return Country.objects.get(code=code)
-        except Country.DoesNotExist:
-            pass
-
-        self.task.log(logging.INFO, "Creating Country: %s", code)
-        return self._create_country(code)
+        return self.get_cached(
+            "country", self.countries, code, lambda: self._create_country(code)
+        )
 
     def _create_country(self, code):
-        with transaction.atomic():
-            try:
-                obj = Country(code=code)
-                obj.clean()
-                obj.save()
-                self.task.log(logging.INFO, "Created Country: %r", obj)
-                return obj
-            except IntegrityError:
-                # Race condition - another worker created it while we were working
-                self.task.log(
-                    logging.INFO, "Country %s created by another worker", code
-                )
-                return Country.objects.get(code=code)
+        self.task.log(logging.INFO, "Creating Country: %s", code)
+        return self.create_or_get(Country, {"code": code})
 
     def get_org_type(self, org_dict):
         org_type_id = org_dict["organizationTypeId"]
-        try:
-            return OrganizationType.objects.get(organization_type_id=org_type_id)
-        except OrganizationType.DoesNotExist:
-            pass
+        return self.get_cached(
+            "organization type",
+            self.org_types,
+            org_type_id,
+            lambda: self._create_org_type(org_type_id),
+        )
 
+    def _create_org_type(self, org_type_id):
         org_type = self.kronos_org_types[org_type_id]
-        obj = OrganizationType.objects.create(
-            organization_type_id=org_type_id,
-            acronym=org_type["acronym"].strip(),
-            title=org_type["title"].strip(),
-            description=org_type["description"].strip(),
+        return self.create_or_get(
+            OrganizationType,
+            {"organization_type_id": org_type_id},
+            {
+                "acronym": org_type["acronym"].strip(),
+                "title": org_type["title"].strip(),
+                "description": org_type["description"].strip(),
+            },
         )
-        self.task.log(logging.INFO, "Created Organization Type: %r", obj)
-        return obj
 
 
 class KronosEventsParser(KronosParser):
@@ -155,11 +283,29 @@ class KronosParticipantsParser(KronosParser):
     def __init__(self, task):
         super().__init__(task=task)
         self.event: Event = task.event
+        self.organizations = {}
+
+    @cached_property
+    def registration_roles(self):
+        return {obj.kronos_value: obj for obj in RegistrationRole.objects.all()}
+
+    @cached_property
+    def registration_tags(self):
+        # Tag names are case-insensitive
+        return {obj.name.lower(): obj for obj in RegistrationTag.objects.all()}
 
     def get_org(self, org_dict):
         if "organizationId" not in org_dict:
             return None
 
+        return self.get_cached(
+            "organization",
+            self.organizations,
+            org_dict["organizationId"],
+            lambda: self._get_or_create_org(org_dict),
+        )
+
+    def _get_or_create_org(self, org_dict):
         org_type = self.get_org_type(org_dict)
         if org_type.acronym.lower() == "gov":
             # GOV orgs have the invite "flag" manually included in notes in Kronos.
@@ -205,48 +351,94 @@ class KronosParticipantsParser(KronosParser):
 
         return obj
 
-    def get_priority_pass(self, code):
-        if not code:
-            return PriorityPass.objects.create()
-        return PriorityPass.objects.get_or_create(code=code)[0]
+    def get_priority_passes(self, codes):
+        """Get or create the priority passes for the given codes, in bulk."""
+        codes = set(codes)
+        passes = PriorityPass.objects.in_bulk(codes, field_name="code")
+        new_passes = [PriorityPass(code=code) for code in codes - passes.keys()]
+        PriorityPass.objects.bulk_create(new_passes, batch_size=BATCH_SIZE)
+        bulk_audit_create(new_passes)
+        passes.update((obj.code, obj) for obj in new_passes)
+        return passes
+
+    def get_registration_role(self, kronos_value):
+        return self.get_cached(
+            "registration role",
+            self.registration_roles,
+            kronos_value,
+            lambda: self.create_or_get(
+                RegistrationRole,
+                {"kronos_value": kronos_value},
+                {"name": str(kronos_value)},
+            ),
+        )
 
-    def create_registrations(self, contact_dict, contact):
-        for registration in contact_dict["registrationStatuses"]:
-            if registration is None:
+    def get_registration_tag(self, name):
+        return self.get_cached(
+            "registration tag",
+            self.registration_tags,
+            name.lower(),
+            lambda: self.create_or_get(RegistrationTag, {"name": name}),
+        )
+
+    def create_registrations(self, participants):
+        """
+        Create the registrations for a batch of (contact_dict, contact) pairs.
+
+        Existing registrations are kept as they are, but still get any new tags.
+        """
+        rows = [
+            (contact, registration)
+            for contact_dict, contact in participants
+            for registration in contact_dict["registrationStatuses"]
+            if registration is not None
+        ]
+        if not rows:
+            return
+
+        events = Event.objects.in_bulk(
+            {registration["eventId"] for _, registration in rows},
+            field_name="event_id",
+        )
+        existing_registrations = {
+            (obj.contact_id, obj.event_id): obj
+            for obj in Registration.objects.filter(
+                contact__in={contact.pk for contact, _ in rows},
+                event__in=events.values(),
+            ).only("id", "contact_id", "event_id")
+        }
+        registrations = []
+        new_registrations = []
+        for contact, registration in rows:
+            event = events.get(registration["eventId"])
+            if not event:
+                self.task.log(
+                    logging.WARNING,
+                    "Could not find event %s for registration of %r",
+                    registration["eventId"],
+                    contact,
+                )
                 continue
 
-            event = Event.objects.filter(event_id=registration["eventId"]).first()
-            role_kronos_enum = registration.get("role")
-            role = RegistrationRole.objects.get_or_create(
-                kronos_value=role_kronos_enum,
-                defaults={
-                    "name": role_kronos_enum,
-                },
-            )[0]
-
-            obj, created = Registration.objects.get_or_create(
-                contact=contact,
-                event=event,
-                defaults={
-                    "status": KRONOS_STATUS_MAP[registration["status"]],
-                    "role": role,
-                    "date": registration.get("date"),
-                    "is_funded": registration.get("isFunded"),
-                    "priority_pass": self.get_priority_pass(
-                        registration.get("priorityPassCode", "")
-                    ),
-                    "organization": contact.organization,
-                    "designation": contact.designation,
-                    "department": contact.department,
-                },
-            )
-            self.task.registrations_nr += created
+            obj = existing_registrations.get((contact.pk, event.pk))
+            if not obj:
+                obj = Registration(
+                    contact=contact,
+                    event=event,
+                    status=KRONOS_STATUS_MAP[registration["status"]],
+                    role=self.get_registration_role(registration.get("role")),
+                    date=registration.get("date"),
+                    is_funded=registration.get("isFunded"),
+                    organization=contact.organization,
+                    designation=contact.designation,
+                    department=contact.department,
+                )
+                existing_registrations[(contact.pk, event.pk)] = obj
+                new_registrations.append(
+                    (obj, registration.get("priorityPassCode", ""))
+                )
 
-            for tag in registration.get("tags", []):
-                tag = tag.strip()
-                if tag:
-                    tag = RegistrationTag.objects.get_or_create(name=tag)[0]
-                    obj.tags.add(tag)
+            registrations.append((obj, registration.get("tags", [])))
             self.task.log(
                 logging.INFO,
                 "Added meeting registration for %r event: %s",
@@ -254,43 +446,193 @@ class KronosParticipantsParser(KronosParser):
                 event,
             )
 
+        # Registrations without a code each get a new, randomly generated, pass
+        passes = self.get_priority_passes(code for _, code in new_registrations if code)
+        for obj, code in new_registrations:
+            obj.priority_pass = passes[code] if code else PriorityPass()
+        new_passes = [obj.priority_pass for obj, code in new_registrations if not code]
+        PriorityPass.objects.bulk_create(new_passes, batch_size=BATCH_SIZE)
+        bulk_audit_create(new_passes)
+
+        new_registrations = [obj for obj, _ in new_registrations]
+        Registration.objects.bulk_create(new_registrations, batch_size=BATCH_SIZE)
+        bulk_audit_create(new_registrations)
+        self.task.registrations_nr += len(new_registrations)
+
+        Registration.tags.through.objects.bulk_create(
+            [
+                Registration.tags.through(
+                    registration_id=obj.pk,
+                    registrationtag_id=self.get_registration_tag(tag.strip()).pk,
+                )
+                for obj, registration_tags in registrations
+                for tag in registration_tags
+                if tag.strip()
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
     def parse_contact_list(self):
         event_orgs = {
             org["organizationId"]: org
             for org in self.client.get_organizations_for_event(self.event.event_id)
         }
 
-        for contact_dict in self.client.get_participants(self.event.event_id):
-            # The organization dict in the contact dict is not complete, replace it
-            # the full version from the other API if available.
-            org_id = contact_dict.get("organization", {}).get("organizationId", None)
-            try:
-                contact_dict["organization"] = event_orgs[org_id]
-            except KeyError:
-                self.task.log(
-                    logging.WARNING,
-                    "Could not find full organization info for org: %s",
-                    org_id,
+        # Content hashes of the participants as seen by the previous import, unless
+        # a full sync was requested.
+        previous_hashes = {}
+        if not self.task.full_sync:
+            previous_hashes = dict(
+                self.event.participant_import_states.values_list(
+                    "contact_id", "content_hash"
                 )
+            )
+
+        # Participants are processed and committed one page at a time, so memory
+        # usage does not grow with the size of the event.
+        for page in self.client.iter_participants(self.event.event_id):
+            with transaction.atomic():
+                page = self._filter_unchanged(page, event_orgs, previous_hashes)
+                self._handle_participants(page, event_orgs)
+            self.task.save()
 
-            self._handle_contact(contact_dict)
+        self._add_org_contacts(event_orgs)
+        schedule_refresh_possible_duplicates()
 
-        # Handle M2M relationship for Org
-        for org_dict in event_orgs.values():
-            try:
-                org = Organization.objects.get(
-                    organization_id=org_dict["organizationId"]
+    def _add_org_contacts(self, event_orgs):
+        """
+        Add the contacts of each organization as its primary or secondary contacts,
+        based on the org's emails.
+        """
+        # Ignore if any contacts are not found, as they should be found whenever
+        # we parse the event they participated in. Otherwise, the email/email_ccs
+        # are still available in the org's fields.
+        orgs = Organization.objects.filter(organization_id__in=event_orgs.keys())
+        contact_orgs = dict(
+            Contact.objects.filter(organization__in=orgs).values_list(
+                "pk", "organization_id"
+            )
+        )
+        index = ContactEmailIndex(Contact.objects.filter(pk__in=contact_orgs.keys()))
+
+        matches = []
+        for org in orgs:
+            for is_primary, emails in ((True, org.emails), (False, org.email_ccs)):
+                matches.extend(
+                    (org, is_primary, contact_id)
+                    for contact_id in sorted(index.get(emails or []))
+                    if contact_orgs[contact_id] == org.pk
                 )
-            except Organization.DoesNotExist:
+        add_org_contacts(matches)
+
+    @staticmethod
+    def get_participant_hash(contact_dict, event_orgs):
+        """
+        Hash the participant data as received from Kronos, including the full info of
+        its organization.
+        """
+        org_id = contact_dict.get("organization", {}).get("organizationId", None)
+        data = [contact_dict, event_orgs.get(org_id)]
+        return hashlib.sha256(
+            json.dumps(data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def _filter_unchanged(self, contact_dicts, event_orgs, previous_hashes):
+        """
+        Drop the participants that have not changed in Kronos since the previous
+        import, and save the hashes of all the others for the next import.
+        """
+        changed = []
+        hashes = {}
+        for contact_dict in contact_dicts:
+            contact_id = contact_dict["contactId"]
+            content_hash = self.get_participant_hash(contact_dict, event_orgs)
+            if previous_hashes.get(contact_id) == content_hash:
+                self.task.unchanged_nr += 1
                 continue
 
-            # Ignore if any contacts are not found, as they should be found whenever
-            # we parse the event they participated in. Otherwise, the email/email_ccs
-            # are still available in the org's fields.
-            org.primary_contacts.add(*org.filter_contacts_by_emails(org.emails))
-            org.secondary_contacts.add(*org.filter_contacts_by_emails(org.email_ccs))
+            changed.append(contact_dict)
+            hashes[contact_id] = content_hash
+
+        ParticipantImportState.objects.bulk_create(
+            [
+                ParticipantImportState(
+                    event=self.event, contact_id=contact_id, content_hash=content_hash
+                )
+                for contact_id, content_hash in hashes.items()
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["event", "contact_id"],
+            update_fields=["content_hash", "updated_at"],
+        )
+        return changed
+
+    def _handle_participants(self, contact_dicts, event_orgs):
+        """
+        Import a batch of participants.
+
+        Existing contacts for the whole batch are loaded with a single query and
+        compared in memory, all new records are then written in bulk.
+        """
+        rows = [
+            self._parse_participant(contact_dict, event_orgs)
+            for contact_dict in contact_dicts
+        ]
+        self._lock_contact_ids([contact_id for _, contact_id, _ in rows])
+        contacts = self._get_existing_contacts(
+            [contact_id for _, contact_id, _ in rows]
+        )
+        # Fingerprints of the pending conflicts of each contact, keyed by the id() of
+        # the contact object, as new contacts don't have a pk yet.
+        conflicts = self._get_conflict_fingerprints(
+            contacts.values(), [defaults["fingerprint"] for _, _, defaults in rows]
+        )
+
+        new_contacts = []
+        new_conflicts = []
+        participants = []
+        for contact_dict, contact_id, contact_defaults in rows:
+            contact = contacts.get(contact_id)
+            if contact:
+                conflict = self._handle_conflict(
+                    contact, contact_id, contact_defaults, conflicts
+                )
+                if conflict:
+                    conflicts.add((id(contact), conflict.fingerprint))
+                    new_conflicts.append(conflict)
+            else:
+                contact = self._create_contact(contact_id, contact_defaults)
+                contacts[contact_id] = contact
+                new_contacts.append(contact)
+            participants.append((contact_dict, contact))
+
+        Contact.objects.bulk_create(new_contacts, batch_size=BATCH_SIZE)
+        bulk_audit_create(new_contacts)
+        for contact in new_contacts:
+            self.task.log(
+                logging.INFO, "Created contact %s: %s", contact, contact.contact_ids[0]
+            )
+
+        ResolveConflict.objects.bulk_create(new_conflicts, batch_size=BATCH_SIZE)
+        bulk_audit_create(new_conflicts)
+
+        self.create_registrations(participants)
+
+    def _parse_participant(self, contact_dict, event_orgs):
+        # The organization dict in the contact dict is not complete, replace it
+        # the full version from the other API if available.
+        org_id = contact_dict.get("organization", {}).get("organizationId", None)
+        try:
+            contact_dict["organization"] = event_orgs[org_id]
+        except KeyError:
+            self.task.log(
+                logging.WARNING,
+                "Could not find full organization info for org: %s",
+                org_id,
+            )
 
-    def _handle_contact(self, contact_dict):
         contact_id = contact_dict["contactId"]
         contact_dict["dateOfBirth"] = self.parse_date(contact_dict.get("dateOfBirth"))
         contact_dict["country"] = self.get_country(contact_dict.get("country"))
@@ -312,29 +654,85 @@ class KronosParticipantsParser(KronosParser):
         english_title, localized_title = normalize_title(raw_title)
         contact_defaults["title"] = english_title
         contact_defaults["title_localized"] = localized_title
+        contact_defaults["fingerprint"] = Contact.get_fingerprint(contact_defaults)
+
+        return contact_dict, contact_id, contact_defaults
+
+    @staticmethod
+    def _lock_contact_ids(contact_ids):
+        """
+        Lock the Kronos ids until the end of the transaction, so imports of other
+        events running at the same time don't create the same contacts.
+
+        Locks are taken in a fixed order to avoid deadlocks between imports.
+        """
+        keys = sorted(
+            {
+                int.from_bytes(
+                    hashlib.sha256(contact_id.encode()).digest()[:8], signed=True
+                )
+                for contact_id in contact_ids
+            }
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(key) "
+                "FROM (SELECT unnest(%s::bigint[]) AS key ORDER BY key) AS keys",
+                [keys],
+            )
 
-        contact = (
-            Contact.objects.filter(contact_ids__contains=[contact_id])
-            .prefetch_related("conflicting_contacts")
-            .first()
+    @staticmethod
+    def _get_existing_contacts(contact_ids):
+        """
+        Map each Kronos id to the (oldest) contact that contains it, using a
+        single `contact_ids && ARRAY[...]` query.
+        """
+        contacts = {}
+        queryset = (
+            Contact.objects.filter(contact_ids__overlap=contact_ids)
+            .select_related("organization", "country")
+            .order_by("pk")
         )
-        if contact:
-            self._handle_conflict(contact, contact_id, contact_defaults)
-        else:
-            contact = self._create_contact(contact_id, contact_defaults)
-        self.create_registrations(contact_dict, contact)
+        for contact in queryset:
+            for contact_id in contact.contact_ids:
+                contacts.setdefault(contact_id, contact)
+        return contacts
 
-    def _handle_conflict(self, contact, contact_id, contact_defaults):
-        if not check_is_different(contact, contact_defaults):
+    @staticmethod
+    def _get_conflict_fingerprints(contacts, fingerprints):
+        """
+        Return the (id(contact), fingerprint) pairs of the pending conflicts matching
+        any of the imported fingerprints, using a single indexed query.
+        """
+        contacts = {contact.pk: contact for contact in contacts}
+        queryset = ResolveConflict.objects.filter(
+            existing_contact__in=contacts, fingerprint__in=set(fingerprints)
+        ).values_list("existing_contact_id", "fingerprint")
+        return {(id(contacts[pk]), fingerprint) for pk, fingerprint in queryset}
+
+    def _handle_conflict(self, contact, contact_id, contact_defaults, conflicts):
+        fingerprint = contact_defaults["fingerprint"]
+        # The stored fingerprint is stale if the contact was changed without
+        # `save()`, e.g. when its organization was deleted, so don't trust it.
+        contact.update_fingerprint()
+        # Languages are only imported when present in the notes, so contacts with
+        # different fingerprints might still have the same imported values.
+        fields = {
+            key: value
+            for key, value in contact_defaults.items()
+            if key != "fingerprint"
+        }
+        if contact.fingerprint == fingerprint or not check_is_different(
+            contact, fields
+        ):
             # The imported contact is identical to the one in the database currently
             self._skip_contact(contact, contact_id)
             return None
 
-        for existing_conflict in contact.conflicting_contacts.all():
-            if not check_is_different(existing_conflict, contact_defaults):
-                # We found an identical conflict already in the database
-                self._skip_contact(contact, contact_id)
-                return None
+        if (id(contact), fingerprint) in conflicts:
+            # We found an identical conflict already in the database
+            self._skip_contact(contact, contact_id)
+            return None
 
         return self._create_conflict(contact, contact_id, contact_defaults)
 
@@ -347,9 +745,7 @@ class KronosParticipantsParser(KronosParser):
             contact,
         )
         self.task.conflicts_nr += 1
-        return ResolveConflict.objects.create(
-            existing_contact=contact, **contact_defaults
-        )
+        return ResolveConflict(existing_contact=contact, **contact_defaults)
 
     def _skip_contact(self, contact, contact_id):
         self.task.log(
@@ -361,10 +757,8 @@ class KronosParticipantsParser(KronosParser):
         self.task.skipped_nr += 1
 
     def _create_contact(self, contact_id, contact_defaults):
-        contact = Contact.objects.create(contact_ids=[contact_id], **contact_defaults)
         self.task.contacts_nr += 1
-        self.task.log(logging.INFO, "Created contact %s: %s", contact, contact_id)
-        return contact
+        return Contact(contact_ids=[contact_id], **contact_defaults)
 
     @classmethod
     def get_languages(cls, note_field: str | None) -> dict:
@@ -399,80 +793,124 @@ class KronosOrganizationsParser(KronosParser):
         super().__init__(task=task)
 
     def parse_organizations_list(self):
-        existing_ids = Organization.objects.values_list("organization_id", flat=True)
-        for org_dict in self.client.get_all_organizations():
-            if org_dict.get("organizationId") in existing_ids:
-                continue
+        existing_ids = set(
+            Organization.objects.values_list("organization_id", flat=True)
+        )
+        # Organizations are processed and committed one page at a time, so memory
+        # usage does not grow with the number of organizations in Kronos.
+        for page in self.client.iter_all_organizations():
+            with transaction.atomic():
+                new_orgs = []
+                for org_dict in page:
+                    if org_dict.get("organizationId") in existing_ids:
+                        continue
+                    organization, created = self._handle_organization(org_dict)
+                    if created:
+                        new_orgs.append(organization)
+                self._associate_contacts(new_orgs)
+            self.task.save()
 
-            org_type = self.get_org_type(org_dict)
-            # TODO: is this actually OK?
-            include_in_invitation = "#invite" in org_dict.get("notes", "")
+    def _handle_organization(self, org_dict):
+        org_type = self.get_org_type(org_dict)
+        # TODO: is this actually OK?
+        include_in_invitation = "#invite" in org_dict.get("notes", "")
 
-            organization, created = Organization.objects.get_or_create(
-                organization_id=org_dict["organizationId"],
-                defaults={
-                    "name": org_dict.get("name", "").strip(),
-                    "acronym": org_dict.get("acronym", "").strip(),
-                    "organization_type": org_type,
-                    "government": self.get_country(org_dict.get("government")),
-                    "country": self.get_country(org_dict.get("country")),
-                    "state": org_dict.get("state", "").strip(),
-                    "city": org_dict.get("city", "").strip(),
-                    "postal_code": org_dict.get("postalCode", "").strip(),
-                    "address": org_dict.get("address", "").strip(),
-                    "phones": org_dict.get("phones", []),
-                    "faxes": org_dict.get("faxes", []),
-                    "websites": org_dict.get("webs", []),
-                    "emails": parse_list(org_dict.get("emails", [])),
-                    "email_ccs": parse_list(org_dict.get("emailCcs", [])),
-                    "include_in_invitation": include_in_invitation,
-                },
+        organization, created = Organization.objects.get_or_create(
+            organization_id=org_dict["organizationId"],
+            defaults={
+                "name": org_dict.get("name", "").strip(),
+                "acronym": org_dict.get("acronym", "").strip(),
+                "organization_type": org_type,
+                "government": self.get_country(org_dict.get("government")),
+                "country": self.get_country(org_dict.get("country")),
+                "state": org_dict.get("state", "").strip(),
+                "city": org_dict.get("city", "").strip(),
+                "postal_code": org_dict.get("postalCode", "").strip(),
+                "address": org_dict.get("address", "").strip(),
+                "phones": org_dict.get("phones", []),
+                "faxes": org_dict.get("faxes", []),
+                "websites": org_dict.get("webs", []),
+                "emails": parse_list(org_dict.get("emails", [])),
+                "email_ccs": parse_list(org_dict.get("emailCcs", [])),
+                "include_in_invitation": include_in_invitation,
+            },
+        )
+        if created:
+            self.task.log(logging.INFO, "Created Organization: %r", organization)
+            self.task.organizations_nr += 1
+        return organization, created
+
+    def _associate_contacts(self, organizations):
+        """
+        Find and associate primary & secondary contacts by email, for a batch of
+        newly created organizations.
+        """
+        index = ContactEmailIndex.for_emails(
+            [
+                email
+                for organization in organizations
+                for email in (organization.emails or [])
+                + (organization.email_ccs or [])
+            ]
+        )
+        candidates = []
+        for organization in organizations:
+            primaries = index.get(organization.emails or [])
+            secondaries = index.get(organization.email_ccs or [])
+            candidates.extend(
+                (organization, True, contact_id) for contact_id in sorted(primaries)
             )
-            if created:
-                self.task.log(logging.INFO, "Created Organization: %r", organization)
-                self.task.organizations_nr += 1
+            candidates.extend(
+                (organization, False, contact_id)
+                # Avoiding duplicates between secondaries & primaries
+                for contact_id in sorted(secondaries - primaries)
+            )
+        if not candidates:
+            return
 
-                # Find and associate primary & secondary contacts by email
-                matching_primaries = Contact.objects.filter(
-                    Q(emails__overlap=organization.emails)
-                    | Q(email_ccs__overlap=organization.emails)
-                )
-                matching_secondaries = Contact.objects.filter(
-                    Q(emails__overlap=organization.email_ccs)
-                    | Q(email_ccs__overlap=organization.email_ccs)
+        contacts = Contact.objects.select_related("organization").in_bulk(
+            {contact_id for _, _, contact_id in candidates}
+        )
+        matches = []
+        new_members = defaultdict(list)
+        for organization, is_primary, contact_id in candidates:
+            contact = contacts[contact_id]
+            if contact.organization and contact.organization != organization:
+                self.task.log(
+                    logging.WARNING,
+                    "Contact %r already belongs to %r, skipping association with %r",
+                    contact,
+                    contact.organization,
+                    organization,
                 )
-                matching_contacts = [
-                    (True, contact) for contact in matching_primaries
-                ] + [
-                    (False, contact)
-                    for contact in matching_secondaries
-                    # Avoiding duplicates between secondaries & primaries
-                    if contact not in matching_primaries
-                ]
-                for is_primary, contact in matching_contacts:
-                    if contact.organization and contact.organization != organization:
-                        self.task.log(
-                            logging.WARNING,
-                            "Contact %r already belongs to %r, skipping association with %r",
-                            contact,
-                            contact.organization,
-                            organization,
-                        )
-                        self.task.skipped_contacts_nr += 1
-                        continue
+                self.task.skipped_contacts_nr += 1
+                continue
 
-                    if not contact.organization:
-                        contact.organization = organization
-                        contact.save()
-                        self.task.log(
-                            logging.INFO,
-                            "Associated contact %r with organization %r %s",
-                            contact,
-                            organization,
-                            "as primary" if is_primary else "as secondary",
-                        )
-                    if is_primary:
-                        organization.primary_contacts.add(contact)
-                    else:
-                        organization.secondary_contacts.add(contact)
-                    self.task.contacts_nr += 1
+            if not contact.organization:
+                contact.organization = organization
+                new_members[organization].append(contact)
+                self.task.log(
+                    logging.INFO,
+                    "Associated contact %r with organization %r %s",
+                    contact,
+                    organization,
+                    "as primary" if is_primary else "as secondary",
+                )
+            matches.append((organization, is_primary, contact_id))
+            self.task.contacts_nr += 1
+
+        updated = [contact for members in new_members.values() for contact in members]
+        now = timezone.now()
+        for contact in updated:
+            contact.updated_at = now
+            contact.update_fingerprint()
+        Contact.objects.bulk_update(
+            updated,
+            ["organization", "updated_at", "fingerprint"],
+            batch_size=BATCH_SIZE,
+        )
+        for organization, members in new_members.items():
+            bulk_audit_update(
+                members, {"organization": ["None", smart_str(organization)]}
+            )
+        add_org_contacts(matches)
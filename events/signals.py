@@ -1,10 +1,65 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
-from events.models import DSA
+from core.models import Contact, Organization, ResolveConflict
+from events.models import DSA, ParticipantImportState, Registration
 
 
 @receiver(pre_save, sender=DSA)
 def generate_pdf_fields(sender, instance: DSA, **kwargs):
     for field in ("passport", "boarding_pass", "signature"):
         instance.generate_pdf(field)
+
+
+def forget_participants(contact_ids, event=None):
+    """
+    Drop the import states of the given Kronos participants, so the next import
+    compares them against the local data again instead of skipping them.
+    """
+    if not contact_ids:
+        return
+    queryset = ParticipantImportState.objects.filter(contact_id__in=contact_ids)
+    if event is not None:
+        queryset = queryset.filter(event=event)
+    queryset.delete()
+
+
+@receiver(post_save, sender=Contact)
+@receiver(post_delete, sender=Contact)
+def forget_contact(sender, instance: Contact, **kwargs):
+    # Covers local edits, merges (the main contact is saved with all the ids, the
+    # others deleted) and deletes.
+    forget_participants(instance.contact_ids)
+
+
+@receiver(post_delete, sender=Registration)
+def forget_registration(sender, instance: Registration, **kwargs):
+    contact_ids = (
+        Contact.objects.filter(pk=instance.contact_id)
+        .values_list("contact_ids", flat=True)
+        .first()
+    )
+    forget_participants(contact_ids, event=instance.event_id)
+
+
+@receiver(post_delete, sender=ResolveConflict)
+def forget_conflict(sender, instance: ResolveConflict, **kwargs):
+    # The conflict was resolved or dismissed, check the participant again.
+    contact_ids = (
+        Contact.objects.filter(pk=instance.existing_contact_id)
+        .values_list("contact_ids", flat=True)
+        .first()
+    )
+    forget_participants(contact_ids)
+
+
+@receiver(pre_delete, sender=Organization)
+def forget_organization(sender, instance: Organization, **kwargs):
+    # The organization of its contacts is about to be cleared without saving them.
+    forget_participants(
+        [
+            contact_id
+            for contact_ids in instance.contacts.values_list("contact_ids", flat=True)
+            for contact_id in contact_ids or []
+        ]
+    )
@@ -52,8 +52,8 @@ class TestImportOrganizations(TestCase):
 
         self.mock_data = [self.fake_org]
         self.mock_client = patch("events.parsers.KronosClient").start()
-        self.mock_client.return_value.get_all_organizations.side_effect = (
-            lambda *args: deepcopy(self.mock_data)
+        self.mock_client.return_value.iter_all_organizations.side_effect = (
+            lambda *args: [deepcopy(self.mock_data)]
         )
 
     def tearDown(self):
@@ -164,3 +164,29 @@ class TestImportOrganizations(TestCase):
         self.assertEqual(organization.secondary_contacts.count(), 1)
         self.assertEqual(organization.secondary_contacts.first(), contact)
         self.assertEqual(contact.organization, organization)
+
+    def test_contact_matching_several_organizations(self):
+        other_org = deepcopy(self.fake_org)
+        other_org["organizationId"] = "22222222222"
+        other_org["name"] = "The Other Society"
+        self.mock_data.append(other_org)
+        contact = Contact.objects.create(
+            organization=None,
+            first_name="Zephyr",
+            last_name="Moonweaver",
+            emails=["Zephyr.M@example.com"],
+        )
+
+        task = LoadOrganizationsFromKronosTask.objects.create()
+        task.run(is_async=False)
+        task.refresh_from_db()
+
+        # The contact is only associated with the first organization
+        contact.refresh_from_db()
+        organization = Organization.objects.get(organization_id="11111111111")
+        self.assertEqual(contact.organization, organization)
+        self.assertEqual(list(organization.primary_contacts.all()), [contact])
+        self.assertEqual(contact.primary_for_orgs.count(), 1)
+        self.assertEqual(task.organizations_nr, 2)
+        self.assertEqual(task.contacts_nr, 1)
+        self.assertEqual(task.skipped_contacts_nr, 1)
@@ -1,9 +1,13 @@
+import threading
 from copy import deepcopy
+from io import StringIO
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
 from django.utils import timezone
 
+from core.merge import merge_contacts
 from core.models import (
     BaseContact,
     Contact,
@@ -11,10 +15,17 @@ from core.models import (
     OrganizationType,
     ResolveConflict,
 )
-from events.models import Event, LoadParticipantsFromKronosTask
+from events.models import (
+    Event,
+    LoadParticipantsFromKronosTask,
+    ParticipantImportState,
+    Registration,
+    RegistrationTag,
+)
+from events.parsers import KronosParticipantsParser
 
 
-class TestImportEvents(TestCase):
+class ImportParticipantsMixin:
     fixtures = [
         "initial/region",
         "initial/subregion",
@@ -121,9 +132,9 @@ class TestImportEvents(TestCase):
 
         self.mock_data = [self.fake_item]
         self.mock_client = patch("events.parsers.KronosClient").start()
-        self.mock_client.return_value.get_participants.side_effect = (
-            lambda *args: deepcopy(self.mock_data)
-        )
+        self.mock_client.return_value.iter_participants.side_effect = lambda *args: [
+            deepcopy(self.mock_data)
+        ]
 
         self.mock_client.return_value.get_organizations_for_event.side_effect = (
             lambda *args: [self.fake_org]
@@ -132,11 +143,16 @@ class TestImportEvents(TestCase):
     def tearDown(self):
         patch.stopall()
 
-    def load_participants(self):
-        LoadParticipantsFromKronosTask.objects.create(event=self.event).run(
-            is_async=False
+    def load_participants(self, full_sync=False):
+        task = LoadParticipantsFromKronosTask.objects.create(
+            event=self.event, full_sync=full_sync
         )
+        task.run(is_async=False)
+        task.refresh_from_db()
+        return task
+
 
+class TestImportEvents(ImportParticipantsMixin, TestCase):
     def test_load_participant(self):
         self.load_participants()
 
@@ -215,8 +231,10 @@ class TestImportEvents(TestCase):
         # Change something in the contact
         self.assertEqual(Contact.objects.count(), 1)
         contact = Contact.objects.first()
+        fingerprint = contact.fingerprint
         contact.title = BaseContact.Title.MR
         contact.save()
+        self.assertNotEqual(contact.fingerprint, fingerprint)
 
         # Load again
         self.load_participants()
@@ -226,8 +244,255 @@ class TestImportEvents(TestCase):
         conflict = ResolveConflict.objects.first()
         self.assertEqual(conflict.existing_contact, contact)
         self.assertEqual(conflict.title, BaseContact.Title.MS)
+        self.assertNotEqual(conflict.fingerprint, contact.fingerprint)
 
         # Load again to check a duplicate conflict is NOT created
         self.load_participants()
         self.assertEqual(Contact.objects.count(), 1)
         self.assertEqual(ResolveConflict.objects.count(), 1)
+
+    def test_load_participant_conflict_stale_fingerprint(self):
+        self.load_participants()
+
+        # Changed without updating the fingerprint
+        Contact.objects.update(title=BaseContact.Title.MR)
+
+        task = self.load_participants(full_sync=True)
+        self.assertEqual(task.conflicts_nr, 1)
+        conflict = ResolveConflict.objects.get()
+        self.assertEqual(conflict.title, BaseContact.Title.MS)
+
+    def test_load_participants_multiple_pages(self):
+        second_item = deepcopy(self.fake_item)
+        second_item["contactId"] = "88888888888888"
+        second_item["firstName"] = "Cumulus"
+        self.mock_client.return_value.iter_participants.side_effect = lambda *args: [
+            [deepcopy(self.fake_item)],
+            [second_item],
+        ]
+
+        task = LoadParticipantsFromKronosTask.objects.create(event=self.event)
+        task.run(is_async=False)
+        task.refresh_from_db()
+
+        self.assertEqual(Contact.objects.count(), 2)
+        self.assertEqual(task.contacts_nr, 2)
+        self.assertEqual(task.registrations_nr, 2)
+
+    def test_load_participants_batch(self):
+        self.load_participants()
+
+        new_item = deepcopy(self.fake_item)
+        new_item["contactId"] = "77777777777777"
+        new_item["firstName"] = "Stratus"
+        new_item["registrationStatuses"][0] |= {
+            "priorityPassCode": "PASS123",
+            "tags": ["Speaker", " speaker ", "Media"],
+        }
+        changed_item = deepcopy(new_item)
+        changed_item["firstName"] = "Altostratus"
+        self.mock_client.return_value.iter_participants.side_effect = lambda *args: [
+            [deepcopy(self.fake_item), new_item, deepcopy(new_item), changed_item]
+        ]
+
+        task = LoadParticipantsFromKronosTask.objects.create(event=self.event)
+        task.run(is_async=False)
+        task.refresh_from_db()
+
+        self.assertEqual(task.contacts_nr, 1)
+        self.assertEqual(task.unchanged_nr, 1)
+        self.assertEqual(task.skipped_nr, 1)
+        self.assertEqual(task.conflicts_nr, 1)
+        self.assertEqual(task.registrations_nr, 1)
+
+        contact = Contact.objects.get(contact_ids=["77777777777777"])
+        self.assertEqual(contact.first_name, "Stratus")
+        conflict = ResolveConflict.objects.get()
+        self.assertEqual(conflict.existing_contact, contact)
+        self.assertEqual(conflict.first_name, "Altostratus")
+
+        registration = contact.registrations.get()
+        self.assertEqual(registration.priority_pass.code, "PASS123")
+        self.assertEqual(
+            sorted(tag.name for tag in registration.tags.all()), ["Media", "Speaker"]
+        )
+
+    def test_load_participants_cached_lookups(self):
+        items = []
+        for i in range(3):
+            item = deepcopy(self.fake_item)
+            item["contactId"] = f"6666666666666{i}"
+            item["registrationStatuses"][0]["tags"] = ["Brand new tag"]
+            items.append(item)
+        self.mock_client.return_value.iter_participants.side_effect = lambda *args: [
+            items
+        ]
+
+        task = LoadParticipantsFromKronosTask.objects.create(event=self.event)
+        task.run(is_async=False)
+        task.refresh_from_db()
+
+        self.assertEqual(task.contacts_nr, 3)
+        self.assertEqual(Organization.objects.count(), 1)
+        self.assertEqual(
+            RegistrationTag.objects.filter(name="Brand new tag").count(), 1
+        )
+        self.assertIn("Cached organization lookups: 2 hits, 1 misses", task.log_text)
+        self.assertIn(
+            "Cached registration tag lookups: 2 hits, 1 misses", task.log_text
+        )
+
+    def test_load_participants_changed_since_last_import(self):
+        task = self.load_participants()
+        self.assertEqual(task.contacts_nr, 1)
+        self.assertEqual(task.unchanged_nr, 0)
+
+        task = self.load_participants()
+        self.assertEqual(task.unchanged_nr, 1)
+        self.assertEqual(task.skipped_nr, 0)
+
+        # Changes to the participant's organization are detected as well
+        self.fake_org["address"] = "another real place"
+        task = self.load_participants()
+        self.assertEqual(task.unchanged_nr, 0)
+        self.assertEqual(task.skipped_nr, 1)
+
+        self.fake_item["firstName"] = "Cirrus"
+        task = self.load_participants()
+        self.assertEqual(task.unchanged_nr, 0)
+        self.assertEqual(task.conflicts_nr, 1)
+        self.assertEqual(
+            ParticipantImportState.objects.get(event=self.event).content_hash,
+            KronosParticipantsParser.get_participant_hash(
+                self.fake_item, {self.fake_org["organizationId"]: self.fake_org}
+            ),
+        )
+
+    def test_load_participants_deleted_registration(self):
+        self.load_participants()
+        Registration.objects.get().delete()
+
+        task = self.load_participants()
+        self.assertEqual(task.unchanged_nr, 0)
+        self.assertEqual(task.registrations_nr, 1)
+        self.assertEqual(Registration.objects.count(), 1)
+
+    def test_load_participants_deleted_contact(self):
+        self.load_participants()
+        Contact.objects.get().delete()
+
+        task = self.load_participants()
+        self.assertEqual(task.unchanged_nr, 0)
+        self.assertEqual(task.contacts_nr, 1)
+        self.assertEqual(Contact.objects.count(), 1)
+
+    def test_load_participants_merged_contact(self):
+        self.load_participants()
+        contact = Contact.objects.get()
+        other = Contact.objects.create(contact_ids=["999"])
+        merge_contacts(other, [contact])
+
+        # The participant is compared against the merged contact again
+        task = self.load_participants()
+        self.assertEqual(task.unchanged_nr, 0)
+        self.assertEqual(task.conflicts_nr, 1)
+        self.assertEqual(task.registrations_nr, 0)
+        self.assertEqual(other.registrations.count(), 1)
+
+    def test_load_participants_dismissed_conflict(self):
+        self.load_participants()
+        contact = Contact.objects.get()
+        contact.title = BaseContact.Title.MR
+        contact.save()
+        self.load_participants()
+        ResolveConflict.objects.get().delete()
+
+        task = self.load_participants()
+        self.assertEqual(task.unchanged_nr, 0)
+        self.assertEqual(task.conflicts_nr, 1)
+
+    def test_kronos_sync_command(self):
+        self.mock_client.return_value.get_meetings.return_value = []
+        future_event = Event.objects.create(
+            event_id="def",
+            title="Quantum Quest II",
+            code="QQ:II",
+            start_date=timezone.now(),
+            end_date=timezone.now() + timezone.timedelta(days=5),
+            dates="Soon",
+        )
+
+        out = StringIO()
+        call_command("kronos_sync", "--since", stdout=out, stderr=StringIO())
+
+        task = LoadParticipantsFromKronosTask.objects.get()
+        self.assertEqual(task.event, future_event)
+        self.assertEqual(task.status, "SUCCESS")
+        self.assertIn("contacts_nr: 1", out.getvalue())
+        self.assertIn("registrations_nr: 1", out.getvalue())
+
+    def test_kronos_sync_command_failure(self):
+        self.mock_client.return_value.get_meetings.return_value = []
+        self.mock_client.return_value.iter_participants.side_effect = Exception("Boom")
+
+        err = StringIO()
+        with self.assertRaises(SystemExit):
+            call_command(
+                "kronos_sync", "--concurrency", "1", stdout=StringIO(), stderr=err
+            )
+
+        self.assertEqual(LoadParticipantsFromKronosTask.objects.get().status, "FAILURE")
+        self.assertIn("Boom", err.getvalue())
+
+
+class TestKronosSyncConcurrency(ImportParticipantsMixin, TransactionTestCase):
+    def test_kronos_sync_concurrency(self):
+        self.mock_client.return_value.get_meetings.return_value = []
+        other_event = Event.objects.create(
+            event_id="def",
+            title="Quantum Quest II",
+            code="QQ:II",
+            start_date="2010-08-1T00:00:00Z",
+            end_date="2010-08-10T00:00:00Z",
+            dates="1-10 August 2010",
+        )
+
+        def make_participant(contact_id, event_ids):
+            item = deepcopy(self.fake_item)
+            item["contactId"] = contact_id
+            item["emails"] = [f"{contact_id}@example.com"]
+            item["registrationStatuses"] = [
+                dict(item["registrationStatuses"][0], eventId=event_id)
+                for event_id in event_ids
+            ]
+            return item
+
+        shared = make_participant("shared", ["abc", "def"])
+        participants = {
+            "abc": [shared, make_participant("first", ["abc"])],
+            "def": [shared, make_participant("second", ["def"])],
+        }
+        # Both imports read their participants at the same time
+        barrier = threading.Barrier(2, timeout=30)
+
+        def iter_participants(event_id):
+            barrier.wait()
+            return [deepcopy(participants[event_id])]
+
+        self.mock_client.return_value.iter_participants.side_effect = iter_participants
+
+        out = StringIO()
+        call_command("kronos_sync", "--concurrency", "2", stdout=out, stderr=StringIO())
+
+        tasks = LoadParticipantsFromKronosTask.objects.all()
+        self.assertEqual({task.event for task in tasks}, {self.event, other_event})
+        self.assertEqual({task.status for task in tasks}, {"SUCCESS"})
+        self.assertEqual(Contact.objects.count(), 3)
+        self.assertEqual(
+            Contact.objects.get(contact_ids=["shared"]).registrations.count(), 2
+        )
+        self.assertEqual(Organization.objects.count(), 1)
+        self.assertEqual(sum(task.contacts_nr for task in tasks), 3)
+        self.assertEqual(sum(task.registrations_nr for task in tasks), 4)
+        self.assertIn("contacts_nr: 3", out.getvalue())
+        self.assertIn("registrations_nr: 4", out.getvalue())
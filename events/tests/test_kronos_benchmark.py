@@ -0,0 +1,88 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+import requests
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Contact
+from events.kronos import KronosClient
+from events.kronos_standin import (
+    RecordedKronos,
+    SyntheticKronos,
+    get_request_key,
+    install,
+)
+from events.models import Event
+
+
+class TestKronosStandIn(TestCase):
+    def test_synthetic_pages(self):
+        stand_in = SyntheticKronos(events_nr=2, participants_nr=600, organizations_nr=3)
+        with install(stand_in):
+            client = KronosClient()
+
+        events = client.get_meetings()
+        self.assertEqual(len(events), 2)
+        pages = list(client.iter_participants(events[1]["eventId"]))
+        self.assertEqual([len(page) for page in pages], [500, 100])
+        self.assertEqual(len(client.get_all_organizations()), 3)
+        self.assertEqual(
+            client.get_contact_photo(pages[0][0]["contactId"])["contactId"],
+            pages[0][0]["contactId"],
+        )
+        self.assertIsNone(client.get_contact_photo("missing"))
+
+    def test_replay(self):
+        request = requests.Request(
+            "GET",
+            "https://kronos.example.com/api/v2018/countries",
+            json={},
+        ).prepare()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "kronos.json"
+            path.write_text(
+                json.dumps(
+                    {
+                        get_request_key(request): {
+                            "status_code": 200,
+                            "data": [{"code": "ro"}],
+                        }
+                    }
+                )
+            )
+            stand_in = RecordedKronos(path)
+
+        with install(stand_in):
+            client = KronosClient()
+        self.assertEqual(client.get_countries(), [{"code": "ro"}])
+        with self.assertRaises(requests.HTTPError):
+            client.get_org_types()
+
+
+class TestKronosBenchmark(TestCase):
+    def test_benchmark(self):
+        out = StringIO()
+        call_command(
+            "kronos_benchmark",
+            "--events=2",
+            "--participants=10",
+            "--organizations=4",
+            stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split()[:2] for line in lines[1:]],
+            [
+                ["events", "2"],
+                ["organizations", "4"],
+                ["participants", "20"],
+                ["photos", "15"],
+            ],
+        )
+        # Everything is rolled back
+        self.assertFalse(Event.objects.exists())
+        self.assertFalse(Contact.objects.exists())
@@ -0,0 +1,237 @@
+import json
+from itertools import chain
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from events.kronos import (
+    PAGE_SIZE,
+    RETRY_STATUSES,
+    KronosClient,
+    fetch_concurrently,
+)
+
+
+def make_response(data, status_code=200, headers=None):
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.headers = headers or {}
+    resp.json.return_value = data
+    return resp
+
+
+CACHE_SETTINGS = {
+    "KRONOS_CACHE_ENABLED": True,
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+}
+
+
+class TestKronosClient(SimpleTestCase):
+    def setUp(self):
+        self.mock_request = patch("events.kronos.requests.Session.request").start()
+        self.login_responses = [
+            make_response({"authenticationToken": "token-1"}),
+            make_response({"authenticationToken": "token-2"}),
+        ]
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_session_reused(self):
+        self.mock_request.side_effect = [
+            self.login_responses[0],
+            make_response({"totalRecordCount": 1, "records": [1]}),
+            make_response({"totalRecordCount": 1, "records": [2]}),
+        ]
+        client = KronosClient()
+        self.assertEqual(client.get_meetings(), [1])
+        self.assertEqual(client.get_meetings(), [2])
+
+        self.assertEqual(self.mock_request.call_count, 3)
+        headers = self.mock_request.call_args.kwargs["headers"]
+        self.assertEqual(headers["Authorization"], "Token token-1")
+
+    @override_settings(
+        KRONOS_POOL_SIZE=3,
+        KRONOS_MAX_RETRIES=4,
+        KRONOS_BACKOFF_FACTOR=0.1,
+        KRONOS_BACKOFF_JITTER=0.2,
+    )
+    def test_session_config(self):
+        self.mock_request.side_effect = self.login_responses
+        client = KronosClient()
+
+        adapter = client.session.get_adapter("https://kronos.example.com/")
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(adapter.max_retries.total, 4)
+        self.assertEqual(adapter.max_retries.backoff_factor, 0.1)
+        self.assertEqual(adapter.max_retries.backoff_jitter, 0.2)
+        self.assertEqual(set(adapter.max_retries.status_forcelist), set(RETRY_STATUSES))
+
+    def test_refresh_expired_token(self):
+        self.mock_request.side_effect = [
+            self.login_responses[0],
+            make_response({}, status_code=401),
+            self.login_responses[1],
+            make_response({"totalRecordCount": 1, "records": [1]}),
+        ]
+        client = KronosClient()
+        self.assertEqual(client.get_meetings(), [1])
+
+        self.assertEqual(client.auth_token, "token-2")
+        headers = self.mock_request.call_args.kwargs["headers"]
+        self.assertEqual(headers["Authorization"], "Token token-2")
+        # No token is sent when logging in again
+        login_headers = self.mock_request.call_args_list[2].kwargs["headers"]
+        self.assertNotIn("Authorization", login_headers)
+
+    def test_query_organizations_pages(self):
+        total = 2500
+
+        def fake_request(method, url, json, **kwargs):
+            if url.endswith("/authentication/token"):
+                return make_response({"authenticationToken": "token-1"})
+            skip, limit = json["skip"], json["limit"]
+            records = [
+                {"organizationId": i} for i in range(skip, min(total, skip + limit))
+            ]
+            return make_response({"totalRecordCount": total, "records": records})
+
+        self.mock_request.side_effect = fake_request
+        client = KronosClient()
+        result = client.get_organizations_for_event("event-1")
+
+        self.assertEqual(result, [{"organizationId": i} for i in range(total)])
+        skips = sorted(
+            call.kwargs["json"]["skip"]
+            for call in self.mock_request.call_args_list
+            if call.kwargs["url"].endswith("/organizations/query")
+        )
+        self.assertEqual(skips, [0, 1000, 2000])
+        for call in self.mock_request.call_args_list[1:]:
+            self.assertEqual(call.kwargs["json"]["eventIds"], ["event-1"])
+
+    def test_iter_participants_pages(self):
+        total = 1200
+
+        def fake_request(method, url, params, **kwargs):
+            if url.endswith("/authentication/token"):
+                return make_response({"authenticationToken": "token-1"})
+            q = json.loads(params["q"])
+            self.assertEqual(q["eventIds"], ["event-1"])
+            skip, limit = q["skip"], q["limit"]
+            records = list(range(skip, min(total, skip + limit)))
+            return make_response({"totalRecordCount": total, "records": records})
+
+        self.mock_request.side_effect = fake_request
+        client = KronosClient()
+        pages = list(client.iter_participants("event-1"))
+
+        self.assertEqual([len(page) for page in pages], [500, 500, 200])
+        self.assertEqual(client.get_participants("event-1"), list(range(total)))
+
+    def test_iter_participants_limit_capped(self):
+        total = 1200
+        cap = 300
+
+        def fake_request(method, url, params, **kwargs):
+            if url.endswith("/authentication/token"):
+                return make_response({"authenticationToken": "token-1"})
+            q = json.loads(params["q"])
+            skip, limit = q["skip"], min(q["limit"], cap)
+            records = list(range(skip, min(total, skip + limit)))
+            return make_response({"totalRecordCount": total, "records": records})
+
+        self.mock_request.side_effect = fake_request
+        client = KronosClient()
+        pages = list(client.iter_participants("event-1"))
+
+        self.assertEqual([len(page) for page in pages], [300, 300, 300, 300])
+        self.assertEqual(list(chain.from_iterable(pages)), list(range(total)))
+
+    def test_query_organizations_limit_capped(self):
+        total = 2500
+        cap = 700
+
+        def fake_request(method, url, json, **kwargs):
+            if url.endswith("/authentication/token"):
+                return make_response({"authenticationToken": "token-1"})
+            skip, limit = json["skip"], min(json["limit"], cap)
+            records = [
+                {"organizationId": i} for i in range(skip, min(total, skip + limit))
+            ]
+            return make_response({"totalRecordCount": total, "records": records})
+
+        self.mock_request.side_effect = fake_request
+        client = KronosClient()
+        result = client.get_organizations_for_event("event-1")
+
+        self.assertEqual(result, [{"organizationId": i} for i in range(total)])
+
+    def test_iter_participants_exact_page(self):
+        def fake_request(method, url, params, **kwargs):
+            if url.endswith("/authentication/token"):
+                return make_response({"authenticationToken": "token-1"})
+            skip = json.loads(params["q"])["skip"]
+            # No totalRecordCount
+            return make_response(
+                {"records": list(range(skip, min(PAGE_SIZE, skip + PAGE_SIZE)))}
+            )
+
+        self.mock_request.side_effect = fake_request
+        client = KronosClient()
+        self.assertEqual(client.get_participants("event-1"), list(range(PAGE_SIZE)))
+        self.assertEqual(self.mock_request.call_count, 3)
+
+    def test_iter_participants_skip_ignored(self):
+        def fake_request(method, url, params, **kwargs):
+            if url.endswith("/authentication/token"):
+                return make_response({"authenticationToken": "token-1"})
+            return make_response({"records": list(range(PAGE_SIZE))})
+
+        self.mock_request.side_effect = fake_request
+        client = KronosClient()
+        with self.assertRaisesMessage(RuntimeError, "same page twice"):
+            client.get_participants("event-1")
+        self.assertEqual(self.mock_request.call_count, 3)
+
+    def test_fetch_concurrently(self):
+        self.assertEqual(
+            fetch_concurrently(lambda x: x * 2, range(20)), list(range(0, 40, 2))
+        )
+        self.assertEqual(fetch_concurrently(lambda x: x, []), [])
+
+    @override_settings(**CACHE_SETTINGS)
+    def test_cached_reference_data(self):
+        cache.clear()
+        self.mock_request.side_effect = [
+            self.login_responses[0],
+            make_response([{"organizationTypeId": "1"}]),
+            self.login_responses[1],
+        ]
+        self.assertEqual(KronosClient().get_org_types(), [{"organizationTypeId": "1"}])
+
+        # Shared between clients
+        client = KronosClient()
+        self.assertEqual(client.get_org_types(), [{"organizationTypeId": "1"}])
+        self.assertEqual(self.mock_request.call_count, 3)
+        self.assertEqual(client.cache_stats, {"hits": 1})
+
+    @override_settings(**CACHE_SETTINGS, KRONOS_CACHE_TIMEOUT=0)
+    def test_revalidate_cached_reference_data(self):
+        cache.clear()
+        self.mock_request.side_effect = [
+            self.login_responses[0],
+            make_response([{"code": "ro"}], headers={"ETag": '"v1"'}),
+            make_response(None, status_code=304),
+            make_response([{"code": "ro"}, {"code": "pl"}], headers={"ETag": '"v2"'}),
+        ]
+        client = KronosClient()
+        self.assertEqual(client.get_countries(), [{"code": "ro"}])
+        self.assertEqual(client.get_countries(), [{"code": "ro"}])
+        headers = self.mock_request.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+
+        self.assertEqual(client.get_countries(), [{"code": "ro"}, {"code": "pl"}])
+        self.assertEqual(client.cache_stats, {"misses": 2, "revalidated": 1})